@@ -9,6 +9,7 @@ import hiero.ui
 from PySide2 import QtGui
 from PySide2 import QtCore
 from PySide2 import QtWidgets
+from thumbnail_service import thumbnailService, connectThumbnailPrefetch, prefetchVisibleRows
 
 # Set to True, if you wat 'Set Status' right-click menu, False if not
 kAddStatusMenu = True
@@ -55,6 +56,9 @@ class CustomSpreadsheetColumns(QtCore.QObject):
 
   currentView = hiero.ui.activeView()
 
+  # Width of the thumbnails requested for the 'Thumbnail' column
+  kThumbnailWidth = 85
+
   # This is the list of Columns available
   gCustomColumnList = [
     { 'name' : 'Tags', 'cellType' : 'readonly'},
@@ -75,6 +79,101 @@ class CustomSpreadsheetColumns(QtCore.QObject):
     { 'name' : 'Department', 'cellType' : 'readonly' },        
   ]
 
+  def __init__(self):
+    QtCore.QObject.__init__(self)
+    self._repaintQueued = False
+
+    # {(item, frame, width) request: {(itemView, row): cell rect}} for Thumbnail cells painted while waiting for it
+    self._waitingCells = {}
+
+    # {itemView: {row: TrackItem}} for the rows each Spreadsheet has painted, used to prefetch the rows around them
+    self._rowItems = {}
+    thumbnailService().thumbnailReady.connect(self._thumbnailReady)
+
+  def _thumbnailReady(self, key):
+    """Repaint only the Thumbnail cells which were waiting for this thumbnail"""
+    cells = self._waitingCells.pop(key, None)
+    if not cells:
+      return
+    for (itemView, row), rect in cells.items():
+      if itemView is None:
+        self._queueRepaintSpreadsheets()
+        continue
+      try:
+        itemView.viewport().update(rect)
+      except RuntimeError:
+        # The Spreadsheet has been closed
+        self._rowItems.pop(itemView, None)
+
+  def _queueRepaintSpreadsheets(self):
+    """Schedule a repaint of the whole Spreadsheet, for cells painted without their view, coalescing any which arrive together"""
+    if not self._repaintQueued:
+      self._repaintQueued = True
+      QtCore.QTimer.singleShot(50, self._repaintSpreadsheets)
+
+  def _repaintSpreadsheets(self):
+    self._repaintQueued = False
+    for view in (hiero.ui.activeView(), self.currentView):
+      if isinstance(view, hiero.ui.SpreadsheetView):
+        for itemView in view.window().findChildren(QtWidgets.QAbstractItemView):
+          itemView.viewport().update()
+
+  def _waitForThumbnail(self, key, row, option):
+    """Remember the cell being painted without the thumbnail for key, so only it is repainted when it arrives"""
+    itemView = option.widget if isinstance(option.widget, QtWidgets.QAbstractItemView) else None
+    self._waitingCells.setdefault(key, {})[(itemView, row)] = QtCore.QRect(option.rect)
+
+  def _watchSpreadsheet(self, row, item, option):
+    """Record which TrackItem a Spreadsheet row shows, and start prefetching thumbnails the first time a Spreadsheet is painted"""
+    itemView = option.widget
+    if not isinstance(itemView, QtWidgets.QAbstractItemView):
+      return
+    if itemView in self._rowItems:
+      self._rowItems[itemView][row] = item
+      return
+
+    self._rowItems[itemView] = {row: item}
+    requestForRow = lambda row: self._thumbnailRequestForRow(itemView, row)
+    model = itemView.model()
+    # Rows move when the Spreadsheet is sorted, filtered or shows another Sequence
+    forgetRows = lambda *args: self._rowItems.get(itemView, {}).clear()
+    model.modelReset.connect(forgetRows)
+    model.layoutChanged.connect(forgetRows)
+    model.rowsInserted.connect(forgetRows)
+    model.rowsRemoved.connect(forgetRows)
+    connectThumbnailPrefetch(itemView, requestForRow)
+    QtCore.QTimer.singleShot(0, lambda: prefetchVisibleRows(itemView, requestForRow))
+
+  def _thumbnailRequestForRow(self, itemView, row):
+    """Returns the (item, frame, width) thumbnail request for a Spreadsheet row, or None.
+    The Spreadsheet only hands us the TrackItems of the rows it paints, so for a row not painted yet
+    this guesses the TrackItem the same distance along the track from the nearest row which has been."""
+    rowItems = self._rowItems.get(itemView)
+    if not rowItems:
+      return None
+    item = rowItems.get(row)
+    if item is None:
+      nearestRow = min(rowItems, key = lambda knownRow: abs(knownRow-row))
+      item = self._neighbourTrackItem(rowItems[nearestRow], row-nearestRow)
+    if item is None or item.mediaType() == hiero.core.TrackItem.MediaType.kAudio:
+      return None
+    if not item.source().mediaSource().isMediaPresent():
+      return None
+    return (item, item.sourceIn(), self.kThumbnailWidth)
+
+  def _neighbourTrackItem(self, item, offset):
+    """Returns the TrackItem offset places along item's track, or None"""
+    track = item.parentTrack()
+    if not track:
+      return None
+    trackItems = track.items()
+    for index, trackItem in enumerate(trackItems):
+      if trackItem == item:
+        if 0 <= index+offset < len(trackItems):
+          return trackItems[index+offset]
+        return None
+    return None
+
   def numColumns(self):
     """
       Return the number of custom columns in the spreadsheet view
@@ -313,21 +412,33 @@ class CustomSpreadsheetColumns(QtCore.QObject):
       painter.save()
       painter.setClipRect(option.rect)
       
+      # Thumbnails come from the shared ThumbnailService, which renders them in the background.
+      # Until they arrive the cell is drawn with an empty frame, and that cell is repainted by thumbnailReady.
+      service = thumbnailService()
+      self._watchSpreadsheet(row, item, option)
+      waitingFor = None
       if not imageView:
-        try:
-          imageView = item.thumbnail(item.sourceIn())
-          pen.setColor(QtGui.QColor(20,20,20))
-        # If we're here, we probably have a TC error, no thumbnail, so get it from the source Clip...
-        except:
-          pen.setColor(QtGui.QColor(QtCore.Qt.red))
-      
-      if not imageView:
-        try:
-          imageView = item.source().thumbnail()
-          pen.setColor(QtGui.QColor(QtCore.Qt.yellow))
-        except:
+        waitingFor = (item, item.sourceIn(), self.kThumbnailWidth)
+        imageView = service.image(*waitingFor)
+        pen.setColor(QtGui.QColor(20,20,20))
+
+      # If the TrackItem thumbnail failed, we probably have a TC error, so get it from the source Clip...
+      if not imageView and service.hasFailed(item, item.sourceIn(), self.kThumbnailWidth):
+        self._waitingCells.pop(waitingFor, None)
+        waitingFor = (item.source(), None, self.kThumbnailWidth)
+        imageView = service.image(*waitingFor)
+        pen.setColor(QtGui.QColor(QtCore.Qt.yellow))
+        if not imageView and service.hasFailed(item.source(), None, self.kThumbnailWidth):
+          self._waitingCells.pop(waitingFor, None)
           imageView  = QtGui.QImage("icons:Offline.png")
           pen.setColor(QtGui.QColor(QtCore.Qt.red))
+
+      if not imageView:
+        self._waitForThumbnail(waitingFor, row, option)
+        painter.setPen(pen)
+        painter.drawRoundedRect(r,1,1)
+        painter.restore()
+        return True
           
 
       QtGui.QIcon(QtGui.QPixmap.fromImage(imageView)).paint(painter, r, QtCore.Qt.AlignCenter)
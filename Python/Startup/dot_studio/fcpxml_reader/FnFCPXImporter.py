@@ -13,24 +13,27 @@ class FCPXImporter:
     # This will be the fcpxml_wrapper wrapping the .fcpxml file
     self.wrapper = None    
 
-  def _getSourceClipFromExistingAssetsBin(self, project, seqClip):
-    """Returns a Clip object from the project with an asset_id"""
-    clips = hiero.core.findItemsInProject(project, hiero.core.Clip)
-
-    asset_id = seqClip.asset.id
-    foundClip = None
-    for clip in clips:
-      clipTags = clip.tags()
-      for tag in clipTags:
-        tagMeta = tag.metadata()
-        if tagMeta.hasKey('tag.fcpx_id'):
-          tagID = tagMeta.value('tag.fcpx_id')
-          if tagID == asset_id:
-            foundClip = clip
+    # Clips in the project keyed by their 'tag.fcpx_id', built once per import by _existingClipsByAssetID
+    self._clipsByAssetID = None
+
+  def _existingClipsByAssetID(self, project):
+    """Returns a dict of the Clips in the project, keyed by the fcpx_id of their fcpxml Tag"""
+    if self._clipsByAssetID is None:
+      self._clipsByAssetID = {}
+      clips = hiero.core.findItemsInProject(project, hiero.core.Clip)
+      for clip in clips:
+        clipTags = clip.tags()
+        for tag in clipTags:
+          tagMeta = tag.metadata()
+          if tagMeta.hasKey('tag.fcpx_id'):
+            self._clipsByAssetID[tagMeta.value('tag.fcpx_id')] = clip
             break
 
-    asset = self.wrapper.getAssetByRefID(asset_id)
-    return foundClip
+    return self._clipsByAssetID
+
+  def _getSourceClipFromExistingAssetsBin(self, project, seqClip):
+    """Returns a Clip object from the project with an asset_id"""
+    return self._existingClipsByAssetID(project).get(seqClip.asset.id)
 
   def _createSequence(self, sequenceWrapper, project):
     """Creates a hiero.core.Sequence from an fcpxml sequence_wrapper and adds it to the specified project"""
@@ -62,46 +65,60 @@ class FCPXImporter:
 
     return sequence
 
-  def importFCPXMLFile(self, filepath, proj = None):
+  def _createAssetClip(self, asset, assetsBin):
+    """Creates a hiero.core.Clip, tagged with its fcpxml data, from an fcpxml asset_wrapper and adds it to the assetsBin"""
+    C = hiero.core.Clip(asset.filepath)
+    # Create a Tag with the FCP data
+    T = hiero.core.Tag("fcpxml")
+    tagMeta = T.metadata()
+    tagMeta.setValue("tag.fcpx_id", asset.id)
+    tagMeta.setValue("tag.fcpx_audio_channels", str(asset.audio_channels))
+    tagMeta.setValue("tag.fcpx_audio_rate", str(asset.audio_rate))
+    tagMeta.setValue("tag.fcpx_audio_sources", str(asset.audio_sources))
+    tagMeta.setValue("tag.fcpx_duration", str(asset.duration))
+    tagMeta.setValue("tag.fcpx_start_frame", str(asset.start_frame))
+    tagMeta.setValue("tag.fcpx_end_frame", str(asset.end_frame))
+    tagMeta.setValue("tag.fcpx_has_video", str(asset.has_video))
+    tagMeta.setValue("tag.fcpx_has_audio", str(asset.has_audio))
+    tagMeta.setValue("tag.fcpx_name", str(asset.name))
+    tagMeta.setValue("tag.fcpx_format", str(asset.format))
+    tagMeta.setValue("tag.fcpx_filepath", str(asset.filepath))
+    tagMeta.setValue("tag.fcpx_uid", str(asset.uid))
+    C.addTag(T)
+    assetsBin.addItem(hiero.core.BinItem(C))
+    if self._clipsByAssetID is not None:
+      self._clipsByAssetID[asset.id] = C
+    return C
+
+  def importFCPXMLFile(self, filepath, proj = None, streaming = False):
     """Imports the contents of an .fcpxml (sequences and clips) to a project (proj)
 
     @param: filepath - the full path to an .fcpxml file (Final Cut Pro X)
     @param: proj (optional) - a hiero.core.Project File to import to.
+    @param: streaming (optional) - if True, read the file incrementally, creating Clips and Sequences as they are read
     @return: the imported hiero.core.Sequence(s)
 
     """
     if not proj:
       proj = hiero.core.newProject()
 
+    # The project's existing Clips are indexed the first time a Sequence needs one
+    self._clipsByAssetID = None
+
     root = proj.clipsBin()
     assetsBin = hiero.core.Bin("assets")
     root.addItem(assetsBin)
     sequencesBin = hiero.core.Bin("sequences")
     root.addItem(sequencesBin)
 
+    if streaming:
+      return self._importFCPXMLFileIncrementally(filepath, proj, assetsBin, sequencesBin)
+
     # Read this sequence file into the fcpxml_wrapper 
     self.wrapper = fcpxml_wrapper(filepath)
     clipAssets = self.wrapper.assets
     for asset in clipAssets:
-      C = hiero.core.Clip(asset.filepath)
-      # Create a Tag with the FCP data
-      T = hiero.core.Tag("fcpxml")
-      tagMeta = T.metadata()
-      tagMeta.setValue("tag.fcpx_id", asset.id)
-      tagMeta.setValue("tag.fcpx_audio_channels", str(asset.audio_channels))
-      tagMeta.setValue("tag.fcpx_audio_rate", str(asset.audio_rate))
-      tagMeta.setValue("tag.fcpx_audio_sources", str(asset.audio_sources))
-      tagMeta.setValue("tag.fcpx_duration", str(asset.duration))
-      tagMeta.setValue("tag.fcpx_start_frame", str(asset.start_frame))
-      tagMeta.setValue("tag.fcpx_end_frame", str(asset.end_frame))
-      tagMeta.setValue("tag.fcpx_has_video", str(asset.has_video))
-      tagMeta.setValue("tag.fcpx_has_audio", str(asset.has_audio))
-      tagMeta.setValue("tag.fcpx_name", str(asset.name))
-      tagMeta.setValue("tag.fcpx_format", str(asset.format))
-      tagMeta.setValue("tag.fcpx_filepath", str(asset.filepath))
-      tagMeta.setValue("tag.fcpx_uid", str(asset.uid))
-      C.addTag(T)
-      assetsBin.addItem(hiero.core.BinItem(C))
+      self._createAssetClip(asset, assetsBin)
 
     projects = self.wrapper.projects
     for project in projects:
@@ -112,6 +129,21 @@ class FCPXImporter:
 
     return sequences
 
+  def _importFCPXMLFileIncrementally(self, filepath, proj, assetsBin, sequencesBin):
+    """Imports an .fcpxml with fcpxml_wrapper.iter_file, so Sequences are built while the rest of the file is read"""
+    self.wrapper = fcpxml_wrapper()
+    sequences = []
+    for kind, item in self.wrapper.iter_file(filepath, retain=False):
+      if kind == 'asset':
+        self._createAssetClip(item, assetsBin)
+      elif kind == 'project':
+        for sequence in item.sequences:
+          newSequence = self._createSequence(sequence, proj)
+          sequencesBin.addItem(hiero.core.BinItem(newSequence))
+          sequences.append(newSequence)
+
+    return sequences
+
 ### Handle the dropping of an .fcpxml file into the Bin View
 class BinViewDropHandler:
   kTextMimeType = "text/plain"
@@ -0,0 +1,83 @@
+# Benchmarks reading a synthetic .fcpxml with fcpxml_wrapper. Does not need Nuke Studio.
+# Usage: python fcpxml_benchmark.py [numClips]
+from __future__ import print_function
+import os
+import sys
+import tempfile
+import time
+
+import fcpxml_parser
+from fcpxml_parser import fcpxml_wrapper
+
+class linear_lookup_fcpxml_wrapper(fcpxml_wrapper):
+    """fcpxml_wrapper with the original linear-scan asset and format lookups, for comparison"""
+
+    def getAssetByRefID(self, id):
+        for asset in self.assets:
+            if asset.id == id:
+                return asset
+
+    def getFormatByFormatID(self, id):
+        for format in self.formats:
+            if format.id == id:
+                return format
+
+def writeSyntheticFCPXML(filename, numClips = 20000, numFormats = 4):
+    """Writes an .fcpxml with one asset per clip, a single project spine of numClips clips
+    and a matching clip for each asset in the event"""
+    frameDurations = ["1/24s", "1001/24000s", "1/25s", "1001/30000s"]
+    with open(filename, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE fcpxml>\n<fcpxml version="1.4">\n<resources>\n')
+        for i in range(numFormats):
+            f.write('<format id="f%i" name="Format%i" frameDuration="%s" width="1920" height="1080"/>\n'
+                    % (i, i, frameDurations[i % len(frameDurations)]))
+        for i in range(numClips):
+            f.write('<asset id="r%i" name="Shot%05i" uid="UID%05i" src="file:///media/Shot%05i.mov" start="%i/24s" '
+                    'duration="%i/24s" hasVideo="1" format="f%i" hasAudio="1" audioSources="1" audioChannels="2" '
+                    'audioRate="48000"/>\n' % (i, i, i, i, 1001+i, 48+i % 96, i % numFormats))
+        f.write('</resources>\n<library location="file:///media/synthetic.fcpbundle/">\n<event name="synthetic" uid="E0">\n')
+        for i in range(numClips):
+            f.write('<clip name="Shot%05i" duration="%i/24s" format="f%i" tcFormat="NDF">'
+                    '<video offset="0s" ref="r%i" duration="%i/24s"/></clip>\n'
+                    % (i, 48+i % 96, i % numFormats, i, 48+i % 96))
+        f.write('<project name="synthetic" uid="P0">\n<sequence duration="%i/24s" format="f0" tcStart="0s" tcFormat="NDF" '
+                'audioLayout="stereo" audioRate="48k">\n<spine>\n' % (numClips*48))
+        offset = 0
+        for i in range(numClips):
+            duration = 24+i % 24
+            f.write('<clip name="Shot%05i" offset="%i/24s" duration="%i/24s" start="%i/24s" tcFormat="NDF">'
+                    '<video offset="0s" ref="r%i" duration="%i/24s"/>'
+                    '<audio offset="0s" ref="r%i" duration="%i/24s" role="dialogue"/></clip>\n'
+                    % (i, offset, duration, 1001+i, i, duration, i, duration))
+            offset += duration
+        f.write('</spine>\n</sequence>\n</project>\n</event>\n</library>\n</fcpxml>\n')
+
+def timeRead(wrapperClass, filename, streaming = False):
+    """Returns the seconds taken to read filename with a wrapperClass instance"""
+    start = time.time()
+    wrapper = wrapperClass()
+    if streaming:
+        for item in wrapper.iter_file(filename):
+            pass
+    else:
+        wrapper.read_file(filename)
+    return time.time() - start
+
+def run(numClips = 20000):
+    fcpxml_parser.debug = False
+    handle, filename = tempfile.mkstemp(suffix='.fcpxml')
+    os.close(handle)
+    try:
+        writeSyntheticFCPXML(filename, numClips)
+        print("Synthetic .fcpxml: %i clips, %.1f MB" % (numClips, os.path.getsize(filename)/(1024.0*1024.0)))
+        linearTime = timeRead(linear_lookup_fcpxml_wrapper, filename)
+        print("  read_file, linear lookups:  %.3fs" % linearTime)
+        indexedTime = timeRead(fcpxml_wrapper, filename)
+        print("  read_file, indexed lookups: %.3fs (%.1fx)" % (indexedTime, linearTime/max(indexedTime, 1e-9)))
+        streamingTime = timeRead(fcpxml_wrapper, filename, streaming=True)
+        print("  iter_file, indexed lookups: %.3fs" % streamingTime)
+    finally:
+        os.remove(filename)
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
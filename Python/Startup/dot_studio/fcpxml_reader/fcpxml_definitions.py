@@ -43,8 +43,9 @@ class format_wrapper(object):
         self.id = None # r1
         self.width = None
         self.height = None
-        self.framerate = None # 25
-        self.frame_duration = None # 25
+        self.framerate = None # 25.0
+        self.rational_framerate = None # Fraction(25, 1), exact, for counting frames
+        self.frame_duration = None # 1/25s
 
 class asset_wrapper(object):
     """<asset id="r4" name="Shot0020_720p" uid="CE3C5DC674DCDF4366D9CEDEECB277CB" src="file:///Shot0020_720p.mov" start="62062/24000s" 
@@ -107,6 +108,7 @@ class sequence_wrapper(object):
         self.parentProject = None
         self.format = None        
         self.framerate = None
+        self.rational_framerate = None
         self.width = None
         self.height = None
         self.timecode_start = None
@@ -134,6 +136,7 @@ class clip_wrapper(object):
         self.timecode_format = None
         self.format = None
         self.framerate = None
+        self.rational_framerate = None
         self.video_track = []
         self.audio_track = []
         self.asset = None # This will be an asset_wrapper object, in order to get to the MediaSource
@@ -1,30 +1,90 @@
 from __future__ import division
-from xml.etree.ElementTree import parse, Element
+from xml.etree.ElementTree import parse, iterparse, Element
 from fcpxml_definitions import *
-import os, urlparse
+from fractions import Fraction
+import os, re, urlparse
 
-debug = True
+# Set to True to print the details of every element as it is read
+debug = False
 def printd(str):
     global debug
     if debug:
         print(str)
 
+# FCPXML time values are rational numbers of seconds, e.g. "351/25s", "1001/24000s", "0s" or "3.5s"
+timestringPattern = re.compile(r'^\s*(-?\d+(?:\.\d+)?)(?:/(\d+))?s?\s*$')
+
+# Parsed time strings. The same offsets and durations repeat a lot, so this saves re-parsing them.
+_timestringCache = {}
+kMaxTimestringCacheSize = 65536
+
+def timestringToFraction(time_str):
+    """Converts time strings (351/25s) into an exact number of seconds, as a fractions.Fraction (351/25)"""
+    try:
+        return _timestringCache[time_str]
+    except KeyError:
+        pass
+
+    match = timestringPattern.match(time_str)
+    if not match:
+        raise ValueError("Unable to parse FCPXML time value: %r" % time_str)
+
+    numerator, denominator = match.groups()
+    time_fraction = Fraction(numerator)
+    if denominator:
+        time_fraction /= int(denominator)
+
+    if len(_timestringCache) >= kMaxTimestringCacheSize:
+        _timestringCache.clear()
+    _timestringCache[time_str] = time_fraction
+    return time_fraction
+
 def timestringToSecs(time_str):
     """Converts time strings (351/25s) into a time value in seconds (14.04)"""
-    time_str = time_str.replace('s','')
-    time_float = eval('float(%s)' % time_str)
-    return time_float
+    return float(timestringToFraction(time_str))
 
 def get_frames_from_time(seconds, fps):
     ''' Returns the numer of frames in the amount of
     seconds specified using the framerate specified.
+    Pass seconds and fps as fractions.Fraction to count frames exactly.
 
     '''
     return int(seconds * fps)
 
+def get_frames_from_timestring(time_str, fps):
+    """Returns the exact number of whole frames in a time string (351/25s) at a rational framerate (fractions.Fraction)"""
+    return int(timestringToFraction(time_str) * fps)
+
+# Elements which can be placed in, or nest other elements in, a spine
+kStoryElementTags = ('spine', 'clip', 'asset-clip', 'ref-clip', 'sync-clip', 'mc-clip', 'gap', 'title')
+
+# Story elements which make a clip_wrapper in the Sequence, if they reference an asset
+kClipElementTags = ('clip', 'asset-clip')
+
+def trimClipToRange(clip, trimRange):
+    """Trims a clip_wrapper's timeline (and matching source) range to trimRange (in, out).
+    Returns False if nothing of the clip is left, True otherwise"""
+    if not trimRange:
+        return True
+    if clip.timeline_in < trimRange[0]:
+        clip.start_frame += trimRange[0] - clip.timeline_in
+        clip.timeline_in = trimRange[0]
+    if clip.timeline_out > trimRange[1]:
+        clip.end_frame -= clip.timeline_out - trimRange[1]
+        clip.timeline_out = trimRange[1]
+    return clip.timeline_in <= clip.timeline_out
+
+def indexByID(wrappers):
+    """Returns a dict of wrappers keyed by their id. If an id is repeated, the first wrapper with it is kept."""
+    index = {}
+    for wrapper in reversed(wrappers):
+        index[wrapper.id] = wrapper
+    return index
+
 class fcpxml_wrapper(object):
     def __init__(self, filename = None):
         self.framerate = 0
+        self.rational_framerate = Fraction(0)
         self.clip_count = None
         self.asset_count = None
         self.library = None
@@ -34,33 +94,45 @@ class fcpxml_wrapper(object):
         self.speeds = []
         self.projects = []
         self.formats = []
+        self.media = {} # <media> Elements, keyed by id
+        # ID lookup tables for self.assets and self.formats, rebuilt whenever the lists change size
+        self._assetsByID = {}
+        self._assetsIndexed = 0
+        self._formatsByID = {}
+        self._formatsIndexed = 0
 
         if filename:        
             self.read_file(filename)
 
     def getAssetByRefID(self, id):
         """Returns a asset_wrapper object based on its ID"""
-        for asset in self.assets:
-            if asset.id == id:
-                return asset
+        if self._assetsIndexed != len(self.assets):
+            self._assetsByID = indexByID(self.assets)
+            self._assetsIndexed = len(self.assets)
+        return self._assetsByID.get(id)
 
     def getFormatByFormatID(self, id):
         """Returns a format_wrapper object based on its ID"""
-        for format in self.formats:
-            if format.id == id:
-                return format
+        if self._formatsIndexed != len(self.formats):
+            self._formatsByID = indexByID(self.formats)
+            self._formatsIndexed = len(self.formats)
+        return self._formatsByID.get(id)
 
-    def makeClipWrapper(self, clipElement, parentSequence = None, isSubClip = False, isSequenceClip = False):
-        """Returns a clip_wrapper object from a clipElement
+    def makeClipWrapper(self, clipElement, parentSequence = None, isSubClip = False, isSequenceClip = False, timelineOffset = None, lane = None):
+        """Returns a clip_wrapper object from a clipElement (<clip> or <asset-clip>)
         It providing a parent Sequence, the returned object should provide a trackitem_wrapper?
         'isSubClip' is True if the Clip is nested, we use this to work out the offset (maybe)
         'isSequenceClip' is True if the Clip is in a Sequence (like a TrackItem)
+        'timelineOffset' - the absolute position of the clip in the Sequence, in seconds, if not its own 'offset'
+        'lane' - the absolute lane of the clip, if not its own 'lane'
         """
         clip_found = clip_wrapper()
         clip_found.name = clipElement.get('name')
 
         # Add the lane (track index) if the Clip is a subclip..
-        if isSubClip:
+        if lane is not None:
+            clip_found.lane = lane
+        elif isSubClip:
             clip_found.lane = int(clipElement.get('lane'))
 
         # A clip optionally specified a format if its a Sequence Clip.
@@ -68,6 +140,7 @@ class fcpxml_wrapper(object):
         if formatElement:
             clip_found.format = self.getFormatByFormatID(formatElement)
             clip_found.framerate = clip_found.format.framerate
+            clip_found.rational_framerate = clip_found.format.rational_framerate
 
         # Get the video Track for the Clip, referencing the asset by ref (ref = asset[id])
         videoElement = clipElement.find("video") # Should maybe be a findall?
@@ -103,6 +176,11 @@ class fcpxml_wrapper(object):
             clip_found.audio_track = audio_track
             clip_found.asset = self.getAssetByRefID( clip_found.audio_track.ref )        
 
+        # An <asset-clip> references its asset directly
+        assetRef = clipElement.get('ref')
+        if assetRef and self.getAssetByRefID(assetRef):
+            clip_found.asset = self.getAssetByRefID(assetRef)
+
         # Get clip percentages
         timeMaps = clipElement.findall('timeMap')
         if timeMaps:
@@ -110,9 +188,9 @@ class fcpxml_wrapper(object):
                 timepts = timeMap.findall('timept')
                 if timepts:
                     for timept in timepts:
-                        time = timestringToSecs(timept.get('time'))
+                        time = timestringToFraction(timept.get('time'))
                         if time != 0:
-                            chunk = (timestringToSecs(timept.get('value')))
+                            chunk = (timestringToFraction(timept.get('value')))
                             percentage = (chunk*100)/time
 
             clip_found.percentage = int(round(percentage))
@@ -134,28 +212,32 @@ class fcpxml_wrapper(object):
 
         if not clip_found.framerate:
             # FUGLY - FIX THIS!
-            clip_found.framerate = self.getFormatByFormatID(clip_found.asset.format).framerate
+            asset_format = self.getFormatByFormatID(clip_found.asset.format)
+            clip_found.framerate = asset_format.framerate
+            clip_found.rational_framerate = asset_format.rational_framerate
 
         printd("Got Clip with framerate: %s" % str(clip_found.framerate))
 
-        start_sec = timestringToSecs(start)
+        # Frames are counted with exact rational arithmetic, so long timelines don't drift by a frame
+        start_sec = timestringToFraction(start)
         printd("Got start element %s, which is %s secs" % (str(start), str(start_sec)))
         #sec_per = ((start_sec*clip_found.percentage)/100)
-        printd("parentSequence framerate: " + str(parentSequence.framerate))
-        clip_found.start_frame = int(start_sec*clip_found.framerate)
+        if parentSequence:
+            printd("parentSequence framerate: " + str(parentSequence.framerate))
+        clip_found.start_frame = get_frames_from_time(start_sec, clip_found.rational_framerate)
         printd("SEQ CLIP SOURCE START: " + str(clip_found.start_frame))
 
         # SOURCE OUT
         duration = clipElement.get('duration')
-        duration_sec = timestringToSecs(duration)
+        duration_sec = timestringToFraction(duration)
         #duration_retimed = ((duration_sec*clip_found.percentage)/100)
 
         # Need to confirm it's correct to use parent Sequence framerate here...
         # It's most certainly not correct to use the sequence framerate... need per clip...
         if parentSequence:
-            duration_frames = int(duration_sec*parentSequence.framerate)
+            duration_frames = get_frames_from_time(duration_sec, parentSequence.rational_framerate)
         else:
-            duration_frames = int(duration_sec*clip_found.framerate)
+            duration_frames = get_frames_from_time(duration_sec, clip_found.rational_framerate)
 
         printd("SEQ CLIP DURATION: " + str(duration_frames))
         printd("SEQ CLIP SOURCE END: " + str(clip_found.start_frame+duration_frames-1))        
@@ -163,9 +245,11 @@ class fcpxml_wrapper(object):
 
         # If the Clip is in a Sequence, we also care about its position in the timeline...
         if isSequenceClip:
-            timeline_offset = clipElement.get('offset')
-            timeline_offset_sec = timestringToSecs(timeline_offset)
-            timeline_offset_frame = int(timeline_offset_sec * parentSequence.framerate)
+            if timelineOffset is not None:
+                timeline_offset_frame = get_frames_from_time(timelineOffset, parentSequence.rational_framerate)
+            else:
+                timeline_offset = clipElement.get('offset')
+                timeline_offset_frame = get_frames_from_timestring(timeline_offset, parentSequence.rational_framerate)
             printd("TIMELINE CUT IN FRAME: " + str(timeline_offset_frame))
             clip_found.timeline_in = timeline_offset_frame
 
@@ -175,9 +259,252 @@ class fcpxml_wrapper(object):
 
         return clip_found       
 
-    def read_file(self, filename):
+    def readFormat(self, formatElem):
+        """Returns a format_wrapper from a <format> element, and adds it to self.formats"""
+        format = format_wrapper()
+        format.id = formatElem.get("id")
+        format.name = formatElem.get("name")
+        format.width = formatElem.get("width")
+        format.height = formatElem.get("height")
+        format.frame_duration = formatElem.get("frameDuration")
+        format.rational_framerate = 1 / timestringToFraction(format.frame_duration)
+        format.framerate = float(format.rational_framerate)
+        self.formats += [format]
+        return format
+
+    def readAsset(self, current_asset, isOnlyAsset = False):
+        """Returns an asset_wrapper from an <asset> element, and adds it to self.assets
+        'isOnlyAsset' is True if this is the only asset in the resources"""
         percentage = 100
+        asset_found = asset_wrapper()
+
+        # TO-DO: Just tidy this up in a loop with list of needed attributes
+        asset_found.id = current_asset.get('id')
+        printd("Asset ID: %s " % str(asset_found.id))
+
+        asset_found.name = current_asset.get('name')
+        printd("Asset Name: %s " % str(asset_found.name))
+
+        asset_found.uid = current_asset.get('uid')
+        printd("Asset UID: %s " % str(asset_found.uid))
+
+        asset_found.src = current_asset.get('src')
+        printd("Asset src: %s " % str(asset_found.src))
+
+        url = urlparse.urlparse(asset_found.src)
+        asset_found.filepath = os.path.abspath(os.path.join(url.netloc, url.path))
+        printd("Asset filepath: %s " % str(asset_found.filepath))
+
+        asset_found.has_video = current_asset.get('hasVideo')
+        printd("Asset hasVideo: %s " % str(asset_found.has_video))
+
+        asset_found.format = current_asset.get('format')
+        printd("Asset format: %s " % str(asset_found.format))
+
+        asset_found.has_audio = current_asset.get('hasAudio')
+        printd("Asset hasAudio: %s " % str(asset_found.has_audio))
+
+        asset_found.audio_sources = current_asset.get('audioSources')
+        printd("Asset audioSources: %s " % str(asset_found.audio_sources))
+
+        asset_found.audio_channels = current_asset.get('audioChannels')
+        printd("Asset audioChannels: %s " % str(asset_found.audio_channels))
+
+        asset_found.audio_rate = current_asset.get('audioRate')
+        printd("Asset audioRate: %s " % str(asset_found.audio_rate))
+
+        # Need to store this in a dict properly
+        asset_found.metadata = current_asset.find('metadata')
+        printd("Asset metadata: %s " % str(asset_found.metadata))
+
+        # Get asset retime percentages
+        timeMaps = current_asset.findall('timeMap')
+        if timeMaps:
+            for timeMap in timeMaps:
+                timepts = timeMap.findall('timept')
+                if timepts:
+                    for timept in timepts:
+                        time = timestringToFraction(timept.get('time'))
+                        if time != 0:
+                            chunk = (timestringToFraction(timept.get('value')))
+                            percentage = (chunk*100)/time
+
+            asset_found.percentage = int(round(percentage))
+
+        else:
+            asset_found.percentage = 100
+
+        # -------------------------------------------------------------
+        # -------------------------------------------------------------
+        # -------------------------------------------------------------
+        start = None
+        if isOnlyAsset:
+            start = "1"
+            printd("  START:" + str(start))
+        else:
+            start = current_asset.get('start')
+            if not start:
+                start = "1"
+                printd("  START: " + str(start))                    
+            else:
+                start_sec = timestringToFraction(start)
+                sec_per = ((start_sec*asset_found.percentage)/100)
+                asset_found.start_frame = get_frames_from_time(sec_per, self.rational_framerate)
+                printd("  START: " +  str(asset_found.start_frame))
+
+        #clip_found.filename = os.path.abspath(clip_found.src)
+        duration = current_asset.get('duration')
+        full_duration = (timestringToFraction(start) + timestringToFraction(duration))
+        full_duration_per = ((full_duration*asset_found.percentage)/100)
+        asset_found.end_frame = get_frames_from_time(full_duration_per, self.rational_framerate)
+        printd("  END: " + str(asset_found.end_frame))
+
+        # -------------------------------------------------------------
+        # -------------------------------------------------------------
+        # -------------------------------------------------------------
+
+        # Add current clip to the clip list
+        self.assets.append(asset_found)
+        return asset_found
 
+    def readLibrary(self, libraryElement):
+        """Returns a library_wrapper from a <library> element, and sets it as self.library"""
+        self.library = library_wrapper()
+        self.library.location = libraryElement.get("location")
+        printd("Got library: %s" % str(libraryElement))
+        return self.library
+
+    def readEventClip(self, current_event, clipElement):
+        """Returns a clip_wrapper from a <clip> element in an event, and adds it to the event"""
+        clip = self.makeClipWrapper(clipElement)
+        current_event.clips.append(clip)
+        return clip
+
+    def readProject(self, projectElement):
+        """Returns a project_wrapper from a <project> element, with its sequence and clips, and adds it to self.projects"""
+        current_project = project_wrapper()
+        current_project.name = projectElement.get("name")
+        current_project.uid = projectElement.get("uid")
+
+        sequenceElement = projectElement.find('sequence')
+        current_sequence = sequence_wrapper()
+        current_sequence.parentProject = current_project
+        durationString = sequenceElement.get("duration")
+        current_sequence.duration = timestringToSecs(durationString)
+        current_sequence.format = self.getFormatByFormatID(sequenceElement.get("format"))
+        current_sequence.width = current_sequence.format.width
+        current_sequence.height = current_sequence.format.height
+        current_sequence.framerate = current_sequence.format.framerate
+        current_sequence.rational_framerate = current_sequence.format.rational_framerate
+        tcStartString = sequenceElement.get("tcStart")
+        current_sequence.timecode_start = timestringToSecs(tcStartString)
+        current_sequence.timecode_format = sequenceElement.get("tcFormat")
+        current_sequence.audio_layout = sequenceElement.get("audioLayout")
+        current_sequence.audio_rate = sequenceElement.get("audioRate")
+        current_sequence.name = current_project.name
+        
+
+        spine = sequenceElement.find('spine')
+        noteElements = sequenceElement.findall('note')
+
+        # TO-DO: Need to just get the Text from these notes
+        #current_sequence.notes = noteElements
+
+        printd("Current 'Sequence' (project) name is %s\n" % current_sequence.name)
+
+        # Connected clips, secondary storylines and compound clips can be nested to any depth
+        current_sequence.clips.extend(self.readSpine(spine, current_sequence))
+
+        current_project.sequences.append(current_sequence)
+        self.projects.append(current_project)
+        return current_project
+
+    def readSpine(self, spineElement, parentSequence):
+        """Returns a flat list of clip_wrappers placed in parentSequence from a <spine>, and everything nested in it.
+
+        Story elements are visited with a work stack rather than recursion. Each work item carries the mapping
+        from its parent's local time to the Sequence timeline, so absolute offsets are worked out as we go:
+            absolute = parentAbsolute + (offset - parentStart)
+        where parentStart is the parent's 'start' (its first local time). Lanes add up in the same way.
+        A <ref-clip> is expanded from the spine of its <media> resource (a compound clip), trimmed to the ref-clip."""
+        placements = []
+        fps = parentSequence.rational_framerate
+
+        # Work items are: (element, parentAbsolute, parentStart, parentLane, trimRange, mediaRefs)
+        # trimRange is an (in, out) frame range placements are trimmed to, or None
+        # mediaRefs are the compound clips we're inside of, so a compound clip can't expand itself
+        stack = [(child, Fraction(0), Fraction(0), 0, None, ()) for child in reversed(list(spineElement))]
+
+        while stack:
+            element, parentAbsolute, parentStart, parentLane, trimRange, mediaRefs = stack.pop()
+            if element.tag not in kStoryElementTags:
+                continue
+
+            absolute = parentAbsolute + (timestringToFraction(element.get('offset', '0s')) - parentStart)
+            lane = parentLane + int(element.get('lane', 0))
+            start = timestringToFraction(element.get('start', '0s'))
+            children = list(element)
+
+            if element.tag == 'spine':
+                # Items in a storyline share the time of the storyline's parent
+                stack.extend([(child, parentAbsolute, parentStart, lane, trimRange, mediaRefs) for child in reversed(children)])
+                continue
+
+            if element.tag in kClipElementTags and self.elementAssetRef(element):
+                clip = self.makeClipWrapper(element, parentSequence=parentSequence, isSequenceClip=True, timelineOffset=absolute, lane=lane)
+                if trimClipToRange(clip, trimRange):
+                    placements.append(clip)
+
+            if element.tag == 'ref-clip':
+                mediaRef = element.get('ref')
+                mediaSpine = self.getCompoundClipSpine(mediaRef)
+                if mediaSpine is not None and mediaRef not in mediaRefs:
+                    duration = timestringToFraction(element.get('duration', '0s'))
+                    refClipRange = (get_frames_from_time(absolute, fps), get_frames_from_time(absolute + duration, fps) - 1)
+                    if trimRange:
+                        refClipRange = (max(refClipRange[0], trimRange[0]), min(refClipRange[1], trimRange[1]))
+                    children = list(mediaSpine) + children
+                    stack.extend([(child, absolute, start, lane, refClipRange, mediaRefs + (mediaRef,)) for child in reversed(children)])
+                    continue
+
+            # Connected clips and storylines are timed relative to this element's start
+            stack.extend([(child, absolute, start, lane, trimRange, mediaRefs) for child in reversed(children)])
+
+        printd("  Got %i clips from spine" % len(placements))
+        return placements
+
+    def elementAssetRef(self, element):
+        """Returns the asset ID a story element uses, either directly (<asset-clip>) or from its <video>/<audio>"""
+        if element.tag == 'asset-clip':
+            return element.get('ref')
+        for child in element:
+            if child.tag in ('video', 'audio') and self.getAssetByRefID(child.get('ref')):
+                return child.get('ref')
+        return None
+
+    def readMedia(self, mediaElement):
+        """Keeps a <media> resource (a compound or multicam clip), so <ref-clip>s can be expanded from it"""
+        self.media[mediaElement.get('id')] = mediaElement
+        return mediaElement
+
+    def getCompoundClipSpine(self, id):
+        """Returns the <spine> Element of a compound clip <media> resource, or None"""
+        mediaElement = self.media.get(id)
+        if mediaElement is None:
+            return None
+        sequenceElement = mediaElement.find('sequence')
+        if sequenceElement is None:
+            return None
+        return sequenceElement.find('spine')
+
+    def newEvent(self, eventElement):
+        """Returns an empty event_wrapper for an <event> element"""
+        current_event = event_wrapper()
+        current_event.name = eventElement.get('name')
+        current_event.uid = eventElement.get('uid')
+        return current_event
+
+    def read_file(self, filename):
         tree = parse(filename)
         root = tree.getroot()
         resources = root.find('resources')
@@ -188,187 +515,136 @@ class fcpxml_wrapper(object):
 
         mformat = resources.find('format')
 
+        for mediaElement in resources.findall('media'):
+            self.readMedia(mediaElement)
+
         masterFormats = resources.findall('format')
         for formatElem in masterFormats:
-            format = format_wrapper()
-            format.id = formatElem.get("id")
-            format.name = formatElem.get("name")
-            format.width = formatElem.get("width")
-            format.height = formatElem.get("height")
-            format.frame_duration = formatElem.get("frameDuration")
-            format.framerate = 1.0 / timestringToSecs(formatElem.get("frameDuration"))
-            self.formats += [format]
+            self.readFormat(formatElem)
 
         # Get the framerate - this needs to be done PER Clip, based on the format!
-        self.framerate = 1.0 / timestringToSecs(mformat.get('frameDuration'))
+        self.rational_framerate = 1 / timestringToFraction(mformat.get('frameDuration'))
+        self.framerate = float(self.rational_framerate)
         printd("**** Sequence FPS: %s " % self.framerate)
         printd("About to check assets for '{0}'".format(filename))
         if assets:
             self.asset_count = len(assets)
             for current_asset in assets:
-                asset_found = asset_wrapper()
-
-                # TO-DO: Just tidy this up in a loop with list of needed attributes
-                asset_found.id = current_asset.get('id')
-                printd("Asset ID: %s " % str(asset_found.id))
-
-                asset_found.name = current_asset.get('name')
-                printd("Asset Name: %s " % str(asset_found.name))
-
-                asset_found.uid = current_asset.get('uid')
-                printd("Asset UID: %s " % str(asset_found.uid))
-
-                asset_found.src = current_asset.get('src')
-                printd("Asset src: %s " % str(asset_found.src))
-
-                url = urlparse.urlparse(asset_found.src)
-                asset_found.filepath = os.path.abspath(os.path.join(url.netloc, url.path))
-                printd("Asset filepath: %s " % str(asset_found.filepath))
-
-                asset_found.has_video = current_asset.get('hasVideo')
-                printd("Asset hasVideo: %s " % str(asset_found.has_video))
-
-                asset_found.format = current_asset.get('format')
-                printd("Asset format: %s " % str(asset_found.format))
-
-                asset_found.has_audio = current_asset.get('hasAudio')
-                printd("Asset hasAudio: %s " % str(asset_found.has_audio))
-
-                asset_found.audio_sources = current_asset.get('audioSources')
-                printd("Asset audioSources: %s " % str(asset_found.audio_sources))
-
-                asset_found.audio_channels = current_asset.get('audioChannels')
-                printd("Asset audioChannels: %s " % str(asset_found.audio_channels))
-
-                asset_found.audio_rate = current_asset.get('audioRate')
-                printd("Asset audioRate: %s " % str(asset_found.audio_rate))
-
-                # Need to store this in a dict properly
-                asset_found.metadata = current_asset.find('metadata')
-                printd("Asset metadata: %s " % str(asset_found.metadata))
-
-                # Get asset retime percentages
-                timeMaps = current_asset.findall('timeMap')
-                if timeMaps:
-                    for timeMap in timeMaps:
-                        timepts = timeMap.findall('timept')
-                        if timepts:
-                            for timept in timepts:
-                                time = timestringToSecs(timept.get('time'))
-                                if time != 0:
-                                    chunk = (timestringToSecs(timept.get('value')))
-                                    percentage = (chunk*100)/time
-
-                    asset_found.percentage = int(round(percentage))
-
-                else:
-                    asset_found.percentage = 100
-
-                # -------------------------------------------------------------
-                # -------------------------------------------------------------
-                # -------------------------------------------------------------
-                start = None
-                if len(assets) == 1:
-                    start = "1"
-                    printd("  START:" + str(start))
-                else:
-                    start = current_asset.get('start')
-                    if not start:
-                        start = "1"
-                        printd("  START: " + str(start))                    
-                    else:
-                        start_sec = timestringToSecs(start)
-                        sec_per = ((start_sec*asset_found.percentage)/100)
-                        asset_found.start_frame = int(sec_per*self.framerate)
-                        printd("  START: " +  str(asset_found.start_frame))
-
-                #clip_found.filename = os.path.abspath(clip_found.src)
-                duration = current_asset.get('duration')
-                full_duration = (timestringToSecs(start) + timestringToSecs(duration))
-                full_duration_per = ((full_duration*asset_found.percentage)/100)
-                asset_found.end_frame = int(full_duration_per*self.framerate)
-                printd("  END: " + str(asset_found.end_frame))
-
-                # -------------------------------------------------------------
-                # -------------------------------------------------------------
-                # -------------------------------------------------------------
-
-                # Add current clip to the clip list
-                self.assets.append(asset_found)        
+                self.readAsset(current_asset, isOnlyAsset=len(assets) == 1)
 
         libraryElement = root.find('library') # Appears you can only have one library in fcpxml
-        self.library = library_wrapper()
-        self.library.location = libraryElement.get("location")
-        printd("Got library: %s" % str(libraryElement))
+        self.readLibrary(libraryElement)
 
         # This needs to be changed because there can be multiple events in a library
         eventElements = libraryElement.findall('event')        
         printd("Got events: %s" % str(eventElements))
 
         for eventElement in eventElements:
-            current_event = event_wrapper()
-            current_event.name = eventElement.get('name')
-            current_event.uid = eventElement.get('uid')
+            current_event = self.newEvent(eventElement)
 
             eventClipElements = eventElement.findall('clip')
             for clipElement in eventClipElements:
-                clip = self.makeClipWrapper(clipElement)
-                current_event.clips.append(clip)
+                self.readEventClip(current_event, clipElement)
 
             # Why are we treating this differently?
             projectElements = eventElement.findall('project')
             for projectElement in projectElements:
-                current_project = project_wrapper()
-                current_project.name = projectElement.get("name")
-                current_project.uid = projectElement.get("uid")
-
-                sequenceElement = projectElement.find('sequence')
-                current_sequence = sequence_wrapper()
-                current_sequence.parentProject = current_project
-                durationString = sequenceElement.get("duration")
-                current_sequence.duration = timestringToSecs(durationString)
-                current_sequence.format = self.getFormatByFormatID(sequenceElement.get("format"))
-                current_sequence.width = current_sequence.format.width
-                current_sequence.height = current_sequence.format.height
-                current_sequence.framerate = current_sequence.format.framerate
-                tcStartString = sequenceElement.get("tcStart")
-                current_sequence.timecode_start = timestringToSecs(tcStartString)
-                current_sequence.timecode_format = sequenceElement.get("tcFormat")
-                current_sequence.audio_layout = sequenceElement.get("audioLayout")
-                current_sequence.audio_rate = sequenceElement.get("audioRate")
-                current_sequence.name = current_project.name
-                
-
-                spine = sequenceElement.find('spine')
-                noteElements = sequenceElement.findall('note')
-
-                # TO-DO: Need to just get the Text from these notes
-                #current_sequence.notes = noteElements
-
-                sequenceClipElements = spine.findall('clip')
-                printd("Current 'Sequence' (project) name is %s\n" % current_sequence.name)
-                printd("  sequenceClipElements: " + str(sequenceClipElements))
-
-                for sequenceClipElement in sequenceClipElements:
-
-                    sequenceClip = self.makeClipWrapper(sequenceClipElement, parentSequence=current_sequence, isSequenceClip=True)
-                    current_sequence.clips.append(sequenceClip)
-
-                    # We need to also traverse the clip elements to find any sub-clips...
-                    # Q) Can this sub-clip be more than 1 level deep... I'm sure it could be...
-                    subclips = sequenceClipElement.findall('clip')
-                    if len(subclips)==0:
-                        printd("No Sub-Clips found - hooray!")                    
-                    else:
-                        printd("*** %i Sub-<clip> elements found!" % (len(subclips)))
-                        for subclipElement in subclips:
-                            sequenceClip = self.makeClipWrapper(subclipElement, parentSequence=current_sequence, isSubClip=True, isSequenceClip=True)
-                            current_sequence.clips.append(sequenceClip)
-
-                current_project.sequences.append(current_sequence)
-                self.projects.append(current_project)
+                self.readProject(projectElement)
 
             self.events.append(current_event)                
         self.library.events.append(self.events)
 
-        printd("Got projects: %s" % str(self.projects))
\ No newline at end of file
+        printd("Got projects: %s" % str(self.projects))
+
+    def iter_file(self, filename, retain = True):
+        """Reads an .fcpxml file incrementally, yielding (kind, wrapper) tuples as each element is completed:
+            ('format', format_wrapper), ('asset', asset_wrapper), ('library', library_wrapper),
+            ('clip', clip_wrapper) for clips in an event, ('project', project_wrapper) and ('event', event_wrapper)
+        Processed elements are cleared as parsing goes, so memory use does not grow with the size of the file.
+        The wrappers are also added to this fcpxml_wrapper, as they are by read_file.
+        'retain' - if False, event clips and projects are dropped from this fcpxml_wrapper once they have been yielded.
+        Formats and assets are always kept, as clips look them up by ID."""
+
+        # The open elements, from the root down. Elements are only handled at these known paths.
+        elementStack = []
+        current_event = None
+
+        # The first asset is held back until we know if it is the only one, which read_file treats specially
+        heldAsset = None
+
+        for eventType, element in iterparse(filename, events=('start', 'end')):
+            if eventType == 'start':
+                elementStack.append(element)
+                path = tuple([e.tag for e in elementStack[1:]])
+
+                if path == ('library',):
+                    yield ('library', self.readLibrary(element))
+                elif path == ('library', 'event'):
+                    current_event = self.newEvent(element)
+                continue
+
+            path = tuple([e.tag for e in elementStack[1:]])
+            elementStack.pop()
+            handled = True
+
+            if path == ('resources', 'format'):
+                format = self.readFormat(element)
+                if not self.framerate:
+                    # As read_file, the first format gives the framerate
+                    self.framerate = format.framerate
+                    self.rational_framerate = format.rational_framerate
+                    printd("**** Sequence FPS: %s " % self.framerate)
+                yield ('format', format)
+
+            elif path == ('resources', 'media'):
+                # Kept whole for expanding <ref-clip>s, so not cleared
+                self.readMedia(element)
+                handled = False
+
+            elif path == ('resources', 'asset'):
+                self.asset_count = (self.asset_count or 0) + 1
+                if self.asset_count == 1:
+                    heldAsset = element
+                    continue
+                if heldAsset is not None:
+                    yield ('asset', self.readAsset(heldAsset))
+                    heldAsset.clear()
+                    heldAsset = None
+                yield ('asset', self.readAsset(element))
+
+            elif path == ('resources',):
+                if heldAsset is not None:
+                    yield ('asset', self.readAsset(heldAsset, isOnlyAsset=True))
+                    heldAsset.clear()
+                    heldAsset = None
+
+            elif path == ('library', 'event', 'clip'):
+                clip = self.readEventClip(current_event, element)
+                yield ('clip', clip)
+                if not retain:
+                    current_event.clips.remove(clip)
+
+            elif path == ('library', 'event', 'project'):
+                project = self.readProject(element)
+                yield ('project', project)
+                if not retain:
+                    self.projects.remove(project)
+
+            elif path == ('library', 'event'):
+                self.events.append(current_event)
+                yield ('event', current_event)
+                current_event = None
+
+            elif path == ('library',):
+                self.library.events.append(self.events)
+
+            else:
+                handled = False
+
+            # Drop everything we have finished with from the tree, so it does not build up
+            if handled:
+                element.clear()
+                if elementStack:
+                    elementStack[-1].remove(element)
+
+        printd("Got projects: %s" % str(self.projects))
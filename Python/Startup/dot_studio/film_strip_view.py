@@ -1,6 +1,7 @@
 import hiero.ui
 import hiero.core
 from PySide2 import QtGui, QtCore, QtWidgets
+from thumbnail_service import thumbnailService, connectThumbnailPrefetch, rowsByRequest
 
 class MyListModel(QtCore.QAbstractListModel): 
     def __init__(self, datain, parent=None, *args): 
@@ -8,13 +9,37 @@ class MyListModel(QtCore.QAbstractListModel):
         """
         QtCore.QAbstractListModel.__init__(self, parent, *args) 
         self.listdata = datain
+        self._thumbnailRows = rowsByRequest(self.thumbnailRequest, len(self.listdata))
+        thumbnailService().thumbnailReady.connect(self._thumbnailReady)
+
+    def setListData(self, datain):
+        """Replaces the rows, reusing this model so its view and thumbnailReady connection are kept"""
+        self.beginResetModel()
+        self.listdata = datain
+        self._thumbnailRows = rowsByRequest(self.thumbnailRequest, len(self.listdata))
+        self.endResetModel()
+
+    def _thumbnailReady(self, key):
+        """Repaints the rows showing a thumbnail the ThumbnailService has just rendered"""
+        for row in self._thumbnailRows.get(key, ()):
+            self.dataChanged.emit(self.index(row), self.index(row))
+
+    def thumbnailRequest(self, row):
+        """Returns the (item, frame, width) ThumbnailService request for a row"""
+        if row < len(self.listdata):
+            return self.listdata[row]
+        return None
 
     def rowCount(self, parent=QtCore.QModelIndex()): 
         return len(self.listdata) 
 
     def data(self, index, role):
         if index.isValid() and role == QtCore.Qt.DecorationRole:
-            return QtGui.QIcon(self.listdata[index.row()])
+            # Thumbnails are rendered in the background, a placeholder is shown until they arrive
+            pixmap = thumbnailService().pixmap(*self.listdata[index.row()])
+            if not pixmap:
+                pixmap = QtGui.QPixmap("icons:VideoOnlyWarning.png")
+            return QtGui.QIcon(pixmap)
         if index.isValid() and role == QtCore.Qt.DisplayRole:
             return "Shot " + str(index.row())
             #return QtCore.QVariant(self.listdata[index.row()])
@@ -31,6 +56,11 @@ class MyListView(QtWidgets.QListView):
         # create table
         list_data = []
         self.lm = MyListModel(list_data, self)
+        self.setModel(self.lm)
+        connectThumbnailPrefetch(self, self.thumbnailRequest)
+
+    def thumbnailRequest(self, row):
+        return self.model().thumbnailRequest(row) if self.model() else None
 
 
     def createTrackItemStripForSequence(self, sequence):
@@ -49,22 +79,12 @@ class MyListView(QtWidgets.QListView):
     def getFilmStripImagesForCurrentViewer(self):
         seq = hiero.ui.activeSequence()
         trackItems = self.createTrackItemStripForSequence(seq)
-        numItems = len(trackItems)
-        images = []
-        for i in range(0, numItems):
-            try:
-                qimage = trackItems[i].thumbnail()
-                pixmap = QtGui.QPixmap.fromImage(qimage.scaledToWidth(300))
-                images += [pixmap]
-            except:
-                pass
-
-        return images        
+        # Thumbnails are requested from the ThumbnailService by the model as they are shown
+        return [(trackItem, None, 300) for trackItem in trackItems if trackItem]
 
     def updateView(self):
         images = self.getFilmStripImagesForCurrentViewer()
-        self.lm = MyListModel(images, self)
-        self.setModel(self.lm)
+        self.lm.setListData(images)
 
 class FilmStripPanel(QtWidgets.QWidget):
 
@@ -84,9 +104,8 @@ class FilmStripPanel(QtWidgets.QWidget):
     def initUI(self):
         layout = QtWidgets.QFormLayout(self)
         self.contactSheet = MyListView()
-        # create table
-        self.list_data = []
-        self.listModel = MyListModel(self.list_data, self)
+        # The view's model is reused, and reset with each update
+        self.listModel = self.contactSheet.lm
         self.clearSelectedMarkersButton = QtWidgets.QPushButton("Refresh")
         self.clearSelectedMarkersButton.clicked.connect(self.updateView)
         layout.addRow("",self.clearSelectedMarkersButton)
@@ -112,22 +131,12 @@ class FilmStripPanel(QtWidgets.QWidget):
     def getFilmStripImagesForCurrentViewer(self):
         seq = hiero.ui.activeSequence()
         trackItems = self.createTrackItemStripForSequence(seq)
-        numItems = len(trackItems)
-        images = []
-        for i in range(0, numItems):
-            try:
-                qimage = trackItems[i].thumbnail()
-                pixmap = QtGui.QPixmap.fromImage(qimage.scaledToWidth(100))
-                images += [pixmap]
-            except:
-                pass
-
-        return images        
+        # Thumbnails are requested from the ThumbnailService by the model as they are shown
+        return [(trackItem, None, 100) for trackItem in trackItems if trackItem]
 
     def updateView(self):
         images = self.getFilmStripImagesForCurrentViewer()
-        self.listModel = MyListModel(images, self)
-        self.contactSheet.setModel(self.listModel)
+        self.listModel.setListData(images)
 
 filmStrip = FilmStripPanel()
 hiero.ui.registerPanel( "uk.co.thefoundry.filmstrip", filmStrip )
@@ -0,0 +1,199 @@
+# flatten_benchmark.py - times the edit-boundary sweep in flatten_sequence against the frame-by-frame scan
+# Usage: from the Script Editor in Hiero/NukeStudio:
+#   import flatten_benchmark
+#   flatten_benchmark.run()                          # synthetic sequences
+#   flatten_benchmark.checkFlattenedTimes(flatten_benchmark.SyntheticSequence())   # retimed and reversed shots
+#   flatten_benchmark.runOnSequence(hiero.ui.activeSequence())
+#   flatten_benchmark.runFlattenOnSequence(hiero.ui.activeSequence())   # direct vs. razor track building
+import random
+import time
+
+import flatten_sequence
+
+
+class SyntheticTrack(object):
+    """Minimal stand-in for a hiero.core.VideoTrack, implementing the calls the flatten analysis makes"""
+    def __init__(self, trackIndex, enabled = True):
+        self._trackIndex = trackIndex
+        self._enabled = enabled
+        self._items = []
+
+    def trackIndex(self):
+        return self._trackIndex
+
+    def isEnabled(self):
+        return self._enabled
+
+    def items(self):
+        return tuple(self._items)
+
+
+class SyntheticTrackItem(object):
+    """Minimal stand-in for a hiero.core.TrackItem, with a constant retime. A negative playbackSpeed reverses it."""
+    def __init__(self, name, track, timelineIn, timelineOut, enabled = True, sourceIn = 0, playbackSpeed = 1.0):
+        self._name = name
+        self._track = track
+        self._timelineIn = timelineIn
+        self._timelineOut = timelineOut
+        self._enabled = enabled
+        self._sourceIn = sourceIn
+        self._playbackSpeed = playbackSpeed
+
+    def name(self):
+        return self._name
+
+    def parentTrack(self):
+        return self._track
+
+    def timelineIn(self):
+        return self._timelineIn
+
+    def timelineOut(self):
+        return self._timelineOut
+
+    def isEnabled(self):
+        return self._enabled
+
+    def playbackSpeed(self):
+        return self._playbackSpeed
+
+    def mapTimelineToSource(self, t):
+        # The source frame shown at timeline frame t, so reversed shots map their timeline in to their last source frame
+        return self._sourceIn + int((t - self._timelineIn) * self._playbackSpeed)
+
+    def sourceIn(self):
+        return min(self.mapTimelineToSource(self._timelineIn), self.mapTimelineToSource(self._timelineOut))
+
+    def sourceOut(self):
+        return max(self.mapTimelineToSource(self._timelineIn), self.mapTimelineToSource(self._timelineOut))
+
+    def __repr__(self):
+        return "SyntheticTrackItem(%s, %i-%i)" % (self._name, self._timelineIn, self._timelineOut)
+
+
+class SyntheticSequence(object):
+    """Minimal stand-in for a hiero.core.Sequence, with randomly cut shots on each of its video tracks"""
+    def __init__(self, numTracks = 12, duration = 24*60*90, meanShotLength = 72, gapChance = 0.1, reverseChance = 0.05,
+                 seed = 0):
+        rng = random.Random(seed)
+        self._duration = duration
+        self._tracks = []
+        for trackIndex in range(numTracks):
+            track = SyntheticTrack(trackIndex, enabled = rng.random() > 0.05)
+            t = 0
+            count = 0
+            while t < duration:
+                length = max(1, int(rng.expovariate(1.0/meanShotLength)))
+                if rng.random() > gapChance:
+                    timelineOut = min(t+length, duration)-1
+                    # Some shots are retimed, and some of those reversed, starting from their last source frame
+                    speed = rng.choice((1.0, 1.0, 1.0, 0.5, 2.0))
+                    isReversed = rng.random() < reverseChance
+                    item = SyntheticTrackItem("V%i_%04i" % (trackIndex+1, count), track, t, timelineOut,
+                                              enabled = rng.random() > 0.02,
+                                              sourceIn = int((timelineOut - t) * speed) + 1000 if isReversed else 1000,
+                                              playbackSpeed = -speed if isReversed else speed)
+                    track._items.append(item)
+                    count += 1
+                t += length
+            self._tracks.append(track)
+
+    def duration(self):
+        return self._duration
+
+    def inTime(self):
+        raise RuntimeError("No in point set")
+
+    def outTime(self):
+        raise RuntimeError("No out point set")
+
+    def videoTracks(self):
+        return tuple(self._tracks)
+
+    def trackItemsAt(self, t):
+        # Bisecting would flatter the per-frame scan, the real API call is not free either
+        return tuple(item for track in self._tracks for item in track._items if item._timelineIn <= t <= item._timelineOut)
+
+
+def timeCall(method, *args):
+    """Returns (seconds, result) for method(*args)"""
+    start = time.time()
+    result = method(*args)
+    return time.time() - start, result
+
+
+def runOnSequence(sequence, flattenAction = None):
+    """Times both analysis methods on a Sequence, checks they agree and prints the timings"""
+    flattenAction = flattenAction or flatten_sequence.flatten
+    T0, T1, includedTrackItems = flattenAction.visibleShotRangeForSequence(sequence)
+
+    sweepTime, sweepResult = timeCall(flattenAction.sweepEditsForVisibleShots, sequence, T0, T1, includedTrackItems)
+    frameTime, frameResult = timeCall(flattenAction.scanFramesForVisibleShots, sequence, T0, T1, includedTrackItems)
+
+    numEdits = sum(len(track.items()) for track in sequence.videoTracks())
+    print("Frames: %i, TrackItems: %i" % (T1-T0, numEdits))
+    print("  per-frame scan: %.3fs" % frameTime)
+    print("  edit sweep:     %.3fs (%.1fx)" % (sweepTime, frameTime/max(sweepTime, 1e-9)))
+    if sweepResult != frameResult:
+        print("  WARNING: edit sweep and per-frame scan disagree!")
+
+    return frameTime, sweepTime
+
+
+def checkFlattenedTimes(sequence, flattenAction = None):
+    """Checks the Flattened Track times of every visible shot occurance show the same source frames as the shot,
+    in the same direction, so retimed and reversed shots play as they did. Returns the number which don't."""
+    flattenAction = flattenAction or flatten_sequence.flatten
+    T0, T1, includedTrackItems = flattenAction.visibleShotRangeForSequence(sequence)
+    shotOccuranceDictionary = flattenAction.sweepEditsForVisibleShots(sequence, T0, T1, includedTrackItems)
+
+    numReversed = 0
+    mismatches = 0
+    for shot, shotOccurances in shotOccuranceDictionary.items():
+        for t0, t1 in shotOccurances:
+            timelineIn, timelineOut, srcIn, srcOut = flattenAction.flattenedShotTimes(shot, t0, t1)
+            if shot.playbackSpeed() < 0:
+                numReversed += 1
+            if (timelineIn, timelineOut) != (t0, t1) or (srcIn, srcOut) != (shot.mapTimelineToSource(t0), shot.mapTimelineToSource(t1)):
+                mismatches += 1
+            elif srcOut != srcIn and (srcOut < srcIn) != (shot.playbackSpeed() < 0):
+                mismatches += 1
+
+    print("  flattened times: %i occurances, %i of reversed shots" % (sum(len(occurances) for occurances in shotOccuranceDictionary.values()),
+                                                                      numReversed))
+    if mismatches:
+        print("  WARNING: %i flattened shots don't play their source frames as the original shot did!" % mismatches)
+    return mismatches
+
+
+def run(trackCounts = (1, 4, 12), duration = 24*60*10, meanShotLength = 72):
+    """Runs the benchmark over synthetic sequences with an increasing number of video tracks"""
+    for numTracks in trackCounts:
+        sequence = SyntheticSequence(numTracks=numTracks, duration=duration, meanShotLength=meanShotLength)
+        print("Synthetic sequence, %i video tracks" % numTracks)
+        runOnSequence(sequence)
+        checkFlattenedTimes(sequence)
+
+
+def trackItemRanges(track):
+    """Returns the sorted (timelineIn, timelineOut, sourceIn, sourceOut) of every TrackItem on a Track"""
+    return sorted((item.timelineIn(), item.timelineOut(), item.sourceIn(), item.sourceOut()) for item in track.items())
+
+
+def runFlattenOnSequence(sequence, flattenAction = None):
+    """Times building the Flattened Track directly against the RazorTrack method on a real Sequence.
+    The visible shot analysis is done once up front so only the track building is timed."""
+    flattenAction = flattenAction or flatten_sequence.flatten
+    shotOccuranceDictionary = flattenAction.buildVisibleShotListForSequence(sequence)
+    numOccurances = sum(len(occurances) for occurances in shotOccuranceDictionary.values())
+
+    directTime, directTrack = timeCall(flattenAction.directFlattenedTrackFromOccurances, shotOccuranceDictionary)
+    razorTime, razorTrack = timeCall(flattenAction.razorFlattenedTrackFromOccurances, sequence, shotOccuranceDictionary)
+
+    print("Shots: %i, occurances: %i" % (len(shotOccuranceDictionary), numOccurances))
+    print("  razor track:  %.3fs" % razorTime)
+    print("  direct track: %.3fs (%.1fx)" % (directTime, razorTime/max(directTime, 1e-9)))
+    if directTrack and razorTrack and trackItemRanges(directTrack) != trackItemRanges(razorTrack):
+        print("  WARNING: direct and razor Flattened Tracks differ!")
+
+    return razorTime, directTime
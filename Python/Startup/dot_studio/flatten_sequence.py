@@ -7,6 +7,7 @@ from PySide2 import QtGui
 from PySide2 import QtCore
 from PySide2 import QtWidgets
 from foundry.ui import ProgressTask
+from sequence_helpers import visibleShotOccurancesFromSpans
 
 # TO-DO:
 # 1) Handle retimes properly - DONE
@@ -62,9 +63,61 @@ class FlattenAction(QtWidgets.QAction):
                         track.setEnabled(False)
 
 
-    def makeFlattenedVideoTrackFromSequence(self, sequence, includedItems = None, trackName = 'Flattened'):
+    def makeFlattenedVideoTrackFromSequence(self, sequence, includedItems = None, trackName = 'Flattened', useRazor = False):
         """
         Adds a 'Flattened' Video Track to the sequence. Returns the Flattened Track.
+        @param useRazor: (optional) - if True, cut each shot on a temporary RazorTrack rather than setting its ranges directly
+        """
+
+        # Build a list of shots which are visible for the Sequence
+        shotOccuranceDictionary = self.buildVisibleShotListForSequence(sequence, includedItems=includedItems)
+
+        if useRazor:
+            return self.razorFlattenedTrackFromOccurances(sequence, shotOccuranceDictionary, trackName=trackName)
+        else:
+            return self.directFlattenedTrackFromOccurances(shotOccuranceDictionary, trackName=trackName)
+
+    def directFlattenedTrackFromOccurances(self, shotOccuranceDictionary, trackName = 'Flattened'):
+        """
+        Builds the Flattened Track by copying each shot once per occurance and setting its timeline and source ranges.
+        No temporary Sequence is needed. Returns the Flattened Track, or None if cancelled.
+        """
+
+        flattenedTrack = hiero.core.VideoTrack(trackName)
+
+        numShots = len(shotOccuranceDictionary)
+        progressTask = ProgressTask("Flattening Sequence...")
+        count = 1
+        for shot, shotOccurances in shotOccuranceDictionary.items():
+            for t0, t1 in shotOccurances:
+                shotForFlattenTrack = shot.copy()
+                shotForFlattenTrack.setTimes(*self.flattenedShotTimes(shot, t0, t1))
+                flattenedTrack.addItem(shotForFlattenTrack)
+
+            # Make the progressTask bars update
+            progressTask.setProgress(int(100.0*(float(count)/float(numShots))))
+            count += 1
+
+            if progressTask.isCancelled():
+                del(progressTask)
+                return None
+
+        del(progressTask)
+
+        return flattenedTrack
+
+    def flattenedShotTimes(self, shot, t0, t1):
+        """
+        Returns (timelineIn, timelineOut, sourceIn, sourceOut) for a copy of shot showing its frames t0-t1 on the Flattened Track.
+        mapTimelineToSource takes care of any retime on the shot. Reversed shots map t0 to the end of their source range,
+        which is kept so the copy plays in reverse too.
+        """
+        return t0, t1, shot.mapTimelineToSource(t0), shot.mapTimelineToSource(t1)
+
+    def razorFlattenedTrackFromOccurances(self, sequence, shotOccuranceDictionary, trackName = 'Flattened'):
+        """
+        Builds the Flattened Track by cutting each shot occurance on a temporary RazorTrack.
+        Returns the Flattened Track, or None if cancelled.
         """
 
         # Create a placeholder Video Track
@@ -73,9 +126,6 @@ class FlattenAction(QtWidgets.QAction):
         flattenedTrack = hiero.core.VideoTrack(trackName)
         tempSequence.addTrack(razorTrack)
 
-        # Build a list of shots which are visible for the Sequence
-        shotOccuranceDictionary = self.buildVisibleShotListForSequence(sequence, includedItems=includedItems)
-
         numShots = len(shotOccuranceDictionary)
         progressTask = ProgressTask("Flattening Sequence...")
         count = 1
@@ -151,14 +201,13 @@ class FlattenAction(QtWidgets.QAction):
             progressAmount = int(100.0*(float(t-T0)/float(T1-T0)))
             progressTask.setProgress(progressAmount)
 
-    def buildVisibleShotListForSequence(self, sequence, includedItems = None):
-
+    def visibleShotRangeForSequence(self, sequence, includedItems = None):
         """
-        Walks the timeline and returns a list of under the playhead (including those with unconnected media)
+        Determines the frame range to analyse for the sequence, and any TrackItems the analysis is restricted to
         @param sequence: a hiero.core.Sequence object to flatten
         @param includedItems: (optional) - an optional list of included items which to consider for the flattened track
-        
-        @return: A dictionary of visible shot occurances in the sequence
+
+        @return: tuple of (T0, T1, includedTrackItems)
         """
 
         # If in Points are set, only flatten the sequence between these values
@@ -172,11 +221,6 @@ class FlattenAction(QtWidgets.QAction):
         except:
             T1 = sequence.duration()
 
-        # shotOccuranceDictionary structure is laid out like this:
-        # {'shot1': [ [instance1_In, instance1_tOut], [instance2_In, instance2_tOut]... ] }
-
-        shotOccuranceDictionary = {}
-
         # includedItems can contain either Tracks or TrackItems.
         # At present selection for Tracks AND TrackItems is not possible in the GUI.
 
@@ -194,13 +238,72 @@ class FlattenAction(QtWidgets.QAction):
                 T0 = min([item.timelineIn() for item in includedTrackItems])
                 T1 = max([item.timelineOut() for item in includedTrackItems])
 
+        return T0, T1, includedTrackItems
+
+    def buildVisibleShotListForSequence(self, sequence, includedItems = None, perFrame = False):
+
+        """
+        Walks the timeline and returns a list of under the playhead (including those with unconnected media)
+        @param sequence: a hiero.core.Sequence object to flatten
+        @param includedItems: (optional) - an optional list of included items which to consider for the flattened track
+        @param perFrame: (optional) - if True, use the original frame-by-frame scan rather than walking edit boundaries
+        
+        @return: A dictionary of visible shot occurances in the sequence
+        """
+
+        T0, T1, includedTrackItems = self.visibleShotRangeForSequence(sequence, includedItems=includedItems)
+
+        if perFrame:
+            return self.scanFramesForVisibleShots(sequence, T0, T1, includedTrackItems)
+        else:
+            return self.sweepEditsForVisibleShots(sequence, T0, T1, includedTrackItems)
+
+    def sweepEditsForVisibleShots(self, sequence, T0, T1, includedTrackItems = None):
+        """
+        Builds the shotOccuranceDictionary by visiting edit points only, rather than every frame.
+        Each enabled TrackItem's timeline in/out is read once, so the cost scales with the number of edits.
+        """
+
+        # shotOccuranceDictionary structure is laid out like this:
+        # {'shot1': [ [instance1_In, instance1_tOut], [instance2_In, instance2_tOut]... ] }
+
+        progressTask = ProgressTask("Analysing Sequence...")
+
+        spans = []
+        for track in sequence.videoTracks():
+            if not track.isEnabled():
+                continue
+            trackIndex = track.trackIndex()
+            for shot in track.items():
+                if shot.isEnabled():
+                    spans.append((trackIndex, shot.timelineIn(), shot.timelineOut(), shot))
+
+            if progressTask.isCancelled():
+                del(progressTask)
+                return {}
+
+        shotOccuranceDictionary = visibleShotOccurancesFromSpans(spans, T0, T1, includedTrackItems=includedTrackItems)
+
+        del(progressTask)
+
+        return shotOccuranceDictionary
+
+    def scanFramesForVisibleShots(self, sequence, T0, T1, includedTrackItems = None):
+        """
+        Builds the shotOccuranceDictionary by asking the sequence for its TrackItems at every frame from T0 to T1.
+        This is slow on long, multi-track sequences, but kept as a reference for sweepEditsForVisibleShots.
+        """
+
+        # shotOccuranceDictionary structure is laid out like this:
+        # {'shot1': [ [instance1_In, instance1_tOut], [instance2_In, instance2_tOut]... ] }
+
+        shotOccuranceDictionary = {}
+
         progressTask = ProgressTask("Analysing Sequence...")
 
         # This loop is pretty ineffecient.. just traverses every single frame. 
         # There may be large gaps with no shots etc.
-        # Would be more efficient to use sets and some smarter maths.
         # We ignore the 'See through missing media' method and pick the top-most, enabled piece of media, (even missing media)
-        cv = hiero.ui.currentViewer()
         for t in range(T0, T1):
             # This returns a tuples of possible shots at time slice t
             shotsAtT = sequence.trackItemsAt(t)
@@ -240,7 +343,6 @@ class FlattenAction(QtWidgets.QAction):
 
         return shotOccuranceDictionary
 
-
     def eventHandler(self, event):
         hiero.ui.insertMenuAction( self, event.menu )
 
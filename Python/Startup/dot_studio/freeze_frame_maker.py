@@ -14,32 +14,9 @@ from hiero.ui import findMenuAction, insertMenuAction, createMenuAction
 from PySide2 import QtGui
 from PySide2 import QtCore
 from PySide2 import QtWidgets
+from sequence_helpers import visibleShotAtTime
 
 ##### Helper Methods #####
-def visibleShotAtTime(sequence, t):
-  """visibleShotAtTime(sequence, t) -> Returns the visible TrackItem in a Sequence (sequence) at a specified frame (t)."""
-  shot = sequence.trackItemAt(t)
-  if shot == None:
-    return shot
-    
-  elif shot.isMediaPresent() and shot.isEnabled():
-    return shot
-  
-  else:
-    # If we're here, the Media is offline or disabled... work out what's visible on other tracks...
-    badTrack = shot.parent()
-    vTracks = list(sequence.videoTracks())
-    vTracks.remove(badTrack)
-    for track in reversed(vTracks):
-      trackItems = track.items()
-      for shotCandidate in trackItems:
-        if shotCandidate.timelineIn() <= t and shotCandidate.timelineOut() >= time:
-          if shotCandidate.isMediaPresent() and shotCandidate.isEnabled():
-            shot = shotCandidate
-            break
-  
-  return shot
-
 def trackAboveTrackItemHasCollision(trackItem):
   """This returns True if the TrackItem in the Track above 'trackItem' overlaps in time, False otherwise"""
   track = trackItem.parent()
@@ -190,7 +167,7 @@ class FreezeFrameMaker:
       currentShot = visibleShotAtTime(sequence,T)    
 
       if not currentShot:
-        QMessageBox.warning(None, "Freeze Frame Maker", "Unable to make a Still Frame from the current frame.", QMessageBox.Ok)
+        QtWidgets.QMessageBox.warning(None, "Freeze Frame Maker", "Unable to make a Still Frame from the current frame.", QtWidgets.QMessageBox.Ok)
         return
       else:
         fileKnob,currentFrame,trackItem = getFreezeFrameInfoFromTrackItemAtTime(currentShot,T)
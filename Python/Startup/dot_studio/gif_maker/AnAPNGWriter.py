@@ -0,0 +1,90 @@
+# APNG Writer - writes an animated PNG a frame at a time, for the GIF maker
+# Full colour, lossless and played by every current browser. Frames are compressed with PIL's PNG encoder and
+# written to the file as they are added, so memory use does not grow with the frame count.
+# Does not need Nuke Studio, only PIL (pip install pillow).
+import struct
+import zlib
+from io import BytesIO
+from AnAnimationWriter import DeltaAnimationWriter, registerWriter
+
+kPNGSignature = b"\x89PNG\r\n\x1a\n"
+
+def pngChunk(chunkType, data):
+  """Returns a PNG chunk: its length, type, data and CRC"""
+  return struct.pack(">I", len(data)) + chunkType + data + struct.pack(">I", zlib.crc32(chunkType + data) & 0xffffffff)
+
+def encodedIDAT(image, compressLevel = 6):
+  """Returns the IDAT chunk payloads PIL's PNG encoder writes for an RGB image"""
+  buffer = BytesIO()
+  image.save(buffer, "PNG", compress_level=compressLevel)
+  data = buffer.getvalue()
+
+  payloads = []
+  pos = len(kPNGSignature)
+  while pos < len(data):
+    length, chunkType = struct.unpack(">I4s", data[pos:pos+8])
+    if chunkType == b"IDAT":
+      payloads.append(data[pos+8:pos+8+length])
+    pos += length + 12
+  return payloads
+
+@registerWriter
+class APNGWriter(DeltaAnimationWriter):
+  kFormat = "APNG"
+  kExtension = "png"
+  kDelayUnits = 1000
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0, compressLevel = 6, loop = 0):
+    """Writes an animated PNG as frames are added with addFrame(). Call close() to finish the file.
+    The output must be seekable, as the frame count is written into the header at the end.
+    @param output: the file path, or a binary file object
+    @param fps: frames per second the animation plays at
+    @param optimize: merge unchanged frames into the frame before, and crop changed frames to what changed
+    @param threshold: how much a channel may change, 0-255, before a pixel counts as changed when optimizing
+    @param compressLevel: zlib compression level, 0-9
+    @param loop: number of times the animation loops, 0 to loop forever"""
+    DeltaAnimationWriter.__init__(self, output, fps, optimize, threshold)
+    self.compressLevel = compressLevel
+    self.loop = loop
+    self._sequenceNumber = 0
+    self._actlOffset = None
+
+  def begin(self, image):
+    """Opens the output and writes the PNG header, with a placeholder frame count"""
+    self.openOutput()
+    width, height = self.size
+    self._file.write(kPNGSignature)
+    # 8 bit RGB, no interlacing
+    self._file.write(pngChunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+    self._actlOffset = self._file.tell()
+    self._file.write(pngChunk(b"acTL", struct.pack(">II", 0, self.loop)))
+
+  def encodeImage(self, image):
+    """Returns the zlib compressed IDAT payloads for an RGB image"""
+    return encodedIDAT(image, self.compressLevel)
+
+  def writeFrame(self, encoded, delay, box = None):
+    """Writes a frame control chunk, then the frame's data as IDAT for the first frame, or fdAT after"""
+    left, top, width, height = box or ((0, 0) + self.size)
+    # no disposal and source blending: each frame stays in place for the next to draw over, so a frame cropped to a
+    # box only replaces what changed
+    self._file.write(pngChunk(b"fcTL", struct.pack(">IIIIIHHBB", self._sequenceNumber, width, height, left, top,
+                                                   delay, self.kDelayUnits, 0, 0)))
+    self._sequenceNumber += 1
+    for payload in encoded:
+      if self.frameCount == 0:
+        self._file.write(pngChunk(b"IDAT", payload))
+      else:
+        self._file.write(pngChunk(b"fdAT", struct.pack(">I", self._sequenceNumber) + payload))
+        self._sequenceNumber += 1
+    self.frameCount += 1
+
+  def finish(self):
+    """Writes the frame count into the header, ends the PNG, and closes its file if the writer opened it"""
+    DeltaAnimationWriter.finish(self)
+    self._file.write(pngChunk(b"IEND", b""))
+    end = self._file.tell()
+    self._file.seek(self._actlOffset)
+    self._file.write(pngChunk(b"acTL", struct.pack(">II", self.frameCount, self.loop)))
+    self._file.seek(end)
+    self.closeOutput()
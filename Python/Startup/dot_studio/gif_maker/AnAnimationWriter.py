@@ -0,0 +1,226 @@
+# Animation Writer - the output formats the GIF maker can write, and what they have in common
+#
+# An AnimationWriter is given frames one at a time with addFrame() and writes them out as they come, so memory use
+# does not grow with the frame count. Each writer times its encoding, so stats() can be used to choose a format by
+# speed and size. Writers register themselves by format name with registerWriter().
+# Does not need Nuke Studio, only PIL (pip install pillow).
+import collections
+import os
+import time
+try:
+  from PIL import ImageChops
+except ImportError:
+  # No format can be written without PIL, see AnimationWriter.available()
+  ImageChops = None
+
+# Writer classes by format name, in the order they were registered
+kWriters = collections.OrderedDict()
+
+def registerWriter(writerClass):
+  """Adds an AnimationWriter subclass to the formats the GIF maker can write. Can be used as a class decorator."""
+  kWriters[writerClass.kFormat] = writerClass
+  return writerClass
+
+def writerForFormat(format):
+  """Returns the AnimationWriter class registered for a format name, e.g. "GIF" """
+  if format not in kWriters:
+    raise ValueError("Unknown animation format %s, expected one of %s" % (format, ", ".join(kWriters)))
+  return kWriters[format]
+
+def availableFormats():
+  """Returns the names of the registered formats which can be written here"""
+  return [format for format, writerClass in kWriters.items() if writerClass.available()]
+
+def changedBox(previous, image, threshold = 0):
+  """Returns the (left, top, right, bottom) box of the pixels which differ between two RGB images of the same size
+  by more than threshold in any channel, or None if none do"""
+  difference = ImageChops.difference(previous, image)
+  if threshold:
+    difference = difference.point(lambda value: 255 if value > threshold else 0)
+  return difference.getbbox()
+
+class AnimationWriter(object):
+  # Format name and file extension, set by subclasses
+  kFormat = None
+  kExtension = None
+
+  @classmethod
+  def available(cls):
+    """Returns True if the format can be written here"""
+    return ImageChops is not None
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0):
+    """Writes an animation as frames are added with addFrame(). Call close() to finish the file.
+    @param output: the file path, or a binary file object
+    @param fps: frames per second the animation plays at
+    @param optimize: let the writer leave out what has not changed since the previous frame, if it can
+    @param threshold: how much a channel may change, 0-255, before a pixel counts as changed when optimizing"""
+    self.output = output
+    self.fps = float(fps)
+    self.optimize = optimize
+    self.threshold = threshold
+    self.size = None
+    self.frameCount = 0 # frames written
+    self.inputFrames = 0 # frames added, including those merged into the frame before
+    self.encodeSeconds = 0.0 # time spent in addFrame(), repeatFrame() and close()
+    self._file = None
+    self._ownsFile = False
+
+  def openOutput(self):
+    """Opens the output for writing, if it is a path"""
+    if hasattr(self.output, "write"):
+      self._file = self.output
+    else:
+      self._file = open(self.output, "wb")
+      self._ownsFile = True
+
+  def closeOutput(self):
+    """Closes the output if the writer opened it"""
+    if self._ownsFile:
+      self._file.close()
+    else:
+      self._file.flush()
+    self._file = None
+
+  def addFrame(self, image, seconds = None):
+    """Adds a PIL image to the animation.
+    @param image: the frame. Frames of a different size to the first are resized to match
+    @param seconds: (optional) - how long the frame shows for, 1/fps by default"""
+    start = time.time()
+    if image.mode != "RGB":
+      image = image.convert("RGB")
+    if self.size is None:
+      self.size = image.size
+      self.begin(image)
+    elif image.size != self.size:
+      image = image.resize(self.size)
+    self.inputFrames += 1
+    self.encodeFrame(image, seconds if seconds is not None else 1.0 / self.fps)
+    self.encodeSeconds += time.time() - start
+
+  def repeatFrame(self, seconds = None):
+    """Shows the last frame added for longer, e.g. for a frame known to be the same without decoding it.
+    @param seconds: (optional) - how much longer the frame shows for, 1/fps by default"""
+    if self.size is None:
+      raise ValueError("No frame to repeat")
+    start = time.time()
+    self.inputFrames += 1
+    self.extendFrame(seconds if seconds is not None else 1.0 / self.fps)
+    self.encodeSeconds += time.time() - start
+
+  def close(self):
+    """Finishes the animation, and closes its file if the writer opened it"""
+    if self.size is None or self._file is None:
+      return
+    start = time.time()
+    self.finish()
+    self.encodeSeconds += time.time() - start
+
+  def outputBytes(self):
+    """Returns the size of the output written so far, or None if it can't be told"""
+    try:
+      if not hasattr(self.output, "write"):
+        return os.path.getsize(self.output)
+      return self.output.tell()
+    except (OSError, IOError, AttributeError):
+      return None
+
+  def stats(self):
+    """Returns a dictionary of the format, frames added and written, encoding time and speed, and output size"""
+    return {"format": self.kFormat,
+            "inputFrames": self.inputFrames,
+            "frames": self.frameCount,
+            "encodeSeconds": self.encodeSeconds,
+            "framesPerSecond": self.inputFrames / self.encodeSeconds if self.encodeSeconds else 0.0,
+            "bytes": self.outputBytes()}
+
+  def begin(self, image):
+    """Opens the output and writes the header, given the first frame. Implemented by subclasses."""
+    raise NotImplementedError()
+
+  def encodeFrame(self, image, seconds):
+    """Writes an RGB frame which shows for seconds. Implemented by subclasses."""
+    raise NotImplementedError()
+
+  def extendFrame(self, seconds):
+    """Shows the last frame for seconds longer. Implemented by subclasses."""
+    raise NotImplementedError()
+
+  def finish(self):
+    """Writes the end of the file and closes it. Implemented by subclasses."""
+    raise NotImplementedError()
+
+class DeltaAnimationWriter(AnimationWriter):
+  """An AnimationWriter for formats whose frames are drawn over the frame before, like GIF and APNG.
+  With optimize on, an unchanged frame only adds to the previous frame's delay, and a changed frame is cropped to
+  what changed. Each frame is held back until the next arrives, when its delay is known, so repeatFrame() can add
+  to it."""
+
+  # Units per second of the format's frame delays
+  kDelayUnits = 100
+  # Largest delay a frame can have, longer frames are written more than once
+  kMaxDelay = 0xffff
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0):
+    AnimationWriter.__init__(self, output, fps, optimize, threshold)
+    self._delayTime = 0.0 # exact running time of the frames written, in delay units, so rounding errors don't add up
+    self._writtenDelay = 0
+    self._previous = None # last frame added, to compare the next against
+    self._pending = None # [encoded frame, box, seconds] of the last frame, written once its delay is known
+
+  def frameDelay(self, seconds):
+    """Returns the delay for the next frame in the format's units. Rounds the running time rather than each
+    frame, so e.g. 24 fps in hundredths of a second plays as 4, 4, 4, 5... and keeps time."""
+    self._delayTime += self.kDelayUnits * seconds
+    delay = int(round(self._delayTime)) - self._writtenDelay
+    self._writtenDelay += delay
+    return delay
+
+  def encodeFrame(self, image, seconds):
+    box = None
+    if self.optimize and self._previous is not None:
+      box = changedBox(self._previous, image, self.threshold)
+      if box is None:
+        self._pending[2] += seconds
+        return
+      if box == (0, 0) + self.size:
+        box = None
+
+    self.flush()
+    if box:
+      encoded = self.encodeImage(image.crop(box))
+      box = (box[0], box[1], box[2] - box[0], box[3] - box[1])
+    else:
+      encoded = self.encodeImage(image)
+    self._pending = [encoded, box, seconds]
+    if self.optimize:
+      self._previous = image
+
+  def extendFrame(self, seconds):
+    if self._pending is None:
+      raise ValueError("No frame to repeat")
+    self._pending[2] += seconds
+
+  def flush(self):
+    """Writes the last frame added, now how long it shows for is known"""
+    if self._pending is not None:
+      encoded, box, seconds = self._pending
+      self._pending = None
+      delay = self.frameDelay(seconds)
+      while delay > self.kMaxDelay:
+        self.writeFrame(encoded, self.kMaxDelay, box)
+        delay -= self.kMaxDelay
+      self.writeFrame(encoded, delay, box)
+
+  def finish(self):
+    self.flush()
+    self._previous = None
+
+  def encodeImage(self, image):
+    """Returns an RGB image encoded for writeFrame(). Implemented by subclasses."""
+    raise NotImplementedError()
+
+  def writeFrame(self, encoded, delay, box = None):
+    """Writes an encoded frame with a delay in kDelayUnits, at box (left, top, width, height) or over the whole
+    animation. Implemented by subclasses."""
+    raise NotImplementedError()
@@ -0,0 +1,53 @@
+# Benchmarks the GIF maker's output formats on synthetic frames, to choose between them by speed and size.
+# Does not need Nuke Studio, only PIL, and ffmpeg for WebP and H.264.
+# Usage: python AnAnimationWriterBenchmark.py [numFrames] [outputDirectory]
+from __future__ import print_function
+import os
+import sys
+import tempfile
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(cwd)
+
+from PIL import Image, ImageDraw
+from AnAnimationWriter import availableFormats, writerForFormat
+import AnGIFWriter
+import AnAPNGWriter
+import AnFFmpegWriter
+
+def syntheticFrames(numFrames, size = (480, 270), holdFrames = 0):
+  """Yields numFrames RGB frames of a box moving over a gradient, each held for holdFrames more frames"""
+  background = Image.radial_gradient("L").resize(size).convert("RGB")
+  for i in range(numFrames):
+    frame = background.copy()
+    x = (i // (holdFrames+1)) * 4 % size[0]
+    ImageDraw.Draw(frame).rectangle([x, size[1]//3, x + size[1]//3, 2*size[1]//3], fill=(255, 200, 0))
+    yield frame
+
+def runFormat(format, numFrames, outputDirectory, holdFrames = 0, optimize = True):
+  """Writes numFrames synthetic frames in a format, prints and returns the writer's stats"""
+  writerClass = writerForFormat(format)
+  outputPath = os.path.join(outputDirectory, "benchmark_%s.%s" % (format.replace(".", ""), writerClass.kExtension))
+  writer = writerClass(outputPath, fps = 24.0, optimize = optimize)
+  for frame in syntheticFrames(numFrames, holdFrames = holdFrames):
+    writer.addFrame(frame)
+  writer.close()
+
+  stats = writer.stats()
+  print("  %-6s %4i frames written, %7.1f frames/s, %8.1f KB" % (format, stats["frames"], stats["framesPerSecond"],
+                                                                 stats["bytes"]/1024.0))
+  return stats
+
+def run(numFrames = 240, outputDirectory = None):
+  """Runs every available format on moving frames, then on frames held for 4 frames each, as in a slow edit"""
+  outputDirectory = outputDirectory or tempfile.mkdtemp(prefix="gif_maker_benchmark_")
+  if not os.path.isdir(outputDirectory):
+    os.makedirs(outputDirectory)
+  print("Synthetic frames: %i, written to %s" % (numFrames, outputDirectory))
+  for holdFrames in (0, 4):
+    print("Moving every %i frame%s:" % (holdFrames+1, "s" if holdFrames else ""))
+    for format in availableFormats():
+      runFormat(format, numFrames, outputDirectory, holdFrames)
+
+if __name__ == '__main__':
+  run(int(sys.argv[1]) if len(sys.argv) > 1 else 240, sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,133 @@
+# FFmpeg Writers - animated WebP and H.264 MP4 previews for the GIF maker, encoded by a local ffmpeg
+# Frames are piped into ffmpeg's stdin as raw RGB as they are added, so nothing is kept in memory or on disk.
+# Needs ffmpeg on the PATH, or set the DOT_STUDIO_FFMPEG environment variable to its path.
+import os
+import shutil
+import subprocess
+import tempfile
+from AnAnimationWriter import AnimationWriter, registerWriter
+
+# ffmpeg executable to run
+kFFmpeg = os.environ.get("DOT_STUDIO_FFMPEG", "ffmpeg")
+
+class FFmpegWriter(AnimationWriter):
+  """An AnimationWriter which pipes frames into ffmpeg. Video encoders find what hasn't changed between frames
+  themselves, so optimize and threshold are not used. Frames which show for longer than 1/fps are sent repeatedly."""
+
+  @classmethod
+  def available(cls):
+    return super(FFmpegWriter, cls).available() and shutil.which(kFFmpeg) is not None
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0):
+    """@param output: the file path to write. ffmpeg needs a path, not a file object.
+    @param fps: frames per second the animation plays at"""
+    if hasattr(output, "write"):
+      raise ValueError("%s needs a file path to write to" % self.kFormat)
+    AnimationWriter.__init__(self, output, fps, optimize, threshold)
+    self._process = None
+    self._log = None
+    self._lastFrame = None
+    self._frameTime = 0.0 # exact running time in frames, so rounding errors don't add up
+    self._framesSent = 0
+
+  def encoderArguments(self):
+    """Returns the ffmpeg arguments for the encoder and output format. Implemented by subclasses."""
+    raise NotImplementedError()
+
+  def command(self):
+    """Returns the ffmpeg command line, reading raw RGB frames from stdin"""
+    width, height = self.size
+    return ([kFFmpeg, "-y", "-hide_banner", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "%ix%i" % (width, height), "-framerate", repr(self.fps),
+             "-i", "-", "-an"] + self.encoderArguments() + [self.output])
+
+  def begin(self, image):
+    """Starts ffmpeg. Its messages go to a temporary file rather than a pipe, so they can't fill up and stall it."""
+    self._log = tempfile.TemporaryFile()
+    self._process = subprocess.Popen(self.command(), stdin=subprocess.PIPE, stdout=self._log, stderr=self._log)
+    self._file = self._process.stdin
+
+  def _send(self, seconds):
+    """Sends the last frame to ffmpeg as many times as it takes to show for seconds"""
+    self._frameTime += seconds * self.fps
+    count = int(round(self._frameTime)) - self._framesSent
+    try:
+      for i in range(count):
+        self._file.write(self._lastFrame)
+    except (IOError, OSError):
+      self._fail()
+    self._framesSent += count
+    self.frameCount += count
+
+  def encodeFrame(self, image, seconds):
+    self._lastFrame = image.tobytes()
+    self._send(seconds)
+
+  def extendFrame(self, seconds):
+    self._send(seconds)
+
+  def finish(self):
+    """Closes ffmpeg's stdin and waits for it to finish writing"""
+    try:
+      self._file.close()
+    except (IOError, OSError):
+      pass
+    self._file = None
+    self._lastFrame = None
+    if self._process.wait() != 0:
+      self._fail()
+    self._log.close()
+
+  def _fail(self):
+    """Raises an IOError with ffmpeg's messages"""
+    try:
+      self._process.stdin.close()
+    except (IOError, OSError):
+      pass
+    self._file = None
+    self._process.wait()
+    self._log.seek(0)
+    message = self._log.read().decode("utf-8", "replace").strip()
+    self._log.close()
+    raise IOError("ffmpeg failed writing %s: %s" % (self.output, message or "exit code %i" % self._process.returncode))
+
+@registerWriter
+class WebPWriter(FFmpegWriter):
+  kFormat = "WebP"
+  kExtension = "webp"
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0, quality = 75, lossless = False, loop = 0):
+    """Writes an animated WebP with ffmpeg's libwebp_anim encoder. Full colour and much smaller than a GIF.
+    @param output: the file path to write
+    @param fps: frames per second the animation plays at
+    @param quality: 0-100, for lossy compression
+    @param lossless: compress losslessly instead
+    @param loop: number of times the animation loops, 0 to loop forever"""
+    FFmpegWriter.__init__(self, output, fps, optimize, threshold)
+    self.quality = quality
+    self.lossless = lossless
+    self.loop = loop
+
+  def encoderArguments(self):
+    return ["-c:v", "libwebp_anim", "-lossless", "1" if self.lossless else "0", "-quality", str(self.quality),
+            "-loop", str(self.loop), "-f", "webp"]
+
+@registerWriter
+class H264Writer(FFmpegWriter):
+  kFormat = "H.264"
+  kExtension = "mp4"
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0, crf = 23, preset = "veryfast"):
+    """Writes an H.264 MP4 preview with ffmpeg's libx264 encoder, playable in browsers and chat clients.
+    @param output: the file path to write
+    @param fps: frames per second the video plays at
+    @param crf: x264 constant rate factor, lower is better quality and bigger
+    @param preset: x264 preset, trading encoding speed for size"""
+    FFmpegWriter.__init__(self, output, fps, optimize, threshold)
+    self.crf = crf
+    self.preset = preset
+
+  def encoderArguments(self):
+    # yuv420p for browsers, which needs an even width and height
+    return ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf), "-pix_fmt", "yuv420p",
+            "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2", "-movflags", "+faststart", "-f", "mp4"]
@@ -6,19 +6,54 @@ import sys
 sys.path.append("/Library/Frameworks/Python.framework/Versions/3.7/lib/python3.7/site-packages")
 try:
     from PIL import Image
-except:
+except ImportError:
+    # The GIF actions are disabled without PIL
+    Image = None
     print("WARNING: Python Imaging Library not imported. Please install via pip install pillow and append install path to sys.path.")
-import os, time
+import os, re, time
 import hiero.core
 import hiero.ui
 from PySide2 import QtGui, QtCore, QtWidgets
-from io import BytesIO
+from AnGIFRenderQueue import gifRenderQueue, GIFRenderJob
+from AnAnimationWriter import writerForFormat, availableFormats
+
+def defaultOutputFilePath(name = None, extension = "gif", inFrame = None, reservedPaths = ()):
+  """Returns a new GIF path on the Desktop, including name and inFrame if given, or another format's with its extension.
+  Characters which can't go in a file name are replaced with _, and a count is added if the path is already taken,
+  by a file or by one of reservedPaths, e.g. those of the GIFs still queued."""
+  try:
+    desktop = os.path.join(os.getenv('HOME'),'Desktop')
+  except:
+    from os.path import expanduser
+    desktop = os.path.join(expanduser('~'),'Desktop')
+  parts = ['myGif']
+  if name:
+    parts.append(re.sub(r'[^\w.-]+', '_', name))
+  if inFrame is not None:
+    parts.append('%i' % inFrame)
+  parts.append('%i' % time.time())
+  root = os.path.join(desktop, '_'.join(parts))
+  path = '%s.%s' % (root, extension)
+  count = 1
+  while os.path.exists(path) or path in reservedPaths:
+    path = '%s_%i.%s' % (root, count, extension)
+    count += 1
+  return path
 
 class RenderPreviewDialog(QtWidgets.QWidget):
-    """A render preview dialog of the GIF being rendered"""
-    def __init__(self):
+    """A render preview dialog of the GIFs being rendered by a GIFRenderQueue"""
+    def __init__(self, queue):
         super(RenderPreviewDialog, self).__init__()
+        self.queue = queue
+        self.currentJob = None
         self.initUI()
+
+        queue.jobQueued.connect(self.updateStatus)
+        queue.jobStarted.connect(self.jobStarted)
+        queue.jobProgress.connect(self.jobProgress)
+        queue.jobFinished.connect(self.jobFinished)
+        queue.jobCancelled.connect(self.jobEnded)
+        queue.jobFailed.connect(self.jobFailed)
         
     def initUI(self):
         """Set up the UI"""
@@ -28,19 +63,70 @@ class RenderPreviewDialog(QtWidgets.QWidget):
         self.lbl.setScaledContents(True)
         self.lbl.move(100, 5)       
 
+        self.status = QtWidgets.QLabel(self)
+        self.status.setGeometry(30, 60, 220, 20)
+
         self.pbar = QtWidgets.QProgressBar(self)
         self.pbar.setGeometry(30, 80, 220, 20)
 
         self.btn = QtWidgets.QPushButton('Cancel', self)
-        self.btn.move(100, 110)
+        self.btn.move(40, 110)
         self.btn.clicked.connect(self.cancel)
 
+        self.cancelAllButton = QtWidgets.QPushButton('Cancel All', self)
+        self.cancelAllButton.move(150, 110)
+        self.cancelAllButton.clicked.connect(self.cancelAll)
+
         self.setGeometry(300, 300, 280, 140)
         self.setWindowTitle('Rendering GIF')
-        self.renderingEnabled = True
 
     def cancel(self):
-      self.renderingEnabled = False
+      """Cancels the GIF being rendered. Any others queued carry on."""
+      if self.currentJob:
+        self.queue.cancel(self.currentJob)
+
+    def cancelAll(self):
+      self.queue.cancelAll()
+
+    def updateStatus(self, job = None):
+      """Shows what's rendering and how many GIFs are queued, and hides the dialog when the queue is empty"""
+      jobs = self.queue.jobs()
+      if not jobs:
+        self.currentJob = None
+        self.hide()
+        return
+      waiting = len([job for job in jobs if job is not self.currentJob])
+      name = self.currentJob.name if self.currentJob else "Waiting"
+      self.status.setText("%s (%i more queued)" % (name, waiting) if waiting else name)
+      self.show()
+
+    def jobStarted(self, job):
+      self.currentJob = job
+      self.pbar.setValue(0)
+      self.updateStatus()
+
+    def jobProgress(self, job, progress, thumb):
+      hiero.core.log.debug('Progress is: '+ str(progress))
+      self.lbl.setPixmap(QtGui.QPixmap.fromImage(thumb))
+      self.pbar.setValue(progress)
+
+    def jobEnded(self, job):
+      if job is self.currentJob:
+        self.currentJob = None
+      if job.state == GIFRenderJob.kCancelled:
+        print("Rendering Cancelled: %s" % job.name)
+      self.updateStatus()
+
+    def jobFinished(self, job):
+      self.jobEnded(job)
+      print("%s written in %.2fs (%.1f frames/s), %.1f KB: %s" % (job.format, job.stats["encodeSeconds"],
+            job.stats["framesPerSecond"], (job.stats["bytes"] or 0)/1024.0, job.outputFilePath))
+      if job.openWhenDone:
+        hiero.ui.openInOSShell(job.outputFilePath)
+
+    def jobFailed(self, job, error):
+      self.jobEnded(job)
+      print("GIF %s failed: %s" % (job.name, error))
 
 class MakeGIFAction(QtWidgets.QAction):
   def __init__(self):
@@ -48,92 +134,91 @@ class MakeGIFAction(QtWidgets.QAction):
       self._currentSequence = None
       self._inFrame = None
       self._outFrame = None
-      self.renderPreview = RenderPreviewDialog()
+      self.renderQueue = gifRenderQueue()
+      self.renderPreview = RenderPreviewDialog(self.renderQueue)
+
+      self.makeShotGIFsAction = QtWidgets.QAction("Make GIF per Shot", None)
+      self.makeShotGIFsAction.triggered.connect(self.makeShotGIFs)
+
+      # Other formats than GIF, for those which can be written here
+      self.formatMenu = QtWidgets.QMenu("Make Preview As")
+      for format in availableFormats():
+        if format != "GIF":
+          action = self.formatMenu.addAction(format)
+          action.triggered.connect(lambda checked = False, format = format: self.makeAnimation(format))
 
       self.triggered.connect(self.doit)
+      if Image is None:
+        self.setEnabled(False)
+        self.setToolTip("Needs the Python Imaging Library, install it via pip install pillow")
       hiero.core.events.registerInterest("kShowContextMenu/kTimeline", self.eventHandler)
       hiero.core.events.registerInterest("kShowContextMenu/kViewer", self.eventHandler)
 
 
-  def exportGIFFromSequence(self, sequence, inFrame, outFrame, outputFilePath=None, fps = 24.0):
+  def exportGIFFromSequence(self, sequence, inFrame, outFrame, outputFilePath=None, fps = 24.0, sharedPalette = False,
+                            dither = True, openWhenDone = True, name = None, targetFps = None, optimize = True,
+                            format = "GIF", options = None):
     """
-    Exports a Sequence to a GIF over a range of in-outFrame. 
+    Queues a GIF of a Sequence over a range of in-outFrame, to be rendered in the background. Returns its GIFRenderJob.
     If no outputFilePath is specified, the GIF is written to the Desktop.
-    duration sets the time between rendered frames
+    format writes a WebP, APNG or H.264 preview instead, with options for its AnimationWriter, e.g. {"crf": 18}.
+    fps sets the GIF's frame rate. Frames are written to the file as they are rendered, so any length can be exported.
+    Each GIF frame gets its own palette, unless sharedPalette quantises them all to the first frame's palette, which is
+    smaller but only suits ranges without cuts. dither dithers them.
+    targetFps skips frames before they are rendered, e.g. 12 renders every other frame of a 24 fps Sequence.
+    optimize merges unchanged frames into one and crops changed frames to what changed, for much smaller GIFs.
     """
 
-    duration = outFrame - inFrame
-
-    if duration > 500:
-      print("The mighty GIF cannot handle your duration of 500+ frames! Rendering only the first 500 frames")
-      outFrame = inFrame+499
-
-    # Images for GIF...
-    if hasattr(sequence,'thumbnail'):
-      images = []
-      self.renderPreview.show()
-
-      count = 1
-      for t in range(inFrame, outFrame):
-        thumb = sequence.thumbnail(t)
-
-        buffer = QtCore.QBuffer()
-        buffer.open(QtCore.QIODevice.ReadWrite)
-        thumb.save(buffer, "PNG")
-
-        strio = BytesIO()
-        strio.write(buffer.data())
-        buffer.close()
-        strio.seek(0)
-        images += [Image.open(strio)]
-
-        progress = int(100.0*(float(count)/float(duration)))
-        hiero.core.log.debug('Progress is: '+ str(progress))
-        self.renderPreview.lbl.setPixmap(QtGui.QPixmap(thumb)) 
-
-        self.renderPreview.pbar.setValue(progress)
-        QtCore.QCoreApplication.processEvents()
-
-        count+=1
-
-        if not self.renderPreview.renderingEnabled:
-          print("Rendering Cancelled")
-          self.renderPreview.hide()
-          self.renderPreview.renderingEnabled = True
-          return
+    if not hasattr(sequence,'thumbnail'):
+      return None
 
     if not outputFilePath:
-      try:
-        outputFilePath = os.path.join(os.getenv('HOME'),'Desktop',('myGif_%i.gif' % time.time()))
-      except:
-        from os.path import expanduser
-        outputFilePath = os.path.join(expanduser('~'),'Desktop',('myGif_%i.gif' % time.time()))
+      outputFilePath = defaultOutputFilePath(name, writerForFormat(format).kExtension, inFrame,
+                                             [job.outputFilePath for job in self.renderQueue.jobs()])
 
-    images[0].save(outputFilePath, save_all=True, append_images=images[1:], optimize=True, duration=(len(images)/fps))
-    self.renderPreview.hide()
-    hiero.ui.openInOSShell(outputFilePath)    
+    if format == "GIF":
+      options = dict(options or {}, sharedPalette = sharedPalette, dither = dither)
 
-  def doit(self):
-    # remove any non-trackitem entries (ie transitions)
-    view = hiero.ui.activeView()
-    # If the active view is a timeline or a viewer, we favour rendering a GIF over the range of selected trackItems.
-    # If there are no selected TrackItems, then we try in and out frames, (limited to 500 frames).
-    # The GIF will fail to export if these things are not set.
+    return self.renderQueue.queueJob(sequence, inFrame, outFrame, outputFilePath, fps = fps, format = format,
+                                     options = options, openWhenDone = openWhenDone, name = name,
+                                     targetFps = targetFps, optimize = optimize)
 
+  def activeSequenceAndSelection(self):
+    """Returns the (Sequence, selected TrackItems) of the active timeline or viewer, or (None, [])"""
+    view = hiero.ui.activeView()
     if isinstance(view, hiero.ui.TimelineEditor):
       sequence = view.sequence()
       if not sequence:
-        return
-
-      selection = [item for item in view.selection() if isinstance(item, hiero.core.TrackItem)]
+        return None, []
+      return sequence, [item for item in view.selection() if isinstance(item, hiero.core.TrackItem)]
 
     elif isinstance(view, hiero.ui.Viewer):
       sequence = view.player().sequence()
       if not sequence:
-        return
-
+        return None, []
       timeline = hiero.ui.getTimelineEditor(sequence)
-      selection = [item for item in timeline.selection() if isinstance(item, hiero.core.TrackItem)]
+      return sequence, [item for item in timeline.selection() if isinstance(item, hiero.core.TrackItem)]
+
+    return None, []
+
+  def makeShotGIFs(self):
+    """Queues a GIF for each selected shot"""
+    sequence, selection = self.activeSequenceAndSelection()
+    for item in sorted(selection, key=lambda item: item.timelineIn()):
+      self.exportGIFFromSequence(sequence, item.timelineIn(), item.timelineOut(), openWhenDone = False,
+                                 name = item.name())
+
+  def doit(self):
+    self.makeAnimation("GIF")
+
+  def makeAnimation(self, format):
+    # If the active view is a timeline or a viewer, we favour rendering a GIF over the range of selected trackItems.
+    # If there are no selected TrackItems, then we try in and out frames.
+    # The GIF will fail to export if these things are not set.
+    # GIFs render in the background, so this can be run again to queue more while one is rendering.
+    sequence, selection = self.activeSequenceAndSelection()
+    if not sequence:
+      return
 
     if len(selection)>0:
       # Find the earliest and latest frames in the selection set
@@ -145,13 +230,17 @@ class MakeGIFAction(QtWidgets.QAction):
         outFrame = sequence.outTime()
       except:
         msgBox = QtWidgets.QMessageBox()
-        msgBox.setText("Please set an In and Out point. (Frame Range is limited to 500 frames)")
+        msgBox.setText("Please set an In and Out point.")
         msgBox.exec_()
         return
 
     # If we have a sequence, work out whether a frame range is set, else 
     if sequence and inFrame and outFrame:
-      self.exportGIFFromSequence(sequence, inFrame, outFrame)
+      self.exportGIFFromSequence(sequence, inFrame, outFrame, format = format)
 
   def eventHandler(self, event):
-    event.menu.addAction(self)
\ No newline at end of file
+    event.menu.addAction(self)
+    self.makeShotGIFsAction.setEnabled(Image is not None and bool(self.activeSequenceAndSelection()[1]))
+    event.menu.addAction(self.makeShotGIFsAction)
+    if not self.formatMenu.isEmpty():
+      event.menu.addMenu(self.formatMenu)
\ No newline at end of file
@@ -0,0 +1,243 @@
+# GIF Render Queue - renders GIFs on a background thread, one job after another
+#
+# The GIF maker queues a GIFRenderJob for each GIF, or other animation format, wanted. Frames are fetched and encoded on the queue's worker
+# thread, so the UI stays responsive and more GIFs can be queued while one renders. The queue reports through
+# Qt signals, emitted from the worker thread and delivered to slots on the main thread.
+import os
+import threading
+import hiero.core
+from PySide2 import QtCore, QtGui
+try:
+  from PIL import Image
+except ImportError:
+  # The GIF maker's actions are disabled without PIL
+  Image = None
+from AnAnimationWriter import writerForFormat
+# Importing the writers registers their formats
+import AnGIFWriter
+import AnAPNGWriter
+import AnFFmpegWriter
+from thumbnail_disk_cache import sequenceLayersAtTime, thumbnailDiskCache
+
+# Number of GIFs rendered at the same time
+kMaxThreads = 1
+
+def sampledFrames(inFrame, outFrame, fps, targetFps = None):
+  """Returns [(frame, seconds)] - the frames from inFrame up to outFrame to show at targetFps, and how long each shows
+  for, so the GIF plays for as long as the range does at fps. All frames are used if targetFps is None or >= fps."""
+  count = outFrame - inFrame
+  if count <= 0:
+    return []
+  step = 1.0 if not targetFps or targetFps >= fps else float(fps) / targetFps
+  frames = []
+  position = 0.0
+  while int(round(position)) < count:
+    frames.append(inFrame + int(round(position)))
+    position += step
+  frames.append(outFrame)
+  return [(frame, (following - frame) / float(fps)) for frame, following in zip(frames, frames[1:])]
+
+def frameThumbnail(sequence, frame, previousLayers = None):
+  """Returns (layers, QImage) for the Sequence's thumbnail at frame, where layers is sequenceLayersAtTime(sequence, frame).
+  If the layers match previousLayers, every enabled track shows the same as before, and (layers, None) is returned
+  without decoding the frame. Frames the layers can't describe are always decoded, and left to the writer to merge
+  if their pixels turn out unchanged."""
+  layers = sequenceLayersAtTime(sequence, frame)
+  if layers is not None and layers == previousLayers:
+    return layers, None
+  return layers, thumbnailDiskCache().thumbnail(sequence, frame)
+
+def imageFromQImage(qimage):
+  """Returns (PIL image, QImage) - a PIL RGB image that shares the pixels of an RGB888 copy of qimage, without
+  encoding them to PNG and back. Keep the returned QImage alive while the PIL image is in use."""
+  rgb = qimage.convertToFormat(QtGui.QImage.Format_RGB888)
+  image = Image.frombuffer("RGB", (rgb.width(), rgb.height()), rgb.constBits(), "raw", "RGB", rgb.bytesPerLine(), 1)
+  return image, rgb
+
+class GIFRenderJob(QtCore.QRunnable):
+  # Job states
+  kQueued, kRunning, kFinished, kCancelled, kFailed = range(5)
+
+  def __init__(self, queue, sequence, inFrame, outFrame, outputFilePath, fps = 24.0, format = "GIF", options = None,
+               openWhenDone = True, name = None, targetFps = None, optimize = True):
+    """A GIF of a Sequence's frames from inFrame up to outFrame, rendered on the GIFRenderQueue's thread pool.
+    format names the AnimationWriter to write with, and options are passed on to it, e.g. sharedPalette for GIF.
+    targetFps drops frames before they are decoded, e.g. 12 to use every other frame of a 24 fps Sequence.
+    optimize merges unchanged frames and crops the rest to what changed."""
+    QtCore.QRunnable.__init__(self)
+    self.setAutoDelete(False)
+    self.queue = queue
+    self.sequence = sequence
+    self.inFrame = inFrame
+    self.outFrame = outFrame
+    self.outputFilePath = outputFilePath
+    self.fps = fps
+    self.targetFps = targetFps
+    self.optimize = optimize
+    self.format = format
+    self.options = options or {}
+    self.openWhenDone = openWhenDone
+    self.name = name or os.path.basename(outputFilePath)
+    self.state = self.kQueued
+    self.framesWritten = 0
+    self.framesDecoded = 0
+    self.error = None
+    self.stats = None # the writer's stats() once the job is done
+    self._cancelled = threading.Event()
+
+  def frames(self):
+    """Returns [(frame, seconds)] - the Sequence frames the GIF uses, and how long each shows for"""
+    return sampledFrames(self.inFrame, self.outFrame, self.fps, self.targetFps)
+
+  def cancel(self):
+    """Asks the job to stop. A running job stops before its next frame, and removes its partial GIF."""
+    self._cancelled.set()
+
+  def isCancelled(self):
+    return self._cancelled.is_set()
+
+  def run(self):
+    self.queue.renderJob(self)
+
+class GIFRenderQueue(QtCore.QObject):
+  """A queue of GIFRenderJobs, rendered on worker threads"""
+
+  # Emitted with the job when it is added to the queue
+  jobQueued = QtCore.Signal(object)
+  # Emitted with the job when it starts rendering
+  jobStarted = QtCore.Signal(object)
+  # Emitted with the job, its percentage done and the QImage of the frame just written
+  jobProgress = QtCore.Signal(object, int, object)
+  # Emitted with the job when its GIF has been written
+  jobFinished = QtCore.Signal(object)
+  # Emitted with the job when it is cancelled, whether it had started or not
+  jobCancelled = QtCore.Signal(object)
+  # Emitted with the job and the error message when it fails
+  jobFailed = QtCore.Signal(object, str)
+
+  # Hiero's thumbnail() is asked for from the main thread, only encoding happens on the workers.
+  # Change me to False to decode on the worker threads too.
+  kDecodeInMainThread = True
+
+  def __init__(self, maxThreads = kMaxThreads):
+    QtCore.QObject.__init__(self)
+    self._jobs = []
+    self._lock = threading.Lock()
+    self._pool = QtCore.QThreadPool()
+    self._pool.setMaxThreadCount(maxThreads)
+
+  def jobs(self):
+    """Returns the jobs which are queued or rendering, in the order they were queued"""
+    with self._lock:
+      return list(self._jobs)
+
+  def isBusy(self):
+    with self._lock:
+      return bool(self._jobs)
+
+  def queueJob(self, sequence, inFrame, outFrame, outputFilePath, **kwargs):
+    """Queues a GIF to be rendered, and returns its GIFRenderJob. kwargs are passed on to GIFRenderJob."""
+    job = GIFRenderJob(self, sequence, inFrame, outFrame, outputFilePath, **kwargs)
+    with self._lock:
+      self._jobs.append(job)
+    self.jobQueued.emit(job)
+    self._pool.start(job)
+    return job
+
+  def cancel(self, job):
+    """Cancels a job. A job which has not started is taken off the queue straight away."""
+    job.cancel()
+    if self._pool.tryTake(job):
+      self._jobDone(job, GIFRenderJob.kCancelled)
+      self.jobCancelled.emit(job)
+
+  def cancelAll(self):
+    """Cancels every queued and rendering job"""
+    for job in reversed(self.jobs()):
+      self.cancel(job)
+
+  def waitForDone(self, msecs = -1):
+    """Blocks until every job has finished, or msecs have passed. Returns True if they all finished."""
+    return self._pool.waitForDone(msecs)
+
+  def _jobDone(self, job, state):
+    with self._lock:
+      job.state = state
+      if job in self._jobs:
+        self._jobs.remove(job)
+
+  def thumbnail(self, sequence, frame, previousLayers = None):
+    """Returns frameThumbnail(sequence, frame, previousLayers). Called on the worker threads."""
+    if self.kDecodeInMainThread:
+      return hiero.core.executeInMainThreadWithResult(frameThumbnail, sequence, frame, previousLayers)
+    return frameThumbnail(sequence, frame, previousLayers)
+
+  def renderJob(self, job):
+    """Renders a job's frames into its GIF. Called on the worker threads."""
+    if job.isCancelled():
+      self._jobDone(job, GIFRenderJob.kCancelled)
+      self.jobCancelled.emit(job)
+      return
+
+    job.state = GIFRenderJob.kRunning
+    self.jobStarted.emit(job)
+    writer = None
+    frames = job.frames()
+    layers = None
+    try:
+      writer = writerForFormat(job.format)(job.outputFilePath, fps = job.fps, optimize = job.optimize, **job.options)
+      for count, (t, seconds) in enumerate(frames):
+        if job.isCancelled():
+          break
+        layers, thumb = self.thumbnail(job.sequence, t, layers if job.optimize else None)
+        if thumb is None:
+          writer.repeatFrame(seconds)
+        else:
+          job.framesDecoded += 1
+          image, rgb = imageFromQImage(thumb)
+          writer.addFrame(image, seconds)
+          self.jobProgress.emit(job, int(100.0*(count+1)/len(frames)), thumb)
+        job.framesWritten = writer.frameCount
+      writer.close()
+      job.framesWritten = writer.frameCount
+      job.stats = writer.stats()
+    except Exception as e:
+      if writer:
+        try:
+          writer.close()
+        except Exception:
+          pass
+      self._removeOutput(job)
+      job.error = str(e)
+      self._jobDone(job, GIFRenderJob.kFailed)
+      hiero.core.log.info("GIF %s failed: %s" % (job.name, job.error))
+      self.jobFailed.emit(job, job.error)
+      return
+
+    if job.isCancelled():
+      self._removeOutput(job)
+      self._jobDone(job, GIFRenderJob.kCancelled)
+      self.jobCancelled.emit(job)
+    else:
+      self._jobDone(job, GIFRenderJob.kFinished)
+      hiero.core.log.info("%s %s: %i frames in %.2fs (%.1f fps), %i bytes" % (job.format, job.name,
+                          job.stats["inputFrames"], job.stats["encodeSeconds"], job.stats["framesPerSecond"],
+                          job.stats["bytes"] or 0))
+      self.jobFinished.emit(job)
+
+  def _removeOutput(self, job):
+    """Removes a cancelled or failed job's partial output"""
+    if os.path.isfile(job.outputFilePath):
+      try:
+        os.remove(job.outputFilePath)
+      except OSError:
+        pass
+
+_gifRenderQueue = None
+
+def gifRenderQueue():
+  """gifRenderQueue() -> Returns the shared GIFRenderQueue"""
+  global _gifRenderQueue
+  if _gifRenderQueue is None:
+    _gifRenderQueue = GIFRenderQueue()
+  return _gifRenderQueue
@@ -0,0 +1,138 @@
+# GIF Writer - writes an animated GIF a frame at a time, for the GIF maker
+# Frames are quantised and written to the file as they are added, so memory use does not grow with the frame count.
+# Unchanged frames are merged into the frame before, and changed frames are cropped to what changed (see AnAnimationWriter).
+# Does not need Nuke Studio, only PIL (pip install pillow).
+import struct
+from io import BytesIO
+try:
+  from PIL import Image
+except ImportError:
+  # Not available without PIL, see AnimationWriter.available()
+  Image = None
+from AnAnimationWriter import DeltaAnimationWriter, registerWriter
+
+# Most colours a GIF palette can hold
+kMaxColours = 256
+
+def _pilConstant(enum, name):
+  """Returns a PIL constant, from its enum class in newer PIL (e.g. Image.Dither.NONE) or the Image module in older"""
+  return getattr(getattr(Image, enum, Image), name)
+
+def colourTableBytes(palette):
+  """Returns a flat [r, g, b, ...] palette as GIF colour table bytes, padded to a power of two entries,
+  and the table's size field"""
+  colours = max(2, min(kMaxColours, len(palette) // 3))
+  sizeBits = (colours - 1).bit_length()
+  table = bytearray(palette[:colours*3])
+  table.extend(b"\0" * ((3 << sizeBits) - len(table)))
+  return bytes(table), sizeBits - 1
+
+def encodedFrame(image):
+  """Returns (colour table, LZW image data) for a "P" mode PIL image, using PIL's GIF encoder.
+  The colour table is the one PIL wrote, in case it reordered the palette."""
+  buffer = BytesIO()
+  image.save(buffer, "GIF", interlace=False)
+  data = buffer.getvalue()
+
+  flags = data[10]
+  pos = 13
+  table = b""
+  if flags & 0x80:
+    table = data[pos:pos + (3 << ((flags & 7) + 1))]
+    pos += len(table)
+
+  while data[pos:pos+1] == b"!":
+    # skip extension blocks
+    pos += 2
+    while data[pos]:
+      pos += data[pos] + 1
+    pos += 1
+
+  if data[pos:pos+1] != b"," or data[pos+9] & 0x40:
+    raise ValueError("PIL did not write a GIF image block that can be copied")
+  flags = data[pos+9]
+  pos += 10
+  if flags & 0x80:
+    table = data[pos:pos + (3 << ((flags & 7) + 1))]
+    pos += len(table)
+
+  # LZW minimum code size then data sub-blocks, up to and including the terminator
+  start = pos
+  pos += 1
+  while data[pos]:
+    pos += data[pos] + 1
+  return table, data[start:pos+1]
+
+@registerWriter
+class GIFWriter(DeltaAnimationWriter):
+  kFormat = "GIF"
+  kExtension = "gif"
+  kDelayUnits = 100
+
+  def __init__(self, output, fps = 24.0, optimize = True, threshold = 0, sharedPalette = False, dither = True, loop = 0):
+    """Writes an animated GIF as frames are added with addFrame(). Call close() to finish the file.
+    @param output: the GIF's file path, or a binary file object
+    @param fps: frames per second the GIF plays at
+    @param optimize: merge unchanged frames into the frame before, and crop changed frames to what changed
+    @param threshold: how much a channel may change, 0-255, before a pixel counts as changed when optimizing
+    @param sharedPalette: quantise every frame to a palette made from the first frame, written once as the GIF's
+                          global colour table. Smaller, but only suits GIFs without cuts, as colours which aren't
+                          in the first frame come out wrong. By default each frame gets its own palette.
+    @param dither: Floyd-Steinberg dither frames to their palette
+    @param loop: number of times the GIF loops, 0 to loop forever"""
+    DeltaAnimationWriter.__init__(self, output, fps, optimize, threshold)
+    self.sharedPalette = sharedPalette
+    self.dither = dither
+    self.loop = loop
+    self._palette = None # "P" image holding the shared palette
+    self._globalTable = None
+
+  def begin(self, image):
+    """Opens the output and writes the GIF header, with the shared palette made from image"""
+    self.openOutput()
+    flags = 0x70 # 8 bits per primary colour
+    table = b""
+    if self.sharedPalette:
+      self._palette = image.quantize(kMaxColours)
+      table, sizeField = colourTableBytes(self._palette.getpalette())
+      self._globalTable = table
+      flags |= 0x80 | sizeField
+
+    width, height = self.size
+    self._file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, flags, 0, 0) + table)
+    # NETSCAPE2.0 application extension, for looping
+    self._file.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\0")
+
+  def quantize(self, image):
+    """Returns image as a "P" mode image with the GIF's shared palette, or a palette of its own"""
+    dither = _pilConstant("Dither", "FLOYDSTEINBERG" if self.dither else "NONE")
+    if self._palette is not None:
+      return image.quantize(palette=self._palette, dither=dither)
+    return image.quantize(kMaxColours, method=_pilConstant("Quantize", "FASTOCTREE"), dither=dither)
+
+  def encodeImage(self, image):
+    """Returns (colour table, LZW data) for an RGB image"""
+    return encodedFrame(self.quantize(image))
+
+  def writeFrame(self, encoded, delay, box = None):
+    """Writes an encoded frame: its graphic control extension, image descriptor, colour table if it differs
+    from the global one, and LZW data"""
+    table, data = encoded
+    left, top, width, height = box or ((0, 0) + self.size)
+    # graphic control extension: leave each frame in place for the next to draw over, so a frame cropped to a box
+    # only replaces what changed
+    self._file.write(b"!\xf9\x04" + struct.pack("<BHBB", 1 << 2, delay, 0, 0))
+    flags = 0
+    if table and table != self._globalTable:
+      table, sizeField = colourTableBytes(bytearray(table))
+      flags = 0x80 | sizeField
+    else:
+      table = b""
+    self._file.write(b"," + struct.pack("<HHHHB", left, top, width, height, flags) + table + data)
+    self.frameCount += 1
+
+  def finish(self):
+    """Finishes the GIF, and closes its file if the writer opened it"""
+    DeltaAnimationWriter.finish(self)
+    self._file.write(b";")
+    self.closeOutput()
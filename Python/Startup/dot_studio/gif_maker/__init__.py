@@ -1,3 +1,7 @@
+import sys
+import os
+sys.path.append(os.path.dirname(__file__))
+
 from . import AnGIFMaker
 
 # Add the right-click action
@@ -2,34 +2,7 @@ import PySide2.QtCore as QtCore
 import PySide2.QtGui as QtGui
 import PySide2.QtWidgets as QtWidgets
 import hiero.ui
-
-def visibleShotAtTime(sequence, t):
-  """visibleShotAtTime(sequence, t) -> Returns the visible TrackItem in a Sequence (sequence) at a specified frame (time).
-  @param: sequence - a core.Sequence
-  @param: t - an integer (frame no.) at which to return the current TrackItem
-  returns: hiero.core.TrackItem"""
-  
-  shot = sequence.trackItemAt(t)
-  if shot == None:
-    return shot
-    
-  elif shot.isMediaPresent() and shot.isEnabled():
-    return shot
-  
-  else:
-    # If we're here, the Media is offline or disabled... work out what's visible on other tracks...
-    badTrack = shot.parent()
-    vTracks = list(sequence.videoTracks())
-    vTracks.remove(badTrack)
-    for track in reversed(vTracks):
-      trackItems = track.items()
-      for shotCandidate in trackItems:
-        if shotCandidate.timelineIn() <= t and shotCandidate.timelineOut() >= time:
-          if shotCandidate.isMediaPresent() and shotCandidate.isEnabled():
-            shot = shotCandidate
-            break
-  
-  return shot
+from sequence_helpers import visibleShotAtTime
 
 class ClipInfoWindow(QtWidgets.QWidget):
     def __init__(self, *args):
@@ -128,7 +101,7 @@ class ClipInfoWindow(QtWidgets.QWidget):
         elif isinstance(seq, hiero.core.Sequence):
             currentShot = visibleShotAtTime(seq, cv.time())
             self.infoDict += [{"label": "name", "value": seq.name(), "enabled":True}]
-            self.infoDict += [{"label": "shot", "value": currentShot.name(), "enabled":True}]
+            self.infoDict += [{"label": "shot", "value": currentShot.name() if currentShot else "None", "enabled":True}]
             self.infoDict += [{"label": "fps", "value": str(seq.framerate()), "enabled":True}]
             self.infoDict += [{"label": "duration", "value": seq.duration(), "enabled":True}]
 
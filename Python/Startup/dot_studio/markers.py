@@ -8,6 +8,7 @@ from PySide2.QtCore import Qt, QSize, SIGNAL, QAbstractTableModel, QSortFilterPr
 import hiero.core
 import hiero.ui
 from hiero.ui import findMenuAction, registerAction, registerPanel, insertMenuAction, createMenuAction
+from thumbnail_service import thumbnailService, connectThumbnailPrefetch, prefetchVisibleRows, rowsByRequest
 
 from collections import defaultdict
 
@@ -288,6 +289,36 @@ class MarkersTableModel(QAbstractTableModel):
     QAbstractTableModel.__init__(self, parent, *args)
     self.infoDict = infoDict
     self.header_labels = header
+    self._thumbnailRows = {}
+    self._thumbnailRowsFor = (None, None)
+    thumbnailService().thumbnailReady.connect(self._thumbnailReady)
+
+  def _thumbnailReady(self, key):
+    """Repaint the thumbnails of the Markers showing a thumbnail the ThumbnailService has just rendered"""
+    for row in self.thumbnailRows().get(key, ()):
+      self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+  def thumbnailRows(self):
+    """Returns the rows of each thumbnail request, rebuilt when infoDict is replaced or sorted, or the active Sequence changes"""
+    infoDict, seq = self._thumbnailRowsFor
+    activeSequence = hiero.ui.activeSequence()
+    if infoDict is not self.infoDict or seq != activeSequence:
+      self._thumbnailRows = rowsByRequest(self.thumbnailRequest, len(self.infoDict))
+      self._thumbnailRowsFor = (self.infoDict, activeSequence)
+    return self._thumbnailRows
+
+  def thumbnailRequest(self, row):
+    """Returns the (item, frame, width) ThumbnailService request for the Marker in row"""
+    seq = hiero.ui.activeSequence()
+    if not seq or row >= len(self.infoDict):
+      return None
+
+    item = self.infoDict[row]["Item"]
+    if isinstance(item, hiero.core.Tag):
+      return (seq, item.inTime(), 100)
+    elif isinstance(item, hiero.core.Annotation):
+      return (seq, item.timelineIn(), 100)
+    return None
 
   def rowCount(self, parent):
     return len(self.infoDict)
@@ -303,17 +334,14 @@ class MarkersTableModel(QAbstractTableModel):
     if not seq:
       return None
 
-    item = self.infoDict[index.row()]["Item"]
-
     if role == Qt.DecorationRole:
       if index.column() == 0:
-        try:
-          if isinstance(item, hiero.core.Tag):
-            imageView = seq.thumbnail(item.inTime())
-          elif isinstance(item, hiero.core.Annotation):
-            imageView = seq.thumbnail(item.timelineIn())
-          pixmap = QtGui.QPixmap.fromImage(imageView.scaledToWidth(100))
-        except:
+        # Thumbnails are rendered in the background by the ThumbnailService, show a placeholder until they arrive
+        request = self.thumbnailRequest(index.row())
+        pixmap = None
+        if request:
+          pixmap = thumbnailService().pixmap(*request)
+        if not pixmap:
           # SHOULD RETURN A BLACK PIXMAP HERE...
           icon = QtGui.QIcon("icons:VideoOnlyWarning.png")
           pixmap = icon.pixmap(icon.actualSize(QSize(26, 26)))
@@ -457,6 +485,7 @@ class MarkersPanel(QtWidgets.QWidget):
     self.table_view.setModel(self.markerSortFilterProxyModel)
     self.table_view.clicked.connect(self.movePlayheadToMarker)            
     self.table_view.doubleClicked.connect(self.displayMarkerDialog)
+    connectThumbnailPrefetch(self.table_view, self.thumbnailRequestForViewRow)
     #self.table_view.keyPressed.connect(self.handleKeypressForDeletion)
 
     layout = QtWidgets.QVBoxLayout(self)
@@ -612,7 +641,16 @@ class MarkersPanel(QtWidgets.QWidget):
     self.table_view.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Fixed)
     self.table_view.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.Fixed)
     self.table_view.horizontalHeader().setSectionResizeMode(5, QtWidgets.QHeaderView.Stretch)
+    prefetchVisibleRows(self.table_view, self.thumbnailRequestForViewRow)
     
+  def thumbnailRequestForViewRow(self, row):
+    """Maps a row of the (sorted, filtered) table view to the Marker's thumbnail request"""
+    proxyIndex = self.markerSortFilterProxyModel.index(row, 0)
+    sourceIndex = self.markerSortFilterProxyModel.mapToSource(proxyIndex)
+    if not sourceIndex.isValid():
+      return None
+    return self.table_model.thumbnailRequest(sourceIndex.row())
+
   def formatStringFromSeq(self, seq):
     seq = seq.format()
     height = seq.height()
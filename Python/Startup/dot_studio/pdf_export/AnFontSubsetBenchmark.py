@@ -0,0 +1,61 @@
+# Benchmarks TrueType parsing and subsetting in the vendored reportlab ttfonts. Does not need Nuke Studio.
+# Usage: python AnFontSubsetBenchmark.py [iterations] [font.ttf ...]
+# Vera.ttf and the OpenSans fonts are used by default. Pass a big Unicode or CJK font to see how subsetting scales.
+from __future__ import print_function
+import os
+import random
+import sys
+import time
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(cwd, "thirdParty"))
+
+from reportlab.pdfbase import ttfonts
+
+kDefaultFonts = (os.path.join(cwd, "thirdParty", "reportlab", "fonts", "Vera.ttf"),
+                 os.path.join(cwd, "fonts", "OpenSans-Regular.ttf"))
+
+def timeCall(method, *args):
+    """Returns (seconds, result) for method(*args)"""
+    start = time.time()
+    result = method(*args)
+    return time.time() - start, result
+
+def randomSubsets(font, iterations, subsetSize = 200, seed = 0):
+    """Returns iterations random subsets of the characters in a TTFontFile, as a document's labels would use"""
+    rng = random.Random(seed)
+    codes = sorted(font.charToGlyph)
+    subsetSize = min(subsetSize, len(codes))
+    return [[32] + rng.sample(codes, subsetSize-1) for i in range(iterations)]
+
+def makeSubsets(font, subsets, coldTables = False):
+    """Makes each subset of a TTFontFile, optionally dropping the cached tables first so every subset starts cold"""
+    for subset in subsets:
+        if coldTables:
+            ttfonts._ttfSubsetTables.clear()
+        font.makeSubset(subset)
+
+def runFont(filename, iterations = 1000):
+    """Times parsing a font, then making iterations subsets of it, and prints the timings"""
+    ttfonts._ttfSubsetTables.clear()
+    parseTime, font = timeCall(ttfonts.TTFontFile, filename)
+    subsets = randomSubsets(font, iterations)
+
+    coldTime, result = timeCall(makeSubsets, font, subsets, True)
+    ttfonts._ttfSubsetTables.clear()
+    warmTime, result = timeCall(makeSubsets, font, subsets)
+    repeatTime, result = timeCall(makeSubsets, font, [subsets[0]] * iterations)
+
+    print("%s: %i glyphs, %.1f KB" % (os.path.basename(filename), font.numGlyphs, os.path.getsize(filename)/1024.0))
+    print("  parse:                     %.4fs" % parseTime)
+    print("  %i subsets, cold tables: %.3fs" % (iterations, coldTime))
+    print("  %i subsets, cached tables: %.3fs (%.1fx)" % (iterations, warmTime, coldTime/max(warmTime, 1e-9)))
+    print("  %i repeats of one subset:  %.3fs" % (iterations, repeatTime))
+    return parseTime, coldTime, warmTime, repeatTime
+
+def run(iterations = 1000, fonts = kDefaultFonts):
+    for filename in fonts:
+        runFont(filename, iterations)
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, sys.argv[2:] or kDefaultFonts)
@@ -31,7 +31,8 @@ class PdfExportTask(hiero.core.TaskBase):
       printSequenceToPDF(sequence, self._pdfFilePath, 
                          numRows = _numRows, numColumns = _numColumns,
                          orientation = _orientation,
-                         thumbnailFrameType = _thumbnailFrameType)
+                         thumbnailFrameType = _thumbnailFrameType,
+                         streaming = True)
 
     self._finished = True
     
@@ -3,53 +3,46 @@
 #------------------------------------------------------------------------------
 # Antony Nasce, v1.1, 18/01/21
 #------------------------------------------------------------------------------
-# PDF Layout by Abo Biglarpour. PDF writing Reportlab: http://www.reportlab.com
+# PDF Layout by Abo Biglarpour, see AnPdfLayout.py. PDF writing Reportlab: http://www.reportlab.com
 #------------------------------------------------------------------------------
-try:
-    from reportlab.platypus import Paragraph, Table, TableStyle
-except Exception as e:
-    print(e)
-    print("Unable to import reportlab. Check that reportlab is in your sys.path!")
-
-import reportlab.lib.pagesizes
-import reportlab.pdfgen.canvas
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.colors import lightslategray, black, green, limegreen, white
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont, TTFError
-from reportlab.lib.utils import ImageReader, simpleSplit
-
 import os
 import sys
-import shutil
 import tempfile
-import datetime
 import time
 import urllib
 import xml.sax.saxutils
+import concurrent.futures
+import multiprocessing
+import multiprocessing.pool
 
-from PySide2.QtCore import Qt
+from PySide2.QtCore import Qt, QByteArray, QBuffer, QIODevice
+from PySide2.QtWidgets import QApplication
 from PySide2.QtWidgets import QProgressDialog, QMenu, QDialog, QFormLayout, QComboBox, QDialogButtonBox, QSizePolicy
 
 import hiero.ui
 from foundry.ui import FnFilenameField
 from hiero.core import Timecode
+from thumbnail_disk_cache import cachedThumbnail
+from AnPdfLayout import PDFLayout, writePDFFromLayoutState
 
-class PDFExporter(object):
+class PDFExporter(PDFLayout):
 
     # Data for Export Tasks and GUI action
     THUMB_FIRST_FRAME = "First"
     THUMB_MIDDLE_FRAME = "Middle"
     THUMB_LAST_FRAME = "Last"
     THUMB_FRAME_TYPES = (THUMB_FIRST_FRAME, THUMB_MIDDLE_FRAME, THUMB_LAST_FRAME)
-    PAGE_LAYOUTS_DICT = {"1 per page" : [1, 1, "landscape"], 
-                         "2 x 2": [2, 2, "landscape"], 
-                         "3 x 3": [3, 3, "landscape"],
-                         "3 x 1": [3, 1, "letter"]}
+
+    # Pipelined thumbnails: number of thumbnails rendered between progress updates, and JPEG encoding threads
+    THUMBNAIL_BATCH_SIZE = 32
+    JPEG_ENCODE_THREADS = 4
+
+    # The Hiero objects in each shot's dictionary, which are not needed to lay out the PDF
+    HOST_SHOT_KEYS = ("show", "sequence")
 
     def __init__(self, shotCutList, outputFilePath = None, 
                  rows = 3, columns = 3, orientation = "landscape", 
-                 thumbnailFrameType = "Middle"):
+                 thumbnailFrameType = "Middle", pipelined = True, streaming = False):
         """
         Template for creating PDF sheets for a sequence
         :param shotCutList: List of TrackItems to generate pdf for
@@ -58,19 +51,15 @@ class PDFExporter(object):
         :param columns: number of columns in the PDF
         :param orientation: page orientation of PDF ('landscape' or 'letter')
         :param thumbnailFrame: the thumbnail frame type ("First, Middle", "Last")
+        :param pipelined: encode thumbnails to JPEG in memory on a thread pool, instead of one temp file at a time
+        :param streaming: write each page to the PDF as it is finished, so memory use does not grow with the shot count
         """
         self.shotCutList   = shotCutList
-        self.outputFilePath = outputFilePath
+        self.pipelined     = pipelined
+        self.streaming     = streaming
         self.project = self.shotCutList[0].project()
         self.sequence = self.shotCutList[0].parentSequence()
         self.imageDataList = []
-        self.row               = rows
-        self.column            = columns
-        self.marginSize        = 25
-        self.pageOrientation   = orientation
-        self.styles            = getSampleStyleSheet()
-        self.companyLogo       = None
-        self.showLogo          = None
         self.offlineLogoPath   = os.path.join(os.path.dirname(os.path.realpath(__file__)), "images/offline.jpg")
 
         # Determine which frame should be used for the Shot thumbnail
@@ -81,105 +70,17 @@ class PDFExporter(object):
         self.shotStatuses  = []
 
         self.buildImageDataList()
-        self.getPdfParameters()
-
-        # prep background for usage
-        self.getBackground()
-        # prep company logo for potential usage
-        self.getCompanyLogo()
-        # prep show logo for potential usage
-        self.getShowLogo()
-
-        fontColorImport = __import__("reportlab.lib.colors", globals(), locals(), [self.textColor], 0)
-        self.fontColor = getattr(fontColorImport, self.textColor)
-
-        today = datetime.datetime.now()
-        self.pageInfo = today.strftime("%b %d %Y %I:%M:%S %p")
 
+        title = self.sequence.name() + " , " + self.sequenceInfoString(self.sequence)
+        PDFLayout.__init__(self, self.imageDataList, outputFilePath, rows, columns, orientation, title, streaming)
 
-    def buildCanvas(self):
+    def exportPDF(self, show=True, linearize=False):
+        """Exports the PDF and shows it in the file browser
+        :param show: show the PDF in the file browser once it is written
+        :param linearize: write a linearized ("fast web view") PDF, so a browser can show the first page before the
+                          whole file has downloaded. The whole PDF is built in memory, even if streaming was asked for
         """
-        Builds a canvas object with current settings
-        :return: canvas object
-        """
-        # get page width and height
-        self.pageWidth, self.pageHeight = self.getPageSize()
-
-        # create an empty canvas
-        if not self.outputFilePath:
-            self.outputFilePath =  os.path.join(os.getenv('HOME'), "Desktop", "Sequence_" + self.currentTimeString() + ".pdf")
-
-        self.canvas = reportlab.pdfgen.canvas.Canvas(self.outputFilePath, pagesize=self.pageSize)
-
-        rowCounter = 0
-        colCounter = 0
-        pageNumber = 1
-        self.shotVertShift = 0
-        self.textGap    = (self.fontSize+4) * 4
-        self.header = self.marginSize*1.5
-
-        # set the font type from parameters
-        self.loadFontType()
-
-        # set the canvas settings
-        self.setCanvasSettings(pageNumber)
-
-        # loop through imageDataList and create the pages of PDF with all content based on row and column count provided
-        for index, imageData in enumerate(self.imageDataList):
-            image = imageData['path']
-            shot = ImageReader(image)
-
-            # figure out the image sizes based on the number of row's and column's
-            shotWidth, shotHeight = self.getShotSize(shot)
-
-            # get each shots XY position on the pdf page
-            shotX, shotY = self.getShotPosition(shotWidth, shotHeight, rowCounter, colCounter)
-
-            imageData.update({"shotX":shotX,
-                              "shotY":shotY,
-                              "shotW":shotWidth,
-                              "shotH":shotHeight})
-
-            # insert the image and stroke
-            self.canvas.drawImage(shot, shotX, shotY, width=shotWidth, height=shotHeight)
-            self.canvas.rect(shotX, shotY, width=shotWidth, height=shotHeight)
-
-            # insert shot label and track
-            self.setShotTrackData(imageData)
-
-            # set index number of each shot
-            indexY = shotY - 10
-            indexX = shotX + shotWidth
-            self.canvas.setFillColor(self.fontColor)
-            self.canvas.drawRightString(indexX, indexY, str(index+1))
-
-            # TO-DO Status and New shots?
-            # check if shot status exists and set icon
-            #self.setShotShotStatus(imageData)
-            # check if the current shot is new and set new icon
-            #self.setShotNewIcon(imageData)
-
-            # set the shot time label (this will be a Time info)
-            self.setShotShotLabel(imageData)
-
-            # check the row's and column's counter to set the next image in the correct place
-            colCounter += 1
-            if colCounter == self.column:
-                colCounter = 0
-                rowCounter += 1
-
-            if rowCounter == self.row and not index == (len(self.imageDataList)-1):
-                self.setWatermark()
-                self.canvas.showPage()
-                pageNumber += 1
-                self.setCanvasSettings(pageNumber)
-                rowCounter = 0
-            
-        return self.canvas
-
-    def exportPDF(self, show=True):
-        """Exports the PDF and shows it in the file browser"""
-
+        self.linearize = linearize
         self.buildCanvas()
 
         # save the pdf
@@ -191,23 +92,6 @@ class PDFExporter(object):
         if self.canvas and show:
             self.showPDF()
 
-    def setCanvasSettings(self, pageNumber=1):
-        """
-        Sets the settings and header/footer of each pdf page
-        :param pageNumber: The current page to be built
-        """
-        # set font type and size for the page
-        #self.canvas.setFont(self.fontType, self.fontSize)
-
-        # set background color
-        self.setBackground()
-
-        # header bar
-        self.setHeader()
-
-        # footer bar
-        self.setFooter(pageNumber)
-
     def cleanUpTempFiles(self):
         error = None
         for f in self.fileList:
@@ -222,10 +106,6 @@ class PDFExporter(object):
         if os.path.isfile(self.outputFilePath):
             hiero.ui.openInOSShell(self.outputFilePath)
 
-    def currentTimeString(self):
-        # Returns current time epoch number as a string with underscores
-        return str(time.time()).replace('.','_')
-
     def sequenceInfoString(self, sequence):
         """Returns a string to match the BinItem display, of the form:wxh, %if @%iFPS"""
         format = sequence.format()
@@ -255,23 +135,46 @@ class PDFExporter(object):
         
         return int(thumbFrame)
 
+    def imageDataForShot(self, shot, thumbPath = None, imageBytes = None):
+        """
+        Returns the meta data dictionary for a shot, to be constructed into pdf
+        :param shot: TrackItem
+        :param thumbPath: path of the shot's thumbnail file, or None if the thumbnail is held in memory
+        :param imageBytes: the shot's encoded thumbnail, or None if it is in a file
+        """
+        tc = Timecode()
+        timecodeStart = self.sequence.timecodeStart()
+        timecodeDisplayMode = Timecode().kDisplayTimecode
+        fps = self.sequence.framerate()
+        return {'show':self.project,
+                'sequence':self.sequence,
+                'editVersion':"*Version*",
+                'setup':"*setup*",
+                'timeString': tc.timeToString(shot.timelineIn() + timecodeStart, fps, timecodeDisplayMode) + ", %if" % shot.duration(),
+                'name': self.validString(shot.name()),
+                'version':"*version*",
+                'path': thumbPath,
+                'image': imageBytes,
+                'track': self.validString(shot.parentTrack().name()),
+                'shot': self.validString(shot.source().name()),
+                'shotLabel': self.validString(shot.name()),
+                'shotStatus': "*ShotStatus*",
+        }
+
     def buildImageDataList(self):
         """
         Build the image list with meta data to be constructed into pdf
         """
-        markerName = ""
-        shotStatus = ""
-        markerIndex = 1
         self.fileList = []
         self.tempFileDir = tempfile.gettempdir()
 
         numFiles = len(self.shotCutList)
         progress = QProgressDialog("Generating PDF...", "Cancel Export", 0, numFiles, hiero.ui.mainWindow())
         progress.setWindowModality(Qt.WindowModal)
-        tc = Timecode()
-        timecodeStart = self.sequence.timecodeStart()
-        timecodeDisplayMode = Timecode().kDisplayTimecode
-        fps = self.sequence.framerate()
+
+        if self.pipelined:
+            self.buildImageDataListPipelined(progress)
+            return
 
         count = 1
         for shot in self.shotCutList:
@@ -281,9 +184,10 @@ class PDFExporter(object):
 
             # Try and get a thumbnail, assuming the media is present etc...
             try:
-                thumb = shot.thumbnail( thumbnailFrame ).save(thumbPath)
+                thumb = cachedThumbnail(shot, thumbnailFrame).save(thumbPath)
             except:
-                shutil.copy(self.offlineLogoPath, thumbPath)
+                # Offline shots all point at the one placeholder, so it is only embedded once
+                thumbPath = self.offlineLogoPath
 
             if not os.path.isfile(thumbPath) or progress.wasCanceled():
                 self.cleanUpTempFiles()
@@ -291,333 +195,92 @@ class PDFExporter(object):
                 break
 
             # This file list gets cleaned up after the PDF save finishes
-            self.fileList += [thumbPath]
-
-            dataDict = {'show':self.project,
-                        'sequence':self.sequence,
-                        'editVersion':"*Version*",
-                        'setup':"*setup*",
-                        'timeString': tc.timeToString(shot.timelineIn() + timecodeStart, fps, timecodeDisplayMode) + ", %if" % shot.duration(),
-                        'name': self.validString(shot.name()),
-                        'version':"*version*",
-                        'path': thumbPath, 
-                        'track': self.validString(shot.parentTrack().name()),
-                        'shot': self.validString(shot.source().name()),
-                        'shotLabel': self.validString(shot.name()),
-                        'shotStatus': "*ShotStatus*",
-            }
-            
-            self.imageDataList.append(dataDict)
+            if thumbPath != self.offlineLogoPath:
+                self.fileList += [thumbPath]
+
+            self.imageDataList.append(self.imageDataForShot(shot, thumbPath=thumbPath))
             progress.setValue(count)
             count += 1
 
-    def getPdfParameters(self):
-        """
-        Fetch all the show parameters for pdf template
-        """
-        self.companyName            = "AwesomeFX"
-        self.companyLogoPath        = os.path.join(os.path.dirname(os.path.realpath(__file__)), "images/company.jpg")
-        self.showLogoPath           = os.path.join(os.path.dirname(os.path.realpath(__file__)), "images/show.jpg")
-        self.background             = "white"
-        self.fontTypePath           = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fonts/OpenSans-Light.ttf")
-        self.watermarkText          = "" # "e.g. CONFIDENTIAL"
-        self.fontSize               = 10
-        self.textColor              = "black"
-        self.editComment            = "Comments"
-        self.title                  = self.sequence.name() + " , " + self.sequenceInfoString(self.sequence)
-
-    def getBackground(self):
-        """
-        get the background, either get color object or ImageReader for image
-        If color is darker than RGB(65, 65, 65) the text color will switch to white
+    def buildImageDataListPipelined(self, progress):
         """
-        bgColorImport = __import__("reportlab.lib.colors", globals(), locals(), [self.background], 0)
-        self.backgroundColor = getattr(bgColorImport, self.background)
-        if self.backgroundColor.int_rgb() < 4276545:
-            self.textColor = 'white'
-
-    def getCompanyLogo(self):
-        if os.path.isfile(self.companyLogoPath):
-            if not self.companyLogoPath.endswith(('.jpg', 'jpeg')):
-                self.companyLogoPath = self.convertToJpeg(self.companyLogoPath)
-            self.companyLogo = ImageReader(self.companyLogoPath)
-
-    def getShowLogo(self):
-        if os.path.isfile(self.showLogoPath):
-            if not self.showLogoPath.endswith(('.jpg', 'jpeg')):
-                self.showLogoPath = self.convertToJpeg(self.showLogoPath)
-            self.showLogo = ImageReader(self.showLogoPath)
-
-    def setBackground(self):
+        Build the image list, with thumbnails encoded to JPEG in memory rather than saved to temp files one at a time.
+        Thumbnails are rendered in batches on the main thread, while the thread pool encodes the ones already rendered.
+        When streaming, the thread pool saves them to temp files instead, so they are read a page at a time as the PDF
+        is written, rather than all being held in memory.
+        :param progress: QProgressDialog, updated after each batch
         """
-        set the background to either color or image if provided
-        """
-        if isinstance(self.backgroundColor, ImageReader):
-            bgWidth = float(self.backgroundColor._width)
-            bgHeight = float(self.backgroundColor._height)
-            bgImgWidth = self.pageWidth
-            bgImgHeight = bgImgWidth * (bgHeight/bgWidth )
-            bgY = (self.pageHeight - bgImgHeight) / 2
-            self.canvas.drawImage(self.backgroundColor, 0, bgY, width=bgImgWidth, height=bgImgHeight)
-        else:
-            self.canvas.setFillColor(self.backgroundColor)
-            self.canvas.rect(0, 0, self.pageWidth, self.pageHeight, fill=True, stroke=False)
-
-    # TO-DO: Make this a pure Nuke-only function
-    def convertToJpeg(self, source):
-        """
-        Convert different image formats to jpeg, due to reportLab not natively supporting other formats
-        :param source: image file to be converted
-        :return: new jpeg path
-        """
-        newSource = source.replace(os.path.splitext(source)[-1], '.jpeg')
-        return newSource
+        with open(self.offlineLogoPath, 'rb') as offlineFile:
+            offlineImageBytes = offlineFile.read()
 
-    def loadFontType(self):
-        """
-        Load the provided font from parameters as the default font to use
-        """
-        self.fontType = 'customFont'
+        encodePool = concurrent.futures.ThreadPoolExecutor(max_workers=self.JPEG_ENCODE_THREADS)
+        encodeJobs = []
         try:
-            pdfmetrics.registerFont(TTFont(self.fontType, self.fontTypePath))
-        except Exception as e:
-            print(e)
-            print("Incorrect PDF font type path %s" % self.fontTypePath)
-
-    def getPageSize(self):
-        """
-        get the page width and height based on the layout of the page
-        :return: width and height
-        """
-        tmpImport = __import__("reportlab.lib.pagesizes", globals(), locals(), ['letter'], 0)
-        if self.pageOrientation  == "landscape":
-            letter = getattr(tmpImport, 'letter')
-            self.pageSize = getattr(tmpImport, self.pageOrientation)(letter)
-        else:
-            self.pageSize = getattr(tmpImport, self.pageOrientation)
-
-        return self.pageSize[0], self.pageSize[1]
-
-    def getShotSize(self, shot):
-        """
-        Calculate the width and height of each shot based on layout and row/column
-        :param shot:
-        :return:
-        """
-        if self.row >= self.column and not (self.row ==1 and self.column ==1):
-            shotHeight = ((self.pageHeight-((self.marginSize*4)+self.textGap))/self.row) - (self.textGap*((self.row-1)/float(self.row)))
-            shotWidth = shotHeight * (shot._width/float(shot._height) )
-            if ((shotWidth*self.column)+(self.marginSize*(self.column+1))) >= self.pageWidth:
-                shotWidth  = ((self.pageWidth-(self.marginSize*2))/self.column) - (self.marginSize*((self.column-1)/float(self.column)))
-                shotHeight = shotWidth * (float(shot._height) / shot._width)
-        else:
-            shotWidth  = ((self.pageWidth-(self.marginSize*2))/self.column) - (self.marginSize*((self.column-1)/float(self.column)))
-            shotHeight = shotWidth * (float(shot._height) / shot._width)
-
-        return shotWidth, shotHeight
-
-    def getShotPosition(self, shotW, shotH, rowCounter, colCounter):
-        """
-        Calculate the XY position of the given shot, takes in consideration of shot size and number of row/column
-        adds extra padding for track name and gaps between images for aesthetics
-        :param shotW: shot width
-        :param shotH: shot height
-        :param rowCounter: the current row index
-        :param colCounter: the current column index
-        :return: shot XY positions as tuple
-        """
-        # calculate the gap between each image based on image size and page size
-        imageGapW = ((self.pageWidth-(self.marginSize*2)) - (shotW * self.column))/(self.column-1) if self.column > 1 else 0
-        imageGapH = ((self.pageHeight - ((self.header+(self.fontSize*2))*2)) - (shotH * self.row))/self.row if self.row > 1 else 30
-
-        # calculate where each images x,y positions are
-        shotX =  ((shotW + imageGapW) * colCounter) + self.marginSize
-        shotY =  ((self.pageHeight-(self.header+(self.fontSize*2)))  - ((shotH+imageGapH)*(rowCounter+1)))
-        if rowCounter == 0:
-            shotYExpected = ((self.pageHeight-(self.header+(self.fontSize*2)))  - (shotH*(rowCounter+1)))
-            if shotY != shotYExpected:
-                self.shotVertShift = shotY - shotYExpected
-        shotY -= self.shotVertShift
-
-        return shotX, shotY
-
-    def setShotTrackData(self, imageData):
-        """
-        Set the shot name and track for the given shot and place it in the appropriate position based on layout
-        :param imageData: dictionary object with shot metaData
-        :return: Table object
-        """
-        shotX = imageData.get("shotX")
-        shotY = imageData.get("shotY")
-        shotH = imageData.get("shotH")
-        shotW = imageData.get("shotW")
-        # set the shot label and track for each shot
-        #shotLabel = "%04d-%s"%(int(imageData['setup']),imageData['version']) if imageData['version']>1 else "%04d"%int(imageData['setup'])
-        shotLabel = "%s" % imageData['name']
-        shotData = {'shotLabel':shotLabel,
-                     'textColor':self.textColor,
-                     'fontSize':self.fontSize,
-                     'fontName':self.fontType,
-                     'track':imageData['track'].replace("\n", "<br/>")}
-
-        shotName = Paragraph('''<para align=center spaceb=3>
-                                 <font name=%(fontName)s size=11 color=%(textColor)s>
-                                 <b>%(shotLabel)s</b></font><br/>
-                                 <font name=%(fontName)s size=%(fontSize)s color=%(textColor)s>
-                                 %(track)s</font></para>'''%shotData, self.styles['BodyText'])
-
-        data = [[shotName]]
-
-        # adjust track placement based on row/column layout
-        if self.column == 1 and not self.row == 1:
-            textX = shotX + shotW + self.marginSize
-            textY = (shotY + shotH) - self.textGap
-            textWidth = self.pageWidth - shotW - (self.marginSize*3)
-        else:
-            textWidth = shotW
-            textX = shotX
-            textY = shotY - self.textGap
-
-        table = Table(data, colWidths=textWidth, rowHeights=self.textGap)
-        table.setStyle(TableStyle([('VALIGN',(-1,-1),(-1,-1),'TOP')]))
-        table.wrapOn(self.canvas, textX, self.textGap)
-        table.drawOn(self.canvas, textX, textY)
-        return table
-
-    def setWatermark(self):
-        if self.watermarkText:
-            self.canvas.setFont(self.fontType, 70)
-            self.canvas.setFillColor(self.fontColor, alpha=0.1)
-            self.canvas.drawCentredString(self.pageWidth/2, self.pageHeight/2, self.watermarkText)
-
-    def setCompanyLogo(self):
-        logoW = 0
-        if isinstance(self.companyLogo, ImageReader):
-            logoH = self.marginSize * 1.5
-            logoW = logoH * (self.companyLogo._width/float(self.companyLogo._height))
-            logoX = self.marginSize
-            logoY = self.marginSize/2
-            self.canvas.drawImage(self.companyLogo, logoX, logoY, logoW, logoH)
-        return logoW
-
-    def setShowLogo(self):
-        showLogoWidth = 0
-        if isinstance(self.showLogo, ImageReader):
-            logoWidth = float(self.showLogo._width)
-            logoHeight = float(self.showLogo._height)
-            showLogoHeight = self.marginSize
-            showLogoWidth = showLogoHeight * (logoWidth/logoHeight)
-            logoX = self.marginSize
-            logoY = self.pageHeight-self.header
-            self.canvas.drawImage(self.showLogo, logoX, logoY, width=showLogoWidth, height=showLogoHeight)
-        return showLogoWidth
-
-    def setShotShotStatus(self, imageData):
-        """
-        UNUSED - Should be updated to optionally include Shot Status
-        Sets the shots status of the given shot if status exists, aligned to the bottom left of the shot
-        :param imageData: dictionary object with shot metaData
-        """
-        shotX = imageData.get("shotX")
-        shotY = imageData.get("shotY")
-        if imageData.get('shotStatus'):
-            statusIcon = [status.iconPath for status in self.shotStatuses.statuses if imageData['shotStatus'] == status.label]
-            if len(statusIcon) > 0:
-                statusIcon = statusIcon[0]
-                if self.fileService.exists(statusIcon):
-                    if not statusIcon.endswith(('.jpg', '.jpeg')):
-                        statusIcon = statusIcon.replace(os.path.splitext(statusIcon)[-1], ".jpg")
-                    statusIconReader = ImageReader(self.repath.localize(statusIcon))
-                    statusH = 15
-                    statusW = statusH * (statusIconReader._width/float(statusIconReader._height))
-                    statusX = shotX
-                    statusY = shotY - statusH - 2
-                    self.canvas.drawImage(statusIconReader, statusX, statusY, statusW, statusH)
-
-    def setShotNewIcon(self, imageData):
-        """
-        UNUSED - Should be updated to optionally include Tag Icons
-        Sets the shots new icons if the shot is new since the last editorial publish, aligned to the top right of the shot
-        :param imageData: dictionary object with shot metaData
-        """
-        shotX = imageData.get("shotX")
-        shotY = imageData.get("shotY")
-        shotH = imageData.get("shotH")
-        shotW = imageData.get("shotW")
-        if imageData['shot'].label in self.newShots:
-            newLabelW = 25
-            newLabelH = 10
-            newLabelX = shotX + shotW - newLabelW
-            newLabelY = shotY + shotH + 2
-            self.canvas.setFillColor(limegreen)
-            self.canvas.setStrokeColor(black)
-            self.canvas.rect(newLabelX, newLabelY, newLabelW, newLabelH, fill=True, stroke=True)
-            newTextX = newLabelX + 2
-            newTextY = newLabelY + 2
-            self.canvas.setFillColor(black)
-            self.canvas.drawString(newTextX, newTextY, 'NEW')
-
-    def setShotShotLabel(self, imageData):
-        """
-        sets the shots shot label if belongs to a shot, aligned on the top left of the shot
-        :param imageData: dictionary object with shot metaData
-        """
-        shotX = imageData.get("shotX")
-        shotY = imageData.get("shotY")
-        shotH = imageData.get("shotH")
-        if imageData.get('timeString'):
-            shotLabelX = shotX
-            shotLabelY = shotY + shotH + 2
-            self.canvas.setFillColor(self.textColor)
-            self.canvas.drawString(shotLabelX, shotLabelY, imageData.get('timeString'))
-
-    def setHeader(self):
-        """
-        sets all the header information per page, adds Title and tile bar, aligned on the top center of the page
-        """
-        showLogoWidth = self.setShowLogo()
-        showLogoWidth = showLogoWidth + 5 if showLogoWidth else 0 # add 5 for padding if show logo exists
-        self.canvas.setLineWidth(width=1)
-        self.canvas.setFillColor(lightslategray)
-        self.canvas.setStrokeColor(black)
-        self.canvas.rect(self.marginSize + showLogoWidth, (self.pageHeight-self.header), (self.pageWidth-(self.marginSize*2)) - showLogoWidth, self.marginSize, fill=True, stroke=True)
-        
-        # header text
-        self.canvas.setFillColor(black)
-        titleSplit = simpleSplit(self.title, self.fontType, 16, (self.pageWidth-(self.marginSize*2)) - showLogoWidth)
-        self.canvas.setFont(self.fontType, 16)
-        self.canvas.drawString((self.marginSize*1.25) + showLogoWidth, self.pageHeight - (self.marginSize*1.125), titleSplit[0])
-
-    def setFooter(self, pageNumber):
-        """
-        sets all footer information per page, add page info, footer bar, and privacy info, aligned on the bottom center of the page
-        :param pageNumber:
-        :return:
-        """
-        companyLogoW = self.setCompanyLogo()
-        companyLogoW += 5 if companyLogoW else 0 # add 5 for padding if company logo exists
-        self.canvas.setLineWidth(width=1)
-        self.canvas.setFillColor(lightslategray)
-        self.canvas.setStrokeColor(black)
-        self.canvas.rect(self.marginSize+companyLogoW, self.header, (self.pageWidth-(self.marginSize*2))-companyLogoW, (self.marginSize/2), fill=True, stroke=True)
-        self.canvas.setFillColor(black)
-        # footer text
-        self.canvas.setFont(self.fontType, 9)
-        self.canvas.drawRightString(self.pageWidth-(self.marginSize*1.25), (self.marginSize*1.625),"%s Page - %d" % (self.pageInfo, pageNumber))
-
-        # set privacy info on the bottom of the page
-        privacyInfo = {'msg1':"CONFIDENTIAL: The images, artwork and other materials displayed are the proprietary property of %s."%self.companyName,
-                       'msg2':"Any unauthorized use, printing, copying or distribution of such images, artwork and materials is strictly prohibited. All rights reserved.",
-                       'textColor':self.textColor,
-                       'fontName':self.fontType,
-                       'size':7}
-        shotName = Paragraph('''<para align=center spaceb=3>
-                                  <font name=%(fontName)s size=%(size)s color=%(textColor)s>%(msg1)s<br/>
-                                  %(msg2)s</font></para>'''%privacyInfo, self.styles['BodyText'])
-        privacyTable = Table([[shotName]], colWidths=(self.pageWidth-(self.marginSize*2)))
-        privacyTable.setStyle(TableStyle([('VALIGN',(-1,-1),(-1,-1),'TOP')]))
-        privacyTable.wrapOn(self.canvas, self.marginSize, 10)
-        privacyTable.drawOn(self.canvas, self.marginSize, 10)
+            for batchStart in range(0, len(self.shotCutList), self.THUMBNAIL_BATCH_SIZE):
+                for shot in self.shotCutList[batchStart:batchStart+self.THUMBNAIL_BATCH_SIZE]:
+                    # Try and get a thumbnail, assuming the media is present etc...
+                    try:
+                        thumbnail = cachedThumbnail(shot, self.getThumbFrameForShot(shot))
+                        if self.streaming:
+                            thumbPath = os.path.join(self.tempFileDir, "%s_%s_%i.jpg" % (shot.name(), self.currentTimeString(),
+                                                                                         len(encodeJobs)))
+                            encodeJob = encodePool.submit(saveJpeg, thumbnail, thumbPath)
+                        else:
+                            encodeJob = encodePool.submit(encodeJpeg, thumbnail)
+                    except:
+                        encodeJob = None
+                    encodeJobs.append((shot, encodeJob))
+
+                progress.setValue(len(encodeJobs))
+                QApplication.processEvents()
+                if progress.wasCanceled():
+                    break
+
+            for shot, encodeJob in encodeJobs:
+                try:
+                    result = encodeJob.result()
+                except:
+                    result = None
+                if not self.streaming:
+                    self.imageDataList.append(self.imageDataForShot(shot, imageBytes=result or offlineImageBytes))
+                elif result:
+                    # This file list gets cleaned up after the PDF save finishes
+                    self.fileList.append(result)
+                    self.imageDataList.append(self.imageDataForShot(shot, thumbPath=result))
+                else:
+                    self.imageDataList.append(self.imageDataForShot(shot, thumbPath=self.offlineLogoPath))
+        finally:
+            for shot, encodeJob in encodeJobs:
+                if encodeJob:
+                    encodeJob.cancel()
+            encodePool.shutdown()
+
+def encodeJpeg(image, quality = -1):
+    """
+    Returns a QImage encoded as JPEG bytes, or None if it could not be encoded. Safe to call from worker threads.
+    :param image: QImage
+    :param quality: JPEG quality, 0-100, or -1 for Qt's default
+    """
+    if image is None or image.isNull():
+        return None
+    byteArray = QByteArray()
+    buffer = QBuffer(byteArray)
+    buffer.open(QIODevice.WriteOnly)
+    if not image.save(buffer, "JPG", quality):
+        return None
+    buffer.close()
+    return bytes(byteArray)
+
+def saveJpeg(image, path, quality = -1):
+    """
+    Saves a QImage as a JPEG file, and returns its path, or None if it could not be saved. Safe to call from worker threads.
+    :param image: QImage
+    :param path: the file path to write
+    :param quality: JPEG quality, 0-100, or -1 for Qt's default
+    """
+    if image is None or image.isNull() or not image.save(path, "JPG", quality):
+        return None
+    return path
 
 class ExportPdfOptionDialog(QDialog):
     """
@@ -685,7 +348,7 @@ class ExportPdfOptionDialog(QDialog):
 def printSequenceToPDF(sequence, outputFilePath, 
                        numRows=3, numColumns=3, 
                        orientation='landscape', 
-                       thumbnailFrameType="Middle", showPDF=False):
+                       thumbnailFrameType="Middle", showPDF=False, pipelined=True, streaming=False, linearize=False):
     """
     Prints a hiero.core.Sequence object to PDF
         :param sequence: sequence to export
@@ -695,14 +358,132 @@ def printSequenceToPDF(sequence, outputFilePath,
         :param orientation: page orientation of PDF ('landscape' or 'letter')
         :param thumbnailFrame: the thumbnail frame type ("First, Middle", "Last")
         :param showPDF: boolean to optionally show the PDF in file browser after export
+        :param pipelined: encode thumbnails in memory on a thread pool, instead of via temp files
+        :param streaming: write pages to the PDF as they are finished, for long sequences
+        :param linearize: write a linearized ("fast web view") PDF, for serving from the web
     """
-    videoTracks = sequence.videoTracks()
+    trackItems = trackItemsForSequence(sequence)
+
+    printer = PDFExporter(trackItems, outputFilePath, rows = numRows, columns = numColumns, thumbnailFrameType = thumbnailFrameType, pipelined = pipelined, streaming = streaming)
+    printer.exportPDF(show=showPDF, linearize=linearize)        
+
+def trackItemsForSequence(sequence):
+    """Returns the TrackItems on all of a Sequence's video tracks"""
     trackItems = []
-    for track in videoTracks:
+    for track in sequence.videoTracks():
         trackItems += [item for item in track.items() if isinstance(item, hiero.core.TrackItem)]
+    return trackItems
 
-    printer = PDFExporter(trackItems, outputFilePath, rows = numRows, columns = numColumns, thumbnailFrameType = thumbnailFrameType)
-    printer.exportPDF(show=showPDF)        
+def batchPython():
+    """
+    Returns the plain Python interpreter to run batch export workers with: the PDF_BATCH_PYTHON environment variable
+    if it is set, else the python shipped next to the Nuke Studio executable, or None if there isn't one.
+    """
+    if os.environ.get("PDF_BATCH_PYTHON"):
+        return os.environ["PDF_BATCH_PYTHON"]
+    executableDirectory = os.path.dirname(sys.executable)
+    for name in ("python%i" % sys.version_info[0], "python", "python.exe"):
+        python = os.path.join(executableDirectory, name)
+        if os.path.isfile(python) and os.access(python, os.X_OK):
+            return python
+    return None
+
+def batchProcessContext():
+    """
+    Returns the multiprocessing context for batch export workers, or None to write the PDFs on a thread in this process.
+    The workers only need AnPdfLayout, so they are spawned with a plain Python interpreter (see batchPython()).
+    They are never forked, as a fork of Nuke Studio copies locks held by its other threads, which can deadlock.
+    """
+    python = batchPython()
+    if not python:
+        return None
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(python)
+    return context
+
+def batchPrintSequencesToPDF(sequences, outputDirectory,
+                             numRows=3, numColumns=3,
+                             orientation='landscape',
+                             thumbnailFrameType="Middle", processes=None, showFolder=False):
+    """
+    Prints many hiero.core.Sequence objects to PDFs, one per Sequence, named after the Sequence.
+    Thumbnails are collected on the main thread, then each PDF is laid out and saved by a pool of worker processes,
+    while the thumbnails for the next Sequence are collected. If there is no Python to run the workers with
+    (see batchPython()), the PDFs are written one at a time on a background thread instead.
+        :param sequences: sequences to export
+        :param outputDirectory: directory to write the PDFs to
+        :param numRows: number of rows in the PDF
+        :param numColumns: number of columns in the PDF
+        :param orientation: page orientation of PDF ('landscape' or 'letter')
+        :param thumbnailFrame: the thumbnail frame type ("First, Middle", "Last")
+        :param processes: number of worker processes, or None for one per CPU
+        :param showFolder: boolean to optionally show the output directory in the file browser after export
+        :return: list of the PDF file paths written
+    """
+    if not os.path.isdir(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    context = batchProcessContext()
+    if context:
+        pool = context.Pool(processes)
+    else:
+        print("No Python found to run the PDF export worker processes, the PDFs will be written one at a time. "
+              "Set PDF_BATCH_PYTHON to the path of a Python %i interpreter to write them in parallel." % sys.version_info[0])
+        # A single thread keeps the PDFs off the UI thread, and reportlab's module globals to one writer at a time
+        pool = multiprocessing.pool.ThreadPool(1)
+    jobs = []
+    usedPaths = set()
+    try:
+        for sequence in sequences:
+            trackItems = trackItemsForSequence(sequence)
+            if not trackItems:
+                print("Skipping '%s', it has no shots to print" % sequence.name())
+                continue
+
+            fileName = "".join(c if c.isalnum() or c in "-_." else "_" for c in sequence.name())
+            outputFilePath = os.path.join(outputDirectory, fileName + ".pdf")
+            count = 2
+            while outputFilePath in usedPaths:
+                outputFilePath = os.path.join(outputDirectory, "%s_%i.pdf" % (fileName, count))
+                count += 1
+            usedPaths.add(outputFilePath)
+
+            printer = PDFExporter(trackItems, outputFilePath, rows = numRows, columns = numColumns, orientation = orientation,
+                                  thumbnailFrameType = thumbnailFrameType, pipelined = True, streaming = True)
+            state = printer.layoutState()
+            # The state has the thumbnails now, the worker can have the only copy
+            printer.imageDataList = []
+            jobs.append((printer, pool.apply_async(writePDFFromLayoutState, (state,))))
+
+        # Keep the UI alive while the workers finish
+        while not all(job.ready() for printer, job in jobs):
+            QApplication.processEvents()
+            time.sleep(0.05)
+    finally:
+        pool.close()
+        pool.join()
+
+    writtenPaths = []
+    for printer, job in jobs:
+        try:
+            job.get()
+            writtenPaths.append(printer.outputFilePath)
+        except Exception as e:
+            print("Unable to write PDF %s - (%s)" % (printer.outputFilePath, e))
+        printer.cleanUpTempFiles()
+
+    if showFolder and writtenPaths:
+        hiero.ui.openInOSShell(outputDirectory)
+    return writtenPaths
+
+def batchPrintProjectToPDF(project, outputDirectory, **kwargs):
+    """
+    Prints every Sequence in a hiero.core.Project to PDFs, see batchPrintSequencesToPDF for the options
+        :param project: project to export
+        :param outputDirectory: directory to write the PDFs to
+        :return: list of the PDF file paths written
+    """
+    return batchPrintSequencesToPDF(project.sequences(), outputDirectory, **kwargs)
 
 class ExportPdfAction(object):
     def __init__(self):
@@ -723,18 +504,20 @@ class ExportPdfAction(object):
         if len(sequences)<=0:
             return
 
-        sequence = sequences[0]
-
         dialog = ExportPdfOptionDialog()
         if dialog.exec_():
             numRows = dialog._numRows()
             numColumns = dialog._numColumns()
             outputFilePath = dialog._filePath()
             thumbnailFrameType = dialog._thumbnailFrameType()
-            printSequenceToPDF(sequence, outputFilePath, numRows=numRows, numColumns=numColumns, thumbnailFrameType=thumbnailFrameType, showPDF = True)
+            if len(sequences) == 1:
+                printSequenceToPDF(sequences[0], outputFilePath, numRows=numRows, numColumns=numColumns, thumbnailFrameType=thumbnailFrameType, showPDF = True)
+            else:
+                # Many Sequences are written next to the chosen file, named after each Sequence
+                batchPrintSequencesToPDF(sequences, os.path.dirname(outputFilePath), numRows=numRows, numColumns=numColumns, thumbnailFrameType=thumbnailFrameType, showFolder = True)
 
     def eventHandler(self, event):
         selection = event.sender.selection()
         sequences = [item for item in selection if hasattr(item, "activeItem") and isinstance(item.activeItem(), hiero.core.Sequence)]
-        if len(sequences) == 1:
+        if len(sequences) >= 1:
             event.menu.addAction(self.makePDFAction)
\ No newline at end of file
@@ -0,0 +1,593 @@
+#------------------------------------------------------------------------------
+# AnPdfLayout.py - Lays out and writes PDF contact sheets from plain shot records
+#------------------------------------------------------------------------------
+# PDF Layout by Abo Biglarpour. PDF writing Reportlab: http://www.reportlab.com
+#------------------------------------------------------------------------------
+# PDFLayout only needs reportlab, not Hiero or Qt, so it runs in the batch export
+# workers and in AnPdfLayoutBenchmark.py. PDFExporter adds the Hiero side to it.
+#------------------------------------------------------------------------------
+try:
+    from reportlab.platypus import Paragraph, Table, TableStyle
+except Exception as e:
+    print(e)
+    print("Unable to import reportlab. Check that reportlab is in your sys.path!")
+
+import reportlab.lib.pagesizes
+import reportlab.pdfgen.canvas
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.colors import lightslategray, black, green, limegreen, white
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab import rl_config
+
+import os
+import datetime
+import time
+from io import BytesIO
+
+def shotRecord(name, track, timeString, image = None, path = None):
+    """
+    Returns a shot's dictionary, as PDFLayout expects it
+    :param name: shot name, shown under the thumbnail
+    :param track: track name, shown under the shot name
+    :param timeString: timecode and duration, shown above the thumbnail
+    :param image: the thumbnail as encoded JPEG data, or None to read it from path
+    :param path: path of the thumbnail image file
+    """
+    return {'name': name,
+            'shotLabel': name,
+            'track': track,
+            'timeString': timeString,
+            'image': image,
+            'path': path,
+    }
+
+class PDFLayout(object):
+
+    PAGE_LAYOUTS_DICT = {"1 per page" : [1, 1, "landscape"], 
+                         "2 x 2": [2, 2, "landscape"], 
+                         "3 x 3": [3, 3, "landscape"],
+                         "3 x 1": [3, 1, "letter"]}
+
+    # Everything buildCanvas needs, see layoutState()
+    LAYOUT_STATE_ATTRIBUTES = ("outputFilePath", "row", "column", "marginSize", "pageOrientation", "streaming",
+                               "companyName", "companyLogoPath", "showLogoPath", "background", "fontTypePath",
+                               "watermarkText", "fontSize", "textColor", "editComment", "title", "backgroundColor",
+                               "fontColor", "pageInfo", "compressionThreads", "linearize")
+
+    # Keys of a shot's dictionary holding host application objects, which layoutState() leaves out
+    HOST_SHOT_KEYS = ()
+
+    def __init__(self, imageDataList, outputFilePath = None,
+                 rows = 3, columns = 3, orientation = "landscape",
+                 title = "", streaming = False):
+        """
+        Template for laying out PDF sheets of shots
+        :param imageDataList: list of shot dictionaries, see shotRecord()
+        :param outputFilePath: PDF output file path, or a file object
+        :param rows: number of rows in the PDF
+        :param columns: number of columns in the PDF
+        :param orientation: page orientation of PDF ('landscape' or 'letter')
+        :param title: title in the header of each page
+        :param streaming: write each page to the PDF as it is finished, so memory use does not grow with the shot count.
+                          Give the shots thumbnail paths rather than image data for this, as image data is held until the end
+        """
+        self.imageDataList     = imageDataList
+        self.outputFilePath    = outputFilePath
+        self.streaming         = streaming
+        self.compressionThreads = 4     # threads deflating the page, font and image streams as the PDF is written
+        self.linearize         = False  # write a linearized ("fast web view") PDF, which can't be streamed
+        self.row               = rows
+        self.column            = columns
+        self.marginSize        = 25
+        self.pageOrientation   = orientation
+        self.title             = title
+        self.styles            = getSampleStyleSheet()
+        self.companyLogo       = None
+        self.showLogo          = None
+
+        self.getPdfParameters()
+
+        # prep background for usage
+        self.getBackground()
+        # prep company logo for potential usage
+        self.getCompanyLogo()
+        # prep show logo for potential usage
+        self.getShowLogo()
+
+        fontColorImport = __import__("reportlab.lib.colors", globals(), locals(), [self.textColor], 0)
+        self.fontColor = getattr(fontColorImport, self.textColor)
+
+        today = datetime.datetime.now()
+        self.pageInfo = today.strftime("%b %d %Y %I:%M:%S %p")
+
+    def layoutPages(self):
+        """
+        Works out the size and position of every shot, without drawing anything.
+        Adds shotX, shotY, shotW and shotH to each shot's dictionary.
+        :return: list of pages, each a list of (index, imageData) for the shots on it
+        """
+        # get page width and height
+        self.pageWidth, self.pageHeight = self.getPageSize()
+
+        self.shotVertShift = 0
+        self.textGap    = (self.fontSize+4) * 4
+        self.header = self.marginSize*1.5
+
+        pages = []
+        shotsPerPage = self.row * self.column
+        for index, imageData in enumerate(self.imageDataList):
+            # fill each page row by row
+            rowCounter, colCounter = divmod(index % shotsPerPage, self.column)
+            if rowCounter == 0 and colCounter == 0:
+                pages.append([])
+
+            shot = self.imageReaderForImageData(imageData)
+
+            # figure out the image sizes based on the number of row's and column's
+            shotWidth, shotHeight = self.getShotSize(shot)
+
+            # get each shots XY position on the pdf page
+            shotX, shotY = self.getShotPosition(shotWidth, shotHeight, rowCounter, colCounter)
+
+            imageData.update({"shotX":shotX,
+                              "shotY":shotY,
+                              "shotW":shotWidth,
+                              "shotH":shotHeight})
+            pages[-1].append((index, imageData))
+
+        return pages
+
+    def buildCanvas(self):
+        """
+        Builds a canvas object with current settings
+        :return: canvas object
+        """
+        pages = self.layoutPages() or [[]]
+
+        # create an empty canvas
+        if not self.outputFilePath:
+            self.outputFilePath =  os.path.join(os.getenv('HOME'), "Desktop", "Sequence_" + self.currentTimeString() + ".pdf")
+
+        self.canvas = reportlab.pdfgen.canvas.Canvas(self.outputFilePath, pagesize=self.pageSize,
+                                                     streaming=self.streaming and not self.linearize,
+                                                     compressionThreads=self.compressionThreads, linearize=self.linearize)
+
+        # set the font type from parameters
+        self.loadFontType()
+
+        for pageIndex, page in enumerate(pages):
+            if pageIndex > 0:
+                self.setWatermark()
+                self.canvas.showPage()
+
+            # set the canvas settings
+            self.setCanvasSettings(pageIndex+1)
+
+            for index, imageData in page:
+                self.drawShot(index, imageData)
+
+        return self.canvas
+
+    def drawShot(self, index, imageData):
+        """
+        Draws a shot laid out by layoutPages() on the current page, with its labels and index number
+        :param index: the shot's index in imageDataList
+        :param imageData: dictionary object with shot metaData
+        """
+        shotX = imageData.get("shotX")
+        shotY = imageData.get("shotY")
+        shotWidth = imageData.get("shotW")
+        shotHeight = imageData.get("shotH")
+
+        # insert the image and stroke
+        shot = self.imageReaderForImageData(imageData)
+        self.canvas.drawImage(shot, shotX, shotY, width=shotWidth, height=shotHeight)
+        self.canvas.rect(shotX, shotY, width=shotWidth, height=shotHeight)
+
+        # insert shot label and track
+        self.setShotTrackData(imageData)
+
+        # set index number of each shot
+        indexY = shotY - 10
+        indexX = shotX + shotWidth
+        self.canvas.setFillColor(self.fontColor)
+        self.canvas.drawRightString(indexX, indexY, str(index+1))
+
+        # TO-DO Status and New shots?
+        # check if shot status exists and set icon
+        #self.setShotShotStatus(imageData)
+        # check if the current shot is new and set new icon
+        #self.setShotNewIcon(imageData)
+
+        # set the shot time label (this will be a Time info)
+        self.setShotShotLabel(imageData)
+
+    def layoutState(self):
+        """
+        Returns a picklable dictionary of the shots and settings, without any host application objects.
+        fromLayoutState() makes a layout from it which can build and save the PDF in another process.
+        """
+        state = dict((name, getattr(self, name)) for name in self.LAYOUT_STATE_ATTRIBUTES)
+        state["imageDataList"] = [dict((key, value) for key, value in imageData.items() if key not in self.HOST_SHOT_KEYS)
+                                  for imageData in self.imageDataList]
+        return state
+
+    @classmethod
+    def fromLayoutState(cls, state):
+        """
+        Returns a layout from a layoutState(), ready for buildCanvas()
+        :param state: dictionary from PDFLayout.layoutState()
+        """
+        layout = cls.__new__(cls)
+        layout.__dict__.update(state)
+        layout.styles = getSampleStyleSheet()
+        layout.companyLogo = None
+        layout.showLogo = None
+        layout.getCompanyLogo()
+        layout.getShowLogo()
+        return layout
+
+    def save(self):
+        """Builds the pages and saves the PDF"""
+        self.buildCanvas()
+        self.canvas.save()
+
+    def setCanvasSettings(self, pageNumber=1):
+        """
+        Sets the settings and header/footer of each pdf page
+        :param pageNumber: The current page to be built
+        """
+        # set font type and size for the page
+        #self.canvas.setFont(self.fontType, self.fontSize)
+
+        # set background color
+        self.setBackground()
+
+        # header bar
+        self.setHeader()
+
+        # footer bar
+        self.setFooter(pageNumber)
+
+    def currentTimeString(self):
+        # Returns current time epoch number as a string with underscores
+        return str(time.time()).replace('.','_')
+
+    def imageReaderForImageData(self, imageData):
+        """
+        Returns an ImageReader for a shot: of its in-memory JPEG data if there is some, otherwise of its path.
+        JPEG files are read lazily: only their size is read here, and their data is read again when the image is
+        written to the PDF, so in streaming mode no more than a page of thumbnails is held in memory.
+        """
+        if imageData.get('image'):
+            return ImageReader(BytesIO(imageData['image']))
+        imageReaderFlags = rl_config.imageReaderFlags
+        rl_config.imageReaderFlags = 8
+        try:
+            return ImageReader(imageData['path'])
+        finally:
+            rl_config.imageReaderFlags = imageReaderFlags
+
+    def getPdfParameters(self):
+        """
+        Fetch all the show parameters for pdf template
+        """
+        self.companyName            = "AwesomeFX"
+        self.companyLogoPath        = os.path.join(os.path.dirname(os.path.realpath(__file__)), "images/company.jpg")
+        self.showLogoPath           = os.path.join(os.path.dirname(os.path.realpath(__file__)), "images/show.jpg")
+        self.background             = "white"
+        self.fontTypePath           = os.path.join(os.path.dirname(os.path.realpath(__file__)), "fonts/OpenSans-Light.ttf")
+        self.watermarkText          = "" # "e.g. CONFIDENTIAL"
+        self.fontSize               = 10
+        self.textColor              = "black"
+        self.editComment            = "Comments"
+
+    def getBackground(self):
+        """
+        get the background, either get color object or ImageReader for image
+        If color is darker than RGB(65, 65, 65) the text color will switch to white
+        """
+        bgColorImport = __import__("reportlab.lib.colors", globals(), locals(), [self.background], 0)
+        self.backgroundColor = getattr(bgColorImport, self.background)
+        if self.backgroundColor.int_rgb() < 4276545:
+            self.textColor = 'white'
+
+    def getCompanyLogo(self):
+        if os.path.isfile(self.companyLogoPath):
+            if not self.companyLogoPath.endswith(('.jpg', 'jpeg')):
+                self.companyLogoPath = self.convertToJpeg(self.companyLogoPath)
+            self.companyLogo = ImageReader(self.companyLogoPath)
+
+    def getShowLogo(self):
+        if os.path.isfile(self.showLogoPath):
+            if not self.showLogoPath.endswith(('.jpg', 'jpeg')):
+                self.showLogoPath = self.convertToJpeg(self.showLogoPath)
+            self.showLogo = ImageReader(self.showLogoPath)
+
+    def setBackground(self):
+        """
+        set the background to either color or image if provided
+        """
+        if isinstance(self.backgroundColor, ImageReader):
+            bgWidth = float(self.backgroundColor._width)
+            bgHeight = float(self.backgroundColor._height)
+            bgImgWidth = self.pageWidth
+            bgImgHeight = bgImgWidth * (bgHeight/bgWidth )
+            bgY = (self.pageHeight - bgImgHeight) / 2
+            self.canvas.drawImage(self.backgroundColor, 0, bgY, width=bgImgWidth, height=bgImgHeight)
+        else:
+            self.canvas.setFillColor(self.backgroundColor)
+            self.canvas.rect(0, 0, self.pageWidth, self.pageHeight, fill=True, stroke=False)
+
+    # TO-DO: Make this a pure Nuke-only function
+    def convertToJpeg(self, source):
+        """
+        Convert different image formats to jpeg, due to reportLab not natively supporting other formats
+        :param source: image file to be converted
+        :return: new jpeg path
+        """
+        newSource = source.replace(os.path.splitext(source)[-1], '.jpeg')
+        return newSource
+
+    def loadFontType(self):
+        """
+        Load the provided font from parameters as the default font to use
+        """
+        self.fontType = 'customFont'
+
+        # keep the font registered by an earlier export, so its memoised string widths are kept too
+        if self.fontType in pdfmetrics.getRegisteredFontNames():
+            if getattr(pdfmetrics.getFont(self.fontType).face, 'filename', None) == os.path.abspath(self.fontTypePath):
+                return
+        try:
+            pdfmetrics.registerFont(TTFont(self.fontType, self.fontTypePath))
+        except Exception as e:
+            print(e)
+            print("Incorrect PDF font type path %s" % self.fontTypePath)
+
+    def getPageSize(self):
+        """
+        get the page width and height based on the layout of the page
+        :return: width and height
+        """
+        tmpImport = __import__("reportlab.lib.pagesizes", globals(), locals(), ['letter'], 0)
+        if self.pageOrientation  == "landscape":
+            letter = getattr(tmpImport, 'letter')
+            self.pageSize = getattr(tmpImport, self.pageOrientation)(letter)
+        else:
+            self.pageSize = getattr(tmpImport, self.pageOrientation)
+
+        return self.pageSize[0], self.pageSize[1]
+
+    def getShotSize(self, shot):
+        """
+        Calculate the width and height of each shot based on layout and row/column
+        :param shot:
+        :return:
+        """
+        if self.row >= self.column and not (self.row ==1 and self.column ==1):
+            shotHeight = ((self.pageHeight-((self.marginSize*4)+self.textGap))/self.row) - (self.textGap*((self.row-1)/float(self.row)))
+            shotWidth = shotHeight * (shot._width/float(shot._height) )
+            if ((shotWidth*self.column)+(self.marginSize*(self.column+1))) >= self.pageWidth:
+                shotWidth  = ((self.pageWidth-(self.marginSize*2))/self.column) - (self.marginSize*((self.column-1)/float(self.column)))
+                shotHeight = shotWidth * (float(shot._height) / shot._width)
+        else:
+            shotWidth  = ((self.pageWidth-(self.marginSize*2))/self.column) - (self.marginSize*((self.column-1)/float(self.column)))
+            shotHeight = shotWidth * (float(shot._height) / shot._width)
+
+        return shotWidth, shotHeight
+
+    def getShotPosition(self, shotW, shotH, rowCounter, colCounter):
+        """
+        Calculate the XY position of the given shot, takes in consideration of shot size and number of row/column
+        adds extra padding for track name and gaps between images for aesthetics
+        :param shotW: shot width
+        :param shotH: shot height
+        :param rowCounter: the current row index
+        :param colCounter: the current column index
+        :return: shot XY positions as tuple
+        """
+        # calculate the gap between each image based on image size and page size
+        imageGapW = ((self.pageWidth-(self.marginSize*2)) - (shotW * self.column))/(self.column-1) if self.column > 1 else 0
+        imageGapH = ((self.pageHeight - ((self.header+(self.fontSize*2))*2)) - (shotH * self.row))/self.row if self.row > 1 else 30
+
+        # calculate where each images x,y positions are
+        shotX =  ((shotW + imageGapW) * colCounter) + self.marginSize
+        shotY =  ((self.pageHeight-(self.header+(self.fontSize*2)))  - ((shotH+imageGapH)*(rowCounter+1)))
+        if rowCounter == 0:
+            shotYExpected = ((self.pageHeight-(self.header+(self.fontSize*2)))  - (shotH*(rowCounter+1)))
+            if shotY != shotYExpected:
+                self.shotVertShift = shotY - shotYExpected
+        shotY -= self.shotVertShift
+
+        return shotX, shotY
+
+    def setShotTrackData(self, imageData):
+        """
+        Set the shot name and track for the given shot and place it in the appropriate position based on layout
+        :param imageData: dictionary object with shot metaData
+        :return: Table object
+        """
+        shotX = imageData.get("shotX")
+        shotY = imageData.get("shotY")
+        shotH = imageData.get("shotH")
+        shotW = imageData.get("shotW")
+        # set the shot label and track for each shot
+        #shotLabel = "%04d-%s"%(int(imageData['setup']),imageData['version']) if imageData['version']>1 else "%04d"%int(imageData['setup'])
+        shotLabel = "%s" % imageData['name']
+        shotData = {'shotLabel':shotLabel,
+                     'textColor':self.textColor,
+                     'fontSize':self.fontSize,
+                     'fontName':self.fontType,
+                     'track':imageData['track'].replace("\n", "<br/>")}
+
+        shotName = Paragraph('''<para align=center spaceb=3>
+                                 <font name=%(fontName)s size=11 color=%(textColor)s>
+                                 <b>%(shotLabel)s</b></font><br/>
+                                 <font name=%(fontName)s size=%(fontSize)s color=%(textColor)s>
+                                 %(track)s</font></para>'''%shotData, self.styles['BodyText'])
+
+        data = [[shotName]]
+
+        # adjust track placement based on row/column layout
+        if self.column == 1 and not self.row == 1:
+            textX = shotX + shotW + self.marginSize
+            textY = (shotY + shotH) - self.textGap
+            textWidth = self.pageWidth - shotW - (self.marginSize*3)
+        else:
+            textWidth = shotW
+            textX = shotX
+            textY = shotY - self.textGap
+
+        table = Table(data, colWidths=textWidth, rowHeights=self.textGap)
+        table.setStyle(TableStyle([('VALIGN',(-1,-1),(-1,-1),'TOP')]))
+        table.wrapOn(self.canvas, textX, self.textGap)
+        table.drawOn(self.canvas, textX, textY)
+        return table
+
+    def setWatermark(self):
+        if self.watermarkText:
+            self.canvas.setFont(self.fontType, 70)
+            self.canvas.setFillColor(self.fontColor, alpha=0.1)
+            self.canvas.drawCentredString(self.pageWidth/2, self.pageHeight/2, self.watermarkText)
+
+    def setCompanyLogo(self):
+        logoW = 0
+        if isinstance(self.companyLogo, ImageReader):
+            logoH = self.marginSize * 1.5
+            logoW = logoH * (self.companyLogo._width/float(self.companyLogo._height))
+            logoX = self.marginSize
+            logoY = self.marginSize/2
+            self.canvas.drawImage(self.companyLogo, logoX, logoY, logoW, logoH)
+        return logoW
+
+    def setShowLogo(self):
+        showLogoWidth = 0
+        if isinstance(self.showLogo, ImageReader):
+            logoWidth = float(self.showLogo._width)
+            logoHeight = float(self.showLogo._height)
+            showLogoHeight = self.marginSize
+            showLogoWidth = showLogoHeight * (logoWidth/logoHeight)
+            logoX = self.marginSize
+            logoY = self.pageHeight-self.header
+            self.canvas.drawImage(self.showLogo, logoX, logoY, width=showLogoWidth, height=showLogoHeight)
+        return showLogoWidth
+
+    def setShotShotStatus(self, imageData):
+        """
+        UNUSED - Should be updated to optionally include Shot Status
+        Sets the shots status of the given shot if status exists, aligned to the bottom left of the shot
+        :param imageData: dictionary object with shot metaData
+        """
+        shotX = imageData.get("shotX")
+        shotY = imageData.get("shotY")
+        if imageData.get('shotStatus'):
+            statusIcon = [status.iconPath for status in self.shotStatuses.statuses if imageData['shotStatus'] == status.label]
+            if len(statusIcon) > 0:
+                statusIcon = statusIcon[0]
+                if self.fileService.exists(statusIcon):
+                    if not statusIcon.endswith(('.jpg', '.jpeg')):
+                        statusIcon = statusIcon.replace(os.path.splitext(statusIcon)[-1], ".jpg")
+                    statusIconReader = ImageReader(self.repath.localize(statusIcon))
+                    statusH = 15
+                    statusW = statusH * (statusIconReader._width/float(statusIconReader._height))
+                    statusX = shotX
+                    statusY = shotY - statusH - 2
+                    self.canvas.drawImage(statusIconReader, statusX, statusY, statusW, statusH)
+
+    def setShotNewIcon(self, imageData):
+        """
+        UNUSED - Should be updated to optionally include Tag Icons
+        Sets the shots new icons if the shot is new since the last editorial publish, aligned to the top right of the shot
+        :param imageData: dictionary object with shot metaData
+        """
+        shotX = imageData.get("shotX")
+        shotY = imageData.get("shotY")
+        shotH = imageData.get("shotH")
+        shotW = imageData.get("shotW")
+        if imageData['shot'].label in self.newShots:
+            newLabelW = 25
+            newLabelH = 10
+            newLabelX = shotX + shotW - newLabelW
+            newLabelY = shotY + shotH + 2
+            self.canvas.setFillColor(limegreen)
+            self.canvas.setStrokeColor(black)
+            self.canvas.rect(newLabelX, newLabelY, newLabelW, newLabelH, fill=True, stroke=True)
+            newTextX = newLabelX + 2
+            newTextY = newLabelY + 2
+            self.canvas.setFillColor(black)
+            self.canvas.drawString(newTextX, newTextY, 'NEW')
+
+    def setShotShotLabel(self, imageData):
+        """
+        sets the shots shot label if belongs to a shot, aligned on the top left of the shot
+        :param imageData: dictionary object with shot metaData
+        """
+        shotX = imageData.get("shotX")
+        shotY = imageData.get("shotY")
+        shotH = imageData.get("shotH")
+        if imageData.get('timeString'):
+            shotLabelX = shotX
+            shotLabelY = shotY + shotH + 2
+            self.canvas.setFillColor(self.textColor)
+            self.canvas.drawString(shotLabelX, shotLabelY, imageData.get('timeString'))
+
+    def setHeader(self):
+        """
+        sets all the header information per page, adds Title and tile bar, aligned on the top center of the page
+        """
+        showLogoWidth = self.setShowLogo()
+        showLogoWidth = showLogoWidth + 5 if showLogoWidth else 0 # add 5 for padding if show logo exists
+        self.canvas.setLineWidth(width=1)
+        self.canvas.setFillColor(lightslategray)
+        self.canvas.setStrokeColor(black)
+        self.canvas.rect(self.marginSize + showLogoWidth, (self.pageHeight-self.header), (self.pageWidth-(self.marginSize*2)) - showLogoWidth, self.marginSize, fill=True, stroke=True)
+        
+        # header text
+        self.canvas.setFillColor(black)
+        titleSplit = simpleSplit(self.title, self.fontType, 16, (self.pageWidth-(self.marginSize*2)) - showLogoWidth)
+        self.canvas.setFont(self.fontType, 16)
+        self.canvas.drawString((self.marginSize*1.25) + showLogoWidth, self.pageHeight - (self.marginSize*1.125), titleSplit[0])
+
+    def setFooter(self, pageNumber):
+        """
+        sets all footer information per page, add page info, footer bar, and privacy info, aligned on the bottom center of the page
+        :param pageNumber:
+        :return:
+        """
+        companyLogoW = self.setCompanyLogo()
+        companyLogoW += 5 if companyLogoW else 0 # add 5 for padding if company logo exists
+        self.canvas.setLineWidth(width=1)
+        self.canvas.setFillColor(lightslategray)
+        self.canvas.setStrokeColor(black)
+        self.canvas.rect(self.marginSize+companyLogoW, self.header, (self.pageWidth-(self.marginSize*2))-companyLogoW, (self.marginSize/2), fill=True, stroke=True)
+        self.canvas.setFillColor(black)
+        # footer text
+        self.canvas.setFont(self.fontType, 9)
+        self.canvas.drawRightString(self.pageWidth-(self.marginSize*1.25), (self.marginSize*1.625),"%s Page - %d" % (self.pageInfo, pageNumber))
+
+        # set privacy info on the bottom of the page
+        privacyInfo = {'msg1':"CONFIDENTIAL: The images, artwork and other materials displayed are the proprietary property of %s."%self.companyName,
+                       'msg2':"Any unauthorized use, printing, copying or distribution of such images, artwork and materials is strictly prohibited. All rights reserved.",
+                       'textColor':self.textColor,
+                       'fontName':self.fontType,
+                       'size':7}
+        shotName = Paragraph('''<para align=center spaceb=3>
+                                  <font name=%(fontName)s size=%(size)s color=%(textColor)s>%(msg1)s<br/>
+                                  %(msg2)s</font></para>'''%privacyInfo, self.styles['BodyText'])
+        privacyTable = Table([[shotName]], colWidths=(self.pageWidth-(self.marginSize*2)))
+        privacyTable.setStyle(TableStyle([('VALIGN',(-1,-1),(-1,-1),'TOP')]))
+        privacyTable.wrapOn(self.canvas, self.marginSize, 10)
+        privacyTable.drawOn(self.canvas, self.marginSize, 10)
+
+def writePDFFromLayoutState(state):
+    """
+    Builds and saves a PDF from PDFLayout.layoutState(). Runs in the batch export worker processes.
+    :param state: dictionary from PDFLayout.layoutState()
+    :return: the PDF output file path
+    """
+    layout = PDFLayout.fromLayoutState(state)
+    layout.save()
+    return layout.outputFilePath
@@ -0,0 +1,106 @@
+# Benchmarks laying out and writing PDF contact sheets of synthetic shots with AnPdfLayout. Does not need Nuke Studio.
+# Usage: python AnPdfLayoutBenchmark.py [numShots]
+from __future__ import print_function
+import os
+import struct
+import shutil
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+cwd = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(cwd)
+sys.path.append(os.path.join(cwd, "thirdParty"))
+
+import reportlab.pdfgen.canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.lib.utils import ImageReader, simpleSplit
+
+from AnPdfLayout import PDFLayout, shotRecord
+
+def syntheticJpeg(jpegData, index):
+    """Returns jpegData with a comment naming index after its start marker, so every synthetic shot has a distinct image"""
+    comment = ("synthetic shot %i" % index).encode("ascii")
+    return jpegData[:2] + b"\xff\xfe" + struct.pack(">H", len(comment)+2) + comment + jpegData[2:]
+
+def syntheticShots(numShots, distinctImages = True, directory = None):
+    """Returns numShots shot records, with the offline placeholder as their thumbnail.
+    If directory is given, the thumbnails are written there and the records have their paths instead of their data."""
+    with open(os.path.join(cwd, "images", "offline.jpg"), 'rb') as f:
+        jpegData = f.read()
+    shots = []
+    for i in range(numShots):
+        timeString = "01:%02i:%02i:%02i, %if" % (i // 1440 % 60, i // 24 % 60, i % 24, 24+i % 96)
+        image = syntheticJpeg(jpegData, i) if distinctImages else jpegData
+        path = None
+        if directory:
+            path = os.path.join(directory, "sh%04i.jpg" % (i*10))
+            with open(path, 'wb') as f:
+                f.write(image)
+            image = None
+        shots.append(shotRecord("sh%04i" % (i*10), "Video %i" % (i % 3 + 1), timeString, image = image, path = path))
+    return shots
+
+def timeCall(method, *args):
+    """Returns (seconds, result) for method(*args)"""
+    start = time.time()
+    result = method(*args)
+    return time.time() - start, result
+
+def measureText(layout):
+    """Registers the layout's font and measures every label and the title with it"""
+    layout.loadFontType()
+    width = 0
+    for imageData in layout.imageDataList:
+        for text in (imageData['name'], imageData['track'], imageData['timeString']):
+            width += pdfmetrics.stringWidth(text, layout.fontType, layout.fontSize)
+    simpleSplit(layout.title, layout.fontType, 16, layout.pageWidth-(layout.marginSize*2))
+    return width
+
+def embedImages(layout):
+    """Draws every shot's image, and nothing else, onto a canvas in memory"""
+    canvas = reportlab.pdfgen.canvas.Canvas(BytesIO(), pagesize=layout.pageSize)
+    for imageData in layout.imageDataList:
+        shot = layout.imageReaderForImageData(imageData)
+        canvas.drawImage(shot, imageData['shotX'], imageData['shotY'], width=imageData['shotW'], height=imageData['shotH'])
+    return canvas
+
+def runLayout(numShots, rows = 3, columns = 3, orientation = "landscape", streaming = False, distinctImages = True,
+              directory = None):
+    """Times each stage of writing a PDF of numShots synthetic shots, and prints the timings.
+    If directory is given, the thumbnails are read from files written there, as the exporter does when streaming."""
+    output = BytesIO()
+    layout = PDFLayout(syntheticShots(numShots, distinctImages, directory), output, rows, columns, orientation,
+                       title = "Synthetic, %i shots" % numShots, streaming = streaming)
+
+    layoutTime, pages = timeCall(layout.layoutPages)
+    textTime, width = timeCall(measureText, layout)
+    imageTime, canvas = timeCall(embedImages, layout)
+    drawTime, canvas = timeCall(layout.buildCanvas)
+    saveTime, result = timeCall(layout.canvas.save)
+
+    print("%i x %i %s, %i pages%s%s" % (rows, columns, orientation, len(pages), ", streaming" if streaming else "",
+                                        ", thumbnails in files" if directory else ""))
+    print("  layout:          %.3fs" % layoutTime)
+    print("  font metrics:    %.3fs" % textTime)
+    print("  image embedding: %.3fs" % imageTime)
+    print("  draw:            %.3fs" % drawTime)
+    print("  save:            %.3fs, %.1f MB" % (saveTime, len(output.getvalue())/(1024.0*1024.0)))
+    return layoutTime, textTime, imageTime, drawTime, saveTime
+
+def run(numShots = 1000):
+    """Runs the benchmark for each of the page layouts, and with streaming"""
+    print("Synthetic shots: %i" % numShots)
+    for name in sorted(PDFLayout.PAGE_LAYOUTS_DICT):
+        rows, columns, orientation = PDFLayout.PAGE_LAYOUTS_DICT[name]
+        runLayout(numShots, rows, columns, orientation)
+    runLayout(numShots, streaming = True)
+    directory = tempfile.mkdtemp(prefix="pdf_layout_benchmark_")
+    try:
+        runLayout(numShots, streaming = True, directory = directory)
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -73,6 +73,8 @@ class StandardEncryption:
             raise ValueError("encryption not prepared!")
         if self.objnum is None:
             raise ValueError("not registered in PDF object")
+        if isinstance(t, memoryview):
+            t = t.tobytes()
         return encodePDF(self.key, self.objnum, self.version, t, revision=self.revision)
     def prepare(self, document, overrideID=None):
         # get ready to do encryption
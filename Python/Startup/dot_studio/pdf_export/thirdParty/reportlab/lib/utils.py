@@ -5,7 +5,10 @@ __version__=''' $Id$ '''
 __doc__='''Gazillions of miscellaneous internal utility functions'''
 
 import os, sys, imp, time, types
-from base64 import decodestring as base64_decodestring, encodestring as base64_encodestring
+try:
+    from base64 import decodebytes as base64_decodestring, encodebytes as base64_encodestring
+except ImportError:
+    from base64 import decodestring as base64_decodestring, encodestring as base64_encodestring
 try:
     from cPickle import dumps as pickle_dumps, loads as pickle_loads, dump as pickle_dump, load as pickle_load
 except ImportError:
@@ -47,7 +50,7 @@ if isPy3:
     unicodeT = str
     strTypes = (str,bytes)
     def _digester(s):
-        return md5(s if isBytes(s) else s.encode('utf8')).hexdigest()
+        return md5(s.encode('utf8') if isinstance(s,str) else s).hexdigest()
 
     def asBytes(v,enc='utf8'):
         return v if isinstance(v,bytes) else v.encode(enc)
@@ -735,9 +738,86 @@ def _isPILImage(im):
     except AttributeError:
         return 0
 
+def readBuffer(fp):
+    '''return the whole content of the open file fp as a memoryview, or bytes on Python 2
+    where str and memoryview can't be joined. In-memory files are not copied'''
+    getvalue = getattr(fp,'getvalue',None)
+    if getvalue is not None:
+        data = getvalue()
+    else:
+        fp.seek(0)
+        data = fp.read()
+    return memoryview(data) if isPy3 else data
+
+def readJPEGHeader(fp):
+    '''return (width, height, components) of the JPEG in the open file fp, or None if it isn't
+    a JPEG which can be embedded as it is. Leaves fp at the start'''
+    from reportlab.pdfbase.pdfutils import readJPEGInfo
+    try:
+        fp.seek(0)
+        if fp.read(2)!=b'\xff\xd8':
+            return None
+        return readJPEGInfo(fp)
+    except:
+        return None
+    finally:
+        fp.seek(0)
+
+class ImageDataCache(object):
+    '''image file data shared by ImageReaders, keyed by digest so identical images are held once.
+    Bounded by the total size of the data, the least recently used data is dropped first'''
+    def __init__(self, capacity=None):
+        from collections import OrderedDict
+        self._data = OrderedDict()
+        self.capacity = capacity    #bytes, rl_config.imageReaderCacheSize if None
+        self.size = 0
+        self.hits = self.misses = self.evictedBytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def intern(self, data):
+        "return the cached copy of data, caching it if it isn't there yet"
+        key = _digester(data)
+        cached = self._data.pop(key, None)
+        if cached is not None:
+            self.hits += 1
+            self._data[key] = cached
+            return cached
+        self.misses += 1
+        self._data[key] = data
+        self.size += len(data)
+        self._evict()
+        return data
+
+    def _evict(self):
+        capacity = self.capacity
+        if capacity is None:
+            from reportlab.rl_config import imageReaderCacheSize as capacity
+        while self.size > capacity and len(self._data) > 1:
+            key, data = self._data.popitem(last=False)
+            self.size -= len(data)
+            self.evictedBytes += len(data)
+
+    def setCapacity(self, capacity):
+        "change the capacity, dropping data until the cache fits"
+        self.capacity = capacity
+        self._evict()
+
+    def clear(self):
+        self._data.clear()
+        self.size = 0
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, evictedBytes=self.evictedBytes,
+                    entries=len(self._data), size=self.size)
+
+def _clearImageDataCache():
+    ImageReader._cache.clear()
+
 class ImageReader(object):
     "Wraps up either PIL or Java to get data from bitmaps"
-    _cache={}
+    _cache=ImageDataCache()
     def __init__(self, fileName,ident=None):
         if isinstance(fileName,ImageReader):
             self.__dict__ = fileName.__dict__   #borgize
@@ -763,7 +843,8 @@ class ImageReader(object):
                 from reportlab.rl_config import imageReaderFlags
                 self.fp = open_for_read(fileName,'b')
                 if isinstance(self.fp,_bytesIOType): imageReaderFlags=0 #avoid messing with already internal files
-                if imageReaderFlags>0:  #interning
+                lazy = imageReaderFlags>0 and imageReaderFlags&8 and isStr(fileName)
+                if imageReaderFlags>0 and not lazy:  #interning
                     data = self.fp.read()
                     if imageReaderFlags&2:  #autoclose
                         try:
@@ -772,16 +853,30 @@ class ImageReader(object):
                             pass
                     if imageReaderFlags&4:  #cache the data
                         if not self._cache:
-                            from rl_config import register_reset
-                            register_reset(self._cache.clear)
-                        data=self._cache.setdefault(_digester(data),data)
+                            from reportlab.rl_config import register_reset
+                            register_reset(_clearImageDataCache)
+                        data=self._cache.intern(data)
                     self.fp=getBytesIO(data)
                 elif imageReaderFlags==-1 and isinstance(fileName,str):
                     #try Ralf Schmitt's re-opening technique of avoiding too many open files
                     self.fp.close()
                     del self.fp #will become a property in the next statement
                     self.__class__=LazyImageReader
-                if haveImages:
+                from reportlab.rl_config import jpegPassthrough
+                jpegInfo = jpegPassthrough and readJPEGHeader(self.fp)
+                if jpegInfo:
+                    #JPEGs are embedded as they are, so only their header is read
+                    self._width,self._height = jpegInfo[:2]
+                    self._jpegInfo = jpegInfo
+                    self.jpeg_fh = self._jpeg_fh
+                    self._dataA=None
+                    if lazy:
+                        #keep just the name, the file is read again when the PDF is written
+                        self.fp.close()
+                        del self.fp
+                        self.__class__=LazyImageReader
+                        self._lazyJPEG = 1
+                elif haveImages:
                     #detect which library we are using and open the image
                     if not self._image:
                         self._image = self._read_image(self.fp)
@@ -799,6 +894,11 @@ class ImageReader(object):
             except:
                 annotateException('\nfileName=%r identity=%s'%(fileName,self.identity()))
 
+    @classmethod
+    def cacheStats(cls):
+        "hits, misses, evictedBytes, entries and size of the image data cache used by imageReaderFlags&4"
+        return cls._cache.stats()
+
     def identity(self):
         '''try to return information that will identify the instance'''
         fn = self.fileName
@@ -822,6 +922,11 @@ class ImageReader(object):
     def jpeg_fh(self):
         return None
 
+    def jpegData(self):
+        "the JPEG's encoded bytes as a memoryview (bytes on Python 2), or None if it isn't a JPEG"
+        fp = self.jpeg_fh()
+        return fp and readBuffer(fp)
+
     def getSize(self):
         if (self._width is None or self._height is None):
             if sys.platform[0:4] == 'java':
@@ -856,6 +961,9 @@ class ImageReader(object):
                     self.mode = 'RGB'
                 else:
                     im = self._image
+                    if im is None:
+                        #a JPEG passed through without the imaging library, decode it now it is needed
+                        im = self._image = self._read_image(self._jpeg_fh())
                     mode = self.mode = im.mode
                     if mode=='RGBA':
                         if Image.VERSION.startswith('1.1.7'): im.load()
@@ -880,7 +988,7 @@ class ImageReader(object):
         return width, height, self.getRGBData()
 
     def getTransparent(self):
-        if sys.platform[0:4] == 'java':
+        if sys.platform[0:4] == 'java' or self._image is None:
             return None
         else:
             if "transparency" in self._image.info:
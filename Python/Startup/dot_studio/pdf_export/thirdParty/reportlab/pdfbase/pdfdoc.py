@@ -18,7 +18,7 @@ import types, binascii, codecs
 from collections import OrderedDict
 from reportlab.pdfbase import pdfutils
 from reportlab import rl_config
-from reportlab.lib.utils import import_zlib, open_for_read, makeFileName, isSeq, isBytes, isUnicode, _digester, isStr, bytestr, isPy3
+from reportlab.lib.utils import import_zlib, open_for_read, makeFileName, isSeq, isBytes, isUnicode, _digester, isStr, bytestr, isPy3, readBuffer
 from reportlab.lib.rl_accel import escapePDF, fp_str, asciiBase85Encode, asciiBase85Decode
 from reportlab.pdfbase import pdfmetrics
 from hashlib import md5
@@ -85,7 +85,7 @@ def format(element, document, toplevel=0):
         #use a controlled number formatting routine
         #instead of str, so Jython/Python etc do not differ
         return pdfdocEnc(fp_str(element))
-    elif isBytes(element):
+    elif isBytes(element) or isinstance(element, memoryview):
         return element
     elif isUnicode(element):
         return pdfdocEnc(element)
@@ -116,6 +116,13 @@ class NoEncryption:
 class PDFObject(object):
     pass
 
+class _FinishedJob(object):
+    "the result of work which was done straight away, in place of a future from the compression threads"
+    def __init__(self, result):
+        self._result = result
+    def result(self):
+        return self._result
+
 class DummyDoc(PDFObject):
     "used to bypass encryption when required"
     encrypt = NoEncryption()
@@ -125,12 +132,18 @@ class PDFDocument(PDFObject):
     # set this to define filters
     defaultStreamFilters = None
     encrypt = NoEncryption() # default no encryption
+    _objectRefs = None  # formatLinearized's record of the objects referred to by the object being formatted
+    _keepEncoded = 0    # true while formatLinearized's first pass formats the streams
     def __init__(self,
                  dummyoutline=0,
                  compression=rl_config.pageCompression,
                  invariant=rl_config.invariant,
                  filename=None,
                  pdfVersion=PDF_VERSION_DEFAULT,
+                 streaming=0,
+                 compressionThreads=None,
+                 compressionLevels=None,
+                 linearize=0,
                  ):
         self._ID = None
         self.objectcounter = 0
@@ -181,11 +194,72 @@ class PDFDocument(PDFObject):
         DD.__Comment__ = "The standard fonts dictionary"
         self.Reference(DD, BasicFonts)
         self.delayedFonts = []
+        # image XObjects are named by a digest of their content, so each distinct image is embedded once
+        self.imageStats = {'embedded': 0, 'reused': 0}
+        self.imageFileDigests = {}      # (filename, mtime, size) to content digest
+        # streaming: finished pages and their objects are written to the output as each page is added
+        self._streamTo = None           # the output file object
+        self._streamOwned = 0           # true if we opened it, and so must close it
+        self._streamFile = None         # PDFFile writing to _streamTo, made at the first flush
+        self._streamedIds = set()       # internal names of the objects already written
+        self._streamNextNumber = 1      # the first object number not yet considered for flushing
+        if streaming:
+            self.beginStreaming(filename)
+        # zlib levels for each class of stream, and the threads compressing streams while the document is written
+        self.compressionLevels = dict(content=rl_config.contentCompressionLevel,
+                                      image=rl_config.imageCompressionLevel,
+                                      font=rl_config.fontCompressionLevel)
+        if compressionLevels:
+            self.compressionLevels.update(compressionLevels)
+        self.setCompressionThreads(rl_config.compressionThreads if compressionThreads is None else compressionThreads)
+        # write the first page first, with hints to where the others are, see formatLinearized
+        self.linearize = linearize
 
     def setCompression(self, onoff):
         # XXX: maybe this should also set self.defaultStreamFilters?
         self.compression = onoff
 
+    def setCompressionThreads(self, threads):
+        """compress streams on a pool of threads while the document is written, which helps because
+        zlib releases the GIL. The output is the same as compressing them one at a time. 0 turns it off"""
+        self.shutdownCompression()
+        self._compressionPool = None
+        if threads:
+            try:
+                from concurrent.futures import ThreadPoolExecutor
+            except ImportError:
+                return
+            self._compressionPool = ThreadPoolExecutor(threads)
+
+    def shutdownCompression(self):
+        "wait for any outstanding compression and stop the compression threads"
+        pool = getattr(self, '_compressionPool', None)
+        if pool is not None:
+            pool.shutdown()
+            self._compressionPool = None
+
+    def compressionLevel(self, compressionClass):
+        "the zlib level for streams of compressionClass ('content', 'image' or 'font')"
+        return self.compressionLevels.get(compressionClass, -1)
+
+    def encodeLater(self, encode, *args):
+        """return a job for encode(*args), whose result() is the encoded data. The job runs on the
+        compression threads if there are any, otherwise it is done now"""
+        if self._compressionPool is None:
+            return _FinishedJob(encode(*args))
+        return self._compressionPool.submit(encode, *args)
+
+    def prepareStreams(self, objects):
+        "start compressing the streams of objects, which are about to be written, on the compression threads"
+        if self._compressionPool is None:
+            return
+        for obj in objects:
+            if isinstance(obj, PDFPage):
+                obj.makeContents()
+                obj = obj.Contents
+            if isinstance(obj, PDFStream):
+                obj.prepare(self)
+
     def ensureMinPdfVersion(self, *keys):
         "Ensure that the pdf version is greater than or equal to that specified by the keys"
         for k in keys:
@@ -207,7 +281,80 @@ class PDFDocument(PDFObject):
                         +IDs+b' '+IDs+b']\r\n')
         return self._ID
 
+    def beginStreaming(self, filename):
+        """write finished pages, and the objects they use, to filename as they are added rather than
+        holding the whole document until it is saved. filename may be a file-like object.
+        The PDF header claims the highest version this module supports, as it is written before the
+        document knows which features it will use."""
+        if hasattr(getattr(filename, "write",None),'__call__'):
+            self._streamTo = filename
+            self._streamOwned = 0
+        else:
+            self._streamTo = open(makeFileName(filename), "wb")
+            self._streamOwned = 1
+
+    def streamingFile(self):
+        "return the PDFFile writing to the stream, creating it (and so writing the header) if needed"
+        if self._streamFile is None:
+            pdfVersion = max([self._pdfVersion]+list(PDF_SUPPORT_VERSION.values()))
+            self._streamFile = PDFFile(pdfVersion, write=self._streamTo.write)
+        return self._streamFile
+
+    def isFlushable(self, obj):
+        "objects which may still change, or are only completed at save time, are not flushed early"
+        if obj is self.Catalog or obj is self.Pages or obj is self.info or obj is self.Outlines:
+            return False
+        if obj is self.idToObject.get(BasicFonts):
+            return False
+        return not isinstance(obj, (PDFInfo, PDFOutlines, PDFOutlines0, OutlineEntryObject, Destination))
+
+    def flushObjects(self):
+        """streaming: write the objects registered since the last flush to the output and release them.
+        Flushed objects are replaced by a PDFFlushedObject so later references and image reuse still work"""
+        if self._streamTo is None or not isinstance(self.encrypt, NoEncryption):
+            return
+        File = self.streamingFile()
+        self.__accum__ = File
+        numbertoid = self.numberToId
+        self.prepareStreams([self.idToObject[numbertoid[n]] for n in range(self._streamNextNumber, len(numbertoid)+1)])
+        # formatting may register new objects (eg a page's Contents), so keep going until there are none
+        while self._streamNextNumber in numbertoid:
+            id = numbertoid[self._streamNextNumber]
+            self._streamNextNumber += 1
+            obj = self.idToObject[id]
+            if not self.isFlushable(obj):
+                continue
+            self._writeObject(File, id)
+            self._streamedIds.add(id)
+            self.idToObject[id] = PDFFlushedObject(id, obj)
+            if isinstance(obj, PDFPage):
+                # normally the page just added
+                pages = self.Pages.pages
+                i = len(pages)-1 if pages[-1] is obj else pages.index(obj)
+                pages[i] = PDFObjectReference(id)
+        del self.__accum__
+
+    def _writeObject(self, File, id):
+        "format the object with internal name id into File, recording its offset"
+        obj = self.idToObject[id]
+        IOf = PDFIndirectObject(id, obj).format(self)
+        # add a comment to the PDF output
+        if not rl_config.invariant and rl_config.pdfComments:
+            try:
+                classname = obj.__class__.__name__
+            except:
+                classname = ascii(obj)
+            File.add("%% %s: class %s \r\n" % (ascii(id), classname[:50]))
+        self.idToOffset[id] = File.add(IOf)
+
     def SaveToFile(self, filename, canvas):
+        if self._streamTo is not None:
+            # most of the document has been written already, add the rest
+            self.GetPDFData(canvas)
+            if self._streamOwned:
+                self._streamTo.close()
+            if getattr(canvas,'_verbosity',None): print('saved %s' % (getattr(self._streamTo,'name',filename),))
+            return
         if hasattr(getattr(filename, "write",None),'__call__'):
             myfile = 0
             f = filename
@@ -241,6 +388,8 @@ class PDFDocument(PDFObject):
         self.Reference(self.info)
         outline = self.outline
         outline.prepare(self, canvas)
+        if self.linearize:
+            return self.formatLinearized()
         return self.format()
 
     def inPage(self):
@@ -286,6 +435,8 @@ class PDFDocument(PDFObject):
         self.Pages.addPage(page)
         self.pageCounter += 1
         self.inObject = None
+        if self._streamTo is not None:
+            self.flushObjects()
 
     def addForm(self, name, form):
         """add a Form XObject."""
@@ -407,30 +558,22 @@ class PDFDocument(PDFObject):
         numbertoid = self.numberToId
         idToNV = self.idToObjectNumberAndVersion
         idToOb = self.idToObject
-        idToOf = self.idToOffset
         ### note that new entries may be "appended" DURING FORMATTING
         done = None
         # __accum__ allows objects to know where they are in the file etc etc
-        self.__accum__ = File = PDFFile(self._pdfVersion) # output collector
+        if self._streamTo is not None:
+            File = self.streamingFile()
+        else:
+            File = PDFFile(self._pdfVersion) # output collector
+        self.__accum__ = File
+        streamedIds = self._streamedIds
+        self.prepareStreams([idToOb[numbertoid[n]] for n in sorted(numbertoid) if numbertoid[n] not in streamedIds])
         while done is None:
             counter += 1 # do next object...
             if counter in numbertoid:
                 id = numbertoid[counter]
-                #printidToOb
-                obj = idToOb[id]
-                IO = PDFIndirectObject(id, obj)
-                # register object number and version
-                #encrypt.register(id,
-                IOf = IO.format(self)
-                # add a comment to the PDF output
-                if not rl_config.invariant and rl_config.pdfComments:
-                    try:
-                        classname = obj.__class__.__name__
-                    except:
-                        classname = ascii(obj)
-                    File.add("%% %s: class %s \r\n" % (ascii(id), classname[:50]))
-                offset = File.add(IOf)
-                idToOf[id] = offset
+                if id not in streamedIds:
+                    self._writeObject(File, id)
                 ids.append(id)
             else:
                 done = 1
@@ -455,11 +598,148 @@ class PDFDocument(PDFObject):
             )
         trailerf = trailer.format(self)
         File.add(trailerf)
+        self.shutdownCompression()
         for ds in getattr(self,'_digiSigs',[]):
             ds.sign(File)
         # return string format for pdf file
         return File.format(self)
 
+    def formatLinearized(self):
+        """format the document linearized ("fast web view", PDF 1.7 Annex F). The first page and the
+        objects it uses come first, after hint tables saying where the other pages are, so a viewer
+        can show the first page before the rest of the file arrives. Encrypted, signed or streamed
+        documents are formatted as usual"""
+        if self._streamTo is not None or not isinstance(self.encrypt, NoEncryption) or getattr(self,'_digiSigs',None):
+            return self.format()
+        catId = self.Reference(self.Catalog).name
+        infoRef = self.Reference(self.info)
+        idToOb = self.idToObject
+        numbertoid = self.numberToId
+        # first pass: format every object to find the objects it refers to, keeping the encoded streams
+        refs = {}
+        self.prepareStreams([idToOb[numbertoid[n]] for n in sorted(numbertoid)])
+        self._keepEncoded = 1
+        try:
+            counter = 1
+            while counter in numbertoid:
+                id = numbertoid[counter]
+                self._objectRefs = refs[id] = []
+                format(idToOb[id], self, toplevel=1)
+                counter += 1
+        finally:
+            self._objectRefs = None
+            self._keepEncoded = 0
+        pageIds = [self.Reference(page).name for page in self.Pages.pages]
+        if not pageIds:
+            return self.format()
+
+        # the objects each page uses, not counting other pages and the page tree
+        stop = set(pageIds)
+        stop.update((catId, self.Reference(self.Pages).name))
+        pageObjects = []
+        contentsIds = []
+        users = {}  # object to the pages using it
+        for i, pageId in enumerate(pageIds):
+            objects = [pageId]
+            contents = getattr(idToOb[pageId], 'Contents', None)
+            contentsId = getattr(contents, __InternalName__, getattr(contents, 'name', None))
+            if contentsId in refs and contentsId not in stop:
+                # the content stream goes straight after its page
+                objects.append(contentsId)
+            found = set(objects)
+            for id in objects:
+                for ref in refs[id]:
+                    if ref not in found and ref not in stop:
+                        found.add(ref)
+                        objects.append(ref)
+            pageObjects.append(objects)
+            contentsIds.append(contentsId)
+            for id in objects[1:]:
+                users.setdefault(id, set()).add(i)
+
+        # the first page has everything it uses, later pages just what no other page uses
+        firstPage = pageObjects[0]
+        pageSections = [firstPage] + [[objects[0]]+[id for id in objects[1:] if len(users[id])==1]
+                                      for objects in pageObjects[1:]]
+        placed = set([catId])
+        for section in pageSections:
+            placed.update(section)
+        shared = []
+        for objects in pageObjects[1:]:
+            for id in objects[1:]:
+                if id not in placed:
+                    placed.add(id)
+                    shared.append(id)
+        others = [numbertoid[n] for n in sorted(numbertoid) if numbertoid[n] not in placed]
+
+        # renumber: the later pages, shared and other objects from 1, then the linearization
+        # dictionary, catalog, first page and hint stream, which have the first page's xref section
+        main = [id for section in pageSections[1:] for id in section] + shared + others
+        firstSection = [catId] + firstPage
+        linNumber = len(main)+1
+        hintNumber = linNumber+1+len(firstSection)
+        numbers = {}
+        for n, id in enumerate(main):
+            numbers[id] = n+1
+        for n, id in enumerate(firstSection):
+            numbers[id] = linNumber+1+n
+        idToNV = self.idToObjectNumberAndVersion
+        for id, n in numbers.items():
+            idToNV[id] = (n, 0)
+        self.numberToId = dict((n, id) for (id, n) in numbers.items())
+
+        # second pass: format the objects with their new numbers
+        body = dict((id, PDFIndirectObject(id, idToOb[id]).format(self)) for id in main+firstSection)
+        if len(idToOb)!=len(numbers):
+            raise PDFError("objects were added while linearizing the document")
+
+        header = PDFFile(self._pdfVersion).format(self)
+        firstPageNumber = numbers[firstPage[0]]
+        def linearizationDict(L=0, H=(0, 0), E=0, T=0):
+            return pdfdocEnc("%d 0 obj\r\n<< /Linearized 1 /L %010d /H [ %010d %010d ] /O %d /E %010d /N %d /T %010d >>\r\nendobj\r\n"
+                % (linNumber, L, H[0], H[1], firstPageNumber, E, len(pageIds), T))
+        def firstPageTrailer(prev=0):
+            return PDFTrailer(startxref=0, Size=hintNumber+1, Prev='%010d' % prev, Root=PDFObjectReference(catId),
+                              Info=infoRef, ID=self.ID()).format(self)
+        firstXref = len(header)+len(linearizationDict())
+        firstXrefLength = len(_formatXref(linNumber, [0]*(hintNumber+1-linNumber)))
+
+        # offsets without the hint stream, which is how the hint tables give them
+        adjusted = {}
+        offset = firstXref+firstXrefLength+len(firstPageTrailer())
+        adjusted[catId] = offset
+        hintOffset = offset = offset+len(body[catId])
+        for id in firstPage+main:
+            adjusted[id] = offset
+            offset += len(body[id])
+        mainXrefAdjusted = offset
+
+        hints, sharedOffset = _linearizationHints(pageSections, pageObjects, contentsIds, users, shared,
+                                                  numbers, adjusted, dict((id, len(b)) for id, b in body.items()))
+        S = PDFStream(content=hints, filters=self.compression and [PDFZCompress] or None)
+        S.dictionary["S"] = sharedOffset
+        hintStream = pdfdocEnc("%d 0 obj\r\n" % hintNumber)+S.format(self)+b'endobj\r\n'
+        hintLength = len(hintStream)
+        def actual(offset):
+            return offset+hintLength if offset>=hintOffset else offset
+
+        mainXref = mainXrefAdjusted+hintLength
+        mainXrefData = _formatXref(0, [actual(adjusted[id]) for id in main])
+        mainTrailer = PDFTrailer(startxref=firstXref, Size=linNumber, Root=PDFObjectReference(catId)).format(self)
+        fileLength = mainXref+len(mainXrefData)+len(mainTrailer)
+        firstPageEnd = actual(adjusted[firstPage[-1]]+len(body[firstPage[-1]]))
+        # T is the offset of the white space before the main xref's first entry
+        mainXrefFirstEntry = mainXref+len(pdfdocEnc("xref\r\n0 %d\r\n" % linNumber))-1
+        File = [header,
+                linearizationDict(fileLength, (hintOffset, hintLength), firstPageEnd, mainXrefFirstEntry),
+                _formatXref(linNumber, [len(header)]+[actual(adjusted[id]) for id in firstSection]+[hintOffset]),
+                firstPageTrailer(mainXref),
+                body[catId], hintStream]
+        File.extend(body[id] for id in firstPage+main)
+        File.extend((mainXrefData, mainTrailer))
+        self.shutdownCompression()
+        return b''.join(File)
+
     def hasForm(self, name):
         """test for existence of named form"""
         internalname = xObjectName(name)
@@ -741,13 +1021,13 @@ class ViewerPreferencesPDFDictionary(CheckedPDFDictionary):
 # possibly in the future also support parameters
 class PDFStreamFilterZCompress:
     pdfname = "FlateDecode"
-    def encode(self, text):
+    def encode(self, text, level=-1):
         from reportlab.lib.utils import import_zlib
         zlib = import_zlib()
         if not zlib: raise ImportError("cannot z-compress zlib unavailable")
         if isUnicode(text):
             text = text.encode('utf8')
-        return zlib.compress(text)
+        return zlib.compress(text, level)
     def decode(self, encoded):
         from reportlab.lib.utils import import_zlib
         zlib = import_zlib()
@@ -759,7 +1039,7 @@ PDFZCompress = PDFStreamFilterZCompress()
 
 class PDFStreamFilterBase85Encode:
     pdfname = "ASCII85Decode"
-    def encode(self, text):
+    def encode(self, text, level=-1):
         from reportlab.pdfbase.pdfutils import _wrap
         text = asciiBase85Encode(text)
         if rl_config.wrapA85:
@@ -775,37 +1055,51 @@ class PDFStream(PDFObject):
     '''set dictionary elements explicitly stream.dictionary[name]=value'''
     ### compression stuff not implemented yet
     __RefOnly__ = 1 # must be at top level
+    compressionClass = 'content'    # which of the document's compressionLevels the filters use
     def __init__(self, dictionary=None, content=None, filters=None):
         if dictionary is None:
             dictionary = PDFDictionary()
         self.dictionary = dictionary
         self.content = content
         self.filters = filters
+    def encodeContent(self, document):
+        """apply the filters to the content, returning the encoded content and the filter names
+        (None if there are no filters). Only reads the stream, so it can run on the compression threads"""
+        content = self.content
+        filters = self.filters
+        if filters is None:
+            filters = document.defaultStreamFilters
+        if filters is None:
+            return content, None
+        level = document.compressionLevel(self.compressionClass)
+        # apply filters in reverse order listed
+        rf = list(filters)
+        rf.reverse()
+        fnames = []
+        for f in rf:
+            content = f.encode(content, level)
+            fnames.insert(0, PDFName(f.pdfname))
+        return content, fnames
+    def prepare(self, document):
+        "start encoding the content on the document's compression threads, format collects the result"
+        if self.content is not None and "Filter" not in self.dictionary.dict and '_encodeJob' not in self.__dict__:
+            self._encodeJob = document.encodeLater(self.encodeContent, document)
     def format(self, document):
         dictionary = self.dictionary
         # copy it for modification
         dictionary = PDFDictionary(dictionary.dict.copy())
         content = self.content
-        filters = self.filters
         if self.content is None:
             raise ValueError("stream content not set")
-        if filters is None:
-            filters = document.defaultStreamFilters
+        job = self.__dict__.pop('_encodeJob', None)
         # only apply filters if they haven't been applied elsewhere
-        if filters is not None and "Filter" not in dictionary.dict:
-            # apply filters in reverse order listed
-            rf = list(filters)
-            rf.reverse()
-            fnames = []
-            for f in rf:
-                #print "*****************content:"; print repr(content[:200])
-                #print "*****************filter", f.pdfname
-                content = f.encode(content)
-                fnames.insert(0, PDFName(f.pdfname))
-            #print "*****************finally:"; print content[:200]
-            #print "****** FILTERS", fnames
-            #stop
-            dictionary["Filter"] = PDFArray(fnames)
+        if "Filter" not in dictionary.dict:
+            content, fnames = job.result() if job is not None else self.encodeContent(document)
+            if getattr(document, '_keepEncoded', 0):
+                # formatLinearized's first pass, the second needs the same encoding
+                self._encodeJob = _FinishedJob((content, fnames))
+            if fnames is not None:
+                dictionary["Filter"] = PDFArray(fnames)
         # "stream encoding is done after all filters have been applied"
         content = document.encrypt.encode(content)
         fc = format(content, document)
@@ -871,10 +1165,23 @@ class PDFIndirectObject(PDFObject):
                 +fcontent+ (b'' if fcontent.endswith(b'\r\n') else b'\r\n')
                 +b'endobj\r\n')
 
+class PDFFlushedObject(PDFObject):
+    "stands in for an object that has been written out by a streaming document"
+    def __init__(self, name, obj):
+        self.__InternalName__ = name
+        # drawImage reuses an image XObject by name, and needs its size
+        self.width = getattr(obj, 'width', None)
+        self.height = getattr(obj, 'height', None)
+    def format(self, document):
+        raise PDFError("object %s has already been written" % ascii(self.__InternalName__))
+
 class PDFObjectReference(PDFObject):
     def __init__(self, name):
         self.name = name
     def format(self, document):
+        refs = getattr(document, '_objectRefs', None)
+        if refs is not None:
+            refs.append(self.name)
         try:
             return pdfdocEnc("%s %s R" % document.idToObjectNumberAndVersion[self.name])
         except:
@@ -882,9 +1189,9 @@ class PDFObjectReference(PDFObject):
 
 class PDFFile(PDFObject):
     ### just accumulates strings: keeps track of current offset
-    def __init__(self,pdfVersion=PDF_VERSION_DEFAULT):
+    def __init__(self,pdfVersion=PDF_VERSION_DEFAULT,write=None):
         self.strings = []
-        self.write = self.strings.append
+        self.write = write or self.strings.append
         self.offset = 0
         ### chapter 5
         # Following Ken Lunde's advice and the PDF spec, this includes
@@ -912,6 +1219,92 @@ class PDFFile(PDFObject):
 
 XREFFMT = '%0.10d %0.5d n'
 
+def _formatXref(firstNumber, offsets):
+    "an xref table with one section, for the objects from firstNumber at offsets. Object 0 is always free"
+    lines = ["xref", "%d %d" % (firstNumber, len(offsets)+(firstNumber==0))]
+    if firstNumber==0:
+        lines.append("0000000000 65535 f")
+    lines.extend(XREFFMT % (offset, 0) for offset in offsets)
+    lines.append("")
+    return pdfdocEnc('\r\n'.join(lines))
+
+class _HintBits(object):
+    "packs the unsigned integers of linearization hint tables, most significant bit first"
+    def __init__(self):
+        self.data = bytearray()
+        self._value = 0
+        self._bits = 0
+    def write(self, value, bits):
+        if not bits:
+            return
+        self._value = (self._value<<bits)|value
+        self._bits += bits
+        while self._bits>=8:
+            self._bits -= 8
+            self.data.append((self._value>>self._bits)&0xff)
+        self._value &= (1<<self._bits)-1
+    def writeAll(self, values, bits):
+        "write each of values, then pad to a byte boundary as each item of the tables is"
+        for value in values:
+            self.write(value, bits)
+        if self._bits:
+            self.write(0, 8-self._bits)
+
+def _linearizationHints(pageSections, pageObjects, contentsIds, users, shared, numbers, offsets, lengths):
+    """return the page offset and shared object hint tables of a linearized document (PDF 1.7 F.4),
+    and the offset of the shared object table. Each object shared by pages is a group of its own"""
+    sharedIds = pageSections[0]+shared
+    sharedIndex = dict((id, i) for i, id in enumerate(sharedIds))
+    nObjects = [len(section) for section in pageSections]
+    starts = [offsets[section[0]] for section in pageSections]
+    pageLengths = [offsets[section[-1]]+lengths[section[-1]]-offsets[section[0]] for section in pageSections]
+    # the first page has all its objects, so has no shared references
+    sharedRefs = [[]]+[[sharedIndex[id] for id in objects[1:] if len(users[id])>1] for objects in pageObjects[1:]]
+    contentOffsets = []
+    contentLengths = []
+    for section, contentsId in zip(pageSections, contentsIds):
+        if contentsId in section:
+            contentOffsets.append(offsets[contentsId]-offsets[section[0]])
+            contentLengths.append(lengths[contentsId])
+        else:
+            contentOffsets.append(0)
+            contentLengths.append(0)
+    def bits(values, least):
+        return (max(values)-least).bit_length()
+
+    w = _HintBits()
+    # page offset hint table header
+    leastObjects, leastLength = min(nObjects), min(pageLengths)
+    leastContentOffset, leastContentLength = min(contentOffsets), min(contentLengths)
+    objectBits, lengthBits = bits(nObjects, leastObjects), bits(pageLengths, leastLength)
+    contentOffsetBits, contentLengthBits = bits(contentOffsets, leastContentOffset), bits(contentLengths, leastContentLength)
+    sharedCountBits = bits([len(r) for r in sharedRefs], 0)
+    sharedIdBits = bits([i for r in sharedRefs for i in r] or [0], 0)
+    for value, size in ((leastObjects, 32), (starts[0], 32), (objectBits, 16), (leastLength, 32), (lengthBits, 16),
+                        (leastContentOffset, 32), (contentOffsetBits, 16), (leastContentLength, 32), (contentLengthBits, 16),
+                        (sharedCountBits, 16), (sharedIdBits, 16), (0, 16), (1, 16)):
+        w.write(value, size)
+    # page offset hint table entries, an item for every page at a time
+    w.writeAll([n-leastObjects for n in nObjects], objectBits)
+    w.writeAll([n-leastLength for n in pageLengths], lengthBits)
+    w.writeAll([len(r) for r in sharedRefs], sharedCountBits)
+    w.writeAll([i for r in sharedRefs for i in r], sharedIdBits)
+    w.writeAll([], 0)   # no fractional positions of shared objects
+    w.writeAll([n-leastContentOffset for n in contentOffsets], contentOffsetBits)
+    w.writeAll([n-leastContentLength for n in contentLengths], contentLengthBits)
+
+    # shared object hint table, groups of one object: the first page's objects then the shared section
+    sharedOffset = len(w.data)
+    groupLengths = [lengths[id] for id in sharedIds]
+    leastGroup = min(groupLengths)
+    groupBits = bits(groupLengths, leastGroup)
+    for value, size in ((numbers[shared[0]] if shared else 0, 32), (offsets[shared[0]] if shared else 0, 32),
+                        (len(pageSections[0]), 32), (len(sharedIds), 32), (0, 16), (leastGroup, 32), (groupBits, 16)):
+        w.write(value, size)
+    w.writeAll([n-leastGroup for n in groupLengths], groupBits)
+    w.writeAll([0]*len(sharedIds), 1)   # no MD5 signatures
+    return bytes(w.data), sharedOffset
+
 class PDFCrossReferenceSubsection(PDFObject):
     def __init__(self, firstentrynumber, idsequence):
         self.firstentrynumber = firstentrynumber
@@ -1114,6 +1507,21 @@ class PDFPage(PDFCatalog):
     def setPageTransition(self, tranDict):
         self.Trans = PDFDictionary(tranDict)
 
+    def makeContents(self):
+        "make the content stream from the page's stream, unless the Contents are already set"
+        if self.Override_default_compilation or self.Contents:
+            return
+        stream = self.stream
+        if not stream:
+            self.Contents = teststream()
+        else:
+            S = PDFStream()
+            if self.compression:
+                S.filters = rl_config.useA85 and [PDFBase85Encode, PDFZCompress] or [PDFZCompress]
+            S.content = stream
+            S.__Comment__ = "page stream"
+            self.Contents = S
+
     def check_format(self, document):
         # set up parameters unless usual behaviour is suppressed
         if self.Override_default_compilation:
@@ -1126,17 +1534,7 @@ class PDFPage(PDFCatalog):
             #raise ValueError("annotations not reimplemented yet")
             if not isinstance(self.Annots,PDFObject):
                 self.Annots = PDFArray(self.Annots)
-        if not self.Contents:
-            stream = self.stream
-            if not stream:
-                self.Contents = teststream()
-            else:
-                S = PDFStream()
-                if self.compression:
-                    S.filters = rl_config.useA85 and [PDFBase85Encode, PDFZCompress] or [PDFZCompress]
-                S.content = stream
-                S.__Comment__ = "page stream"
-                self.Contents = S
+        self.makeContents()
         if not self.Resources:
             resources = PDFResourceDictionary()
             # fonts!
@@ -2060,13 +2458,20 @@ class PDFPostScriptXObject(PDFObject):
         return S.format(document)
 
 _mode2CS={'RGB':'DeviceRGB', 'L':'DeviceGray', 'CMYK':'DeviceCMYK'}
+def _compressImageData(raw, level=-1):
+    "deflate (and ASCII85 encode, if rl_config.useA85) the samples of an image"
+    data = import_zlib().compress(raw, level)
+    if rl_config.useA85:
+        data = asciiBase85Encode(data)
+    return data
+
 class PDFImageXObject(PDFObject):
     # first attempts at a hard-coded one
     # in the file, Image XObjects are stream objects.  We already
     # have a PDFStream object with 3 attributes:  dictionary, content
     # and filters.  So the job of this thing is to construct the
     # right PDFStream instance and ask it to format itself.
-    def __init__(self, name, source=None, mask=None):
+    def __init__(self, name, source=None, mask=None, document=None):
         self.name = name
         self.width = 24
         self.height = 23
@@ -2084,7 +2489,7 @@ class PDFImageXObject(PDFObject):
         if source is None:
             pass # use the canned one.
         elif hasattr(source,'jpeg_fh'):
-            self.loadImageFromSRC(source)   #it is already a PIL Image
+            self.loadImageFromSRC(source, document)   #it is already a PIL Image
         else:
             # it is a filename
             import os
@@ -2111,14 +2516,31 @@ class PDFImageXObject(PDFObject):
         elif self.mask=='auto': self.mask = None
         self.streamContent = ''.join(imagedata[3:-1])
 
-    def loadImageFromJPEG(self,imageFile):
-        try:
+    def loadImageFromJPEG(self,imageFile,info=None):
+        """Embeds the JPEG in imageFile as it is, info is its (width, height, components) if they
+        have been read already"""
+        if info is None:
             try:
-                info = pdfutils.readJPEGInfo(imageFile)
-            finally:
-                imageFile.seek(0) #reset file pointer
-        except:
-            return False
+                try:
+                    info = pdfutils.readJPEGInfo(imageFile)
+                finally:
+                    imageFile.seek(0) #reset file pointer
+            except:
+                return False
+        self._setJPEGInfo(info)
+        if rl_config.jpegPassthrough:
+            self.streamContent = readBuffer(imageFile)
+            self._filters = 'DCTDecode', #'DCT'
+        elif rl_config.useA85:
+            self.streamContent = asciiBase85Encode(imageFile.read())
+            self._filters = 'ASCII85Decode','DCTDecode' #'A85','DCT'
+        else:
+            self.streamContent = imageFile.read()
+            self._filters = 'DCTDecode', #'DCT'
+        self.mask = None
+        return True
+
+    def _setJPEGInfo(self,info):
         self.width, self.height = info[0], info[1]
         self.bitsPerComponent = 8
         if info[2] == 1:
@@ -2128,14 +2550,15 @@ class PDFImageXObject(PDFObject):
         else: #maybe should generate an error, is this right for CMYK?
             self.colorSpace = 'DeviceCMYK'
             self._dotrans = 1
-        self.streamContent = imageFile.read()
-        if rl_config.useA85:
-            self.streamContent = asciiBase85Encode(self.streamContent)
-            self._filters = 'ASCII85Decode','DCTDecode' #'A85','DCT'
-        else:
-            self._filters = 'DCTDecode', #'DCT'
+
+    def loadImageFromJPEGFileName(self,fileName,info):
+        """Embeds the JPEG file fileName as it is, reading it only when the PDF is written.
+        info is its (width, height, components)"""
+        self._setJPEGInfo(info)
+        self.streamContent = None
+        self._streamFileName = fileName
+        self._filters = 'DCTDecode', #'DCT'
         self.mask = None
-        return True
 
     def loadImageFromRaw(self,source):
         IMG=[]
@@ -2166,20 +2589,26 @@ class PDFImageXObject(PDFObject):
             _ = self.mask.rgb()
             self.mask = _[0],_[0],_[1],_[1],_[2],_[2]
 
-    def loadImageFromSRC(self, im):
-        "Extracts the stream, width and height"
+    def loadImageFromSRC(self, im, document=None):
+        """Extracts the stream, width and height. If document is given the image is compressed at
+        its image compression level, on its compression threads if it has them"""
+        if getattr(im,'_lazyJPEG',0):
+            self.loadImageFromJPEGFileName(im.fileName, im._jpegInfo)
+            return
         fp = im.jpeg_fh()
         if fp:
-            self.loadImageFromJPEG(fp)
+            self.loadImageFromJPEG(fp, getattr(im,'_jpegInfo',None))
         else:
             zlib = import_zlib()
             if not zlib: return
             self.width, self.height = im.getSize()
             raw = im.getRGBData()
             #assert len(raw) == self.width*self.height, "Wrong amount of data for image expected %sx%s=%s got %s" % (self.width,self.height,self.width*self.height,len(raw))
-            self.streamContent = zlib.compress(raw)
+            if document is None:
+                self.streamContent = _compressImageData(raw, rl_config.imageCompressionLevel)
+            else:
+                self._streamContentJob = document.encodeLater(_compressImageData, raw, document.compressionLevel('image'))
             if rl_config.useA85:
-                self.streamContent = asciiBase85Encode(self.streamContent)
                 self._filters = 'ASCII85Decode','FlateDecode' #'A85','Fl'
             else:
                 self._filters = 'FlateDecode', #'Fl'
@@ -2188,7 +2617,18 @@ class PDFImageXObject(PDFObject):
             self._checkTransparency(im)
 
     def format(self, document):
-        S = PDFStream(content = self.streamContent)
+        job = self.__dict__.pop('_streamContentJob', None)
+        if job is not None:
+            self.streamContent = job.result()
+        content = self.streamContent
+        if content is None and getattr(self,'_streamFileName',None):
+            #a lazily loaded JPEG, it is only held while it is written
+            f = open_for_read(self._streamFileName,'b')
+            try:
+                content = f.read()
+            finally:
+                f.close()
+        S = PDFStream(content = content)
         dict = S.dictionary
         dict["Type"] = PDFName("XObject")
         dict["Subtype"] = PDFName("Image")
@@ -2201,7 +2641,7 @@ class PDFImageXObject(PDFObject):
         elif getattr(self,'_decode',None):
             dict["Decode"] = PDFArray(self._decode)
         dict["Filter"] = PDFArray(map(PDFName,self._filters))
-        dict["Length"] = len(self.streamContent)
+        dict["Length"] = len(content)
         if self.mask: dict["Mask"] = PDFArray(self.mask)
         if getattr(self,'smask',None): dict["SMask"] = self.smask
         return S.format(document)
@@ -34,6 +34,8 @@ standardEncodings = _fontdata.standardEncodings
 _typefaces = {}
 _encodings = {}
 _fonts = {}
+_stringWidths = {}              #(text, fontName, fontSize, encoding) -> width, see stringWidth
+_stringWidthsSize = 20000       #the memo is emptied when it grows past this
 
 
 class FontError(Exception):
@@ -600,6 +602,7 @@ def registerFont(font):
     #assert isinstance(font, Font), 'Not a Font: %s' % font
     fontName = font.fontName
     _fonts[fontName] = font
+    _stringWidths.clear()
     if font._multiByte:
         # CID fonts don't need to have typeface registered.
         #need to set mappings so it can go in a paragraph even if within
@@ -703,8 +706,17 @@ def getRegisteredFontNames():
 
 def stringWidth(text, fontName, fontSize, encoding='utf8'):
     """Compute width of string in points;
-    not accelerated as fast enough because of instanceStringWidthT1/TTF"""
-    return getFont(fontName).stringWidth(text, fontSize, encoding=encoding)
+    memoised, as wrapping measures the same words and labels over and over"""
+    key = (text, fontName, fontSize, encoding)
+    try:
+        return _stringWidths[key]
+    except KeyError:
+        pass
+    width = getFont(fontName).stringWidth(text, fontSize, encoding=encoding)
+    if len(_stringWidths) >= _stringWidthsSize:
+        _stringWidths.clear()
+    _stringWidths[key] = width
+    return width
 
 def dumpFontData():
     print('Registered Encodings:')
@@ -783,6 +795,7 @@ def _reset(
             _typefaces = _typefaces.copy(),
             _encodings = _encodings.copy(),
             _fonts = _fonts.copy(),
+            _stringWidths = {},
             )
         ):
     for k,v in initial_dicts.items():
@@ -51,12 +51,13 @@ Oh, and that 14 up there is font size.)
 Canvas and TextObject have special support for dynamic fonts.
 """
 
-from struct import pack, unpack, error as structError
+from struct import pack, unpack, unpack_from, pack_into, error as structError
 from reportlab.lib.utils import getBytesIO, isPy3, bytestr, isUnicode, char2int
 from reportlab.pdfbase import pdfmetrics, pdfdoc
 from reportlab import rl_config
 from reportlab.lib.rl_accel import hex32, add32, calcChecksum, instanceStringWidthTTF
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+import os, sys, threading, hashlib
 
 class TTFError(pdfdoc.PDFError):
     "TrueType font exception"
@@ -320,6 +321,24 @@ class TTFontParser:
         except structError as error:
             raise TTFError(error)
 
+    def read_ushorts(self, count):
+        "Reads count unsigned shorts in one go"
+        values = unpack_from('>%dH' % count, self._ttf_data, self._pos)
+        self._pos += 2*count
+        return values
+
+    def read_shorts(self, count):
+        "Reads count signed shorts in one go"
+        values = unpack_from('>%dh' % count, self._ttf_data, self._pos)
+        self._pos += 2*count
+        return values
+
+    def read_ulongs(self, count):
+        "Reads count unsigned longs in one go"
+        values = unpack_from('>%dL' % count, self._ttf_data, self._pos)
+        self._pos += 4*count
+        return values
+
     def get_ushort(self, pos):
         "Return an unsigned short at given position"
         return unpack('>H',self._ttf_data[pos:pos+2])[0]
@@ -339,12 +358,15 @@ class TTFontMaker:
     def __init__(self):
         "Initializes the generator."
         self.tables = {}
+        self.checksums = {}
 
-    def add(self, tag, data):
-        "Adds a table to the TTF file."
+    def add(self, tag, data, checksum=None):
+        "Adds a table to the TTF file, with its checksum if it is already known."
         if tag == 'head':
             data = splice(data, 8, b'\0\0\0\0')
         self.tables[tag] = data
+        if checksum is not None:
+            self.checksums[tag] = checksum
 
     def makeStream(self):
         "Finishes the generation and returns the TTF file as a string"
@@ -369,21 +391,27 @@ class TTFontMaker:
         offset = 12 + numTables * 16
         wStr = (lambda x:write(bytes(tag,'latin1'))) if isPy3 else write
         tables_items = list(sorted(tables.items()))
+        tablesChecksum = 0
         for tag, data in tables_items:
             if tag == 'head':
                 head_start = offset
-            checksum = calcChecksum(data)
+            checksum = self.checksums.get(tag)
+            if checksum is None:
+                checksum = calcChecksum(data)
+            tablesChecksum = add32(tablesChecksum, checksum)
             wStr(tag)
             write(pack(">LLL", checksum, offset, len(data)))
             paddedLength = (len(data)+3)&~3
             offset = offset + paddedLength
 
+        # the file's checksum is the header's plus the (padded) tables'
+        checksum = add32(calcChecksum(stm.getvalue()), tablesChecksum)
+
         # Table data
         for tag, data in tables_items:
             data += b"\0\0\0"
             write(data[:len(data)&~3])
 
-        checksum = calcChecksum(stm.getvalue())
         checksum = add32(0xB1B0AFBA, -checksum)
         stm.seek(head_start + 8)
         write(pack('>L', checksum))
@@ -662,12 +690,15 @@ class TTFontFile(TTFontParser):
             limit = encoffs + length
             segCount = int(self.read_ushort() / 2.0)
             self.skip(6)
-            endCount = [self.read_ushort() for _ in xrange(segCount)]
+            endCount = self.read_ushorts(segCount)
             self.skip(2)
-            startCount = [self.read_ushort() for _ in xrange(segCount)]
-            idDelta = [self.read_short() for _ in xrange(segCount)]
+            startCount = self.read_ushorts(segCount)
+            idDelta = self.read_shorts(segCount)
             idRangeOffset_start = self._pos
-            idRangeOffset = [self.read_ushort() for _ in xrange(segCount)]
+            # idRangeOffset and the glyph id array after it, as ushorts from idRangeOffset_start
+            rangeData = unpack_from('>%dH' % ((min(limit,len(self._ttf_data)) - idRangeOffset_start) >> 1),
+                                    self._ttf_data, idRangeOffset_start)
+            idRangeOffset = rangeData[:segCount]
 
             # Now it gets tricky.
             for n in xrange(segCount):
@@ -676,12 +707,12 @@ class TTFontFile(TTFontParser):
                         glyph = (unichar + idDelta[n]) & 0xFFFF
                     else:
                         offset = (unichar - startCount[n]) * 2 + idRangeOffset[n]
-                        offset = idRangeOffset_start + 2 * n + offset
-                        if offset >= limit:
+                        offset = 2 * n + offset
+                        if idRangeOffset_start + offset >= limit:
                             # workaround for broken fonts (like Thryomanes)
                             glyph = 0
                         else:
-                            glyph = self.get_ushort(offset)
+                            glyph = rangeData[offset >> 1]
                             if glyph != 0:
                                 glyph = (glyph + idDelta[n]) & 0xFFFF
                     charToGlyph[unichar] = glyph
@@ -770,45 +801,111 @@ class TTFontFile(TTFontParser):
         # hmtx - Horizontal metrics table
         # (needs data from hhea, maxp, and cmap tables)
         self.seek_table("hmtx")
-        aw = None
+        # advance width and left side bearing pairs.  lsb is actually signed
+        # short, but we don't need it anyway (except for subsetting)
+        metrics = self.read_ushorts(2*numberOfHMetrics)
+        self.hmetrics = list(zip(metrics[0::2], metrics[1::2]))
+        widths = [scale(aw) for aw in metrics[0::2]]
+        self.defaultWidth = widths[0]
+        # the rest of the table only lists left side bearings,
+        # they reuse the last (scaled) advance width
+        aw = widths[-1]
+        self.hmetrics.extend((aw, lsb) for lsb in self.read_ushorts(max(0, numGlyphs - numberOfHMetrics)))
         self.charWidths = {}
-        self.hmetrics = []
-        for glyph in xrange(numberOfHMetrics):
-            # advance width and left side bearing.  lsb is actually signed
-            # short, but we don't need it anyway (except for subsetting)
-            aw, lsb = self.read_ushort(), self.read_ushort()
-            self.hmetrics.append((aw, lsb))
-            aw = scale(aw)
-            if glyph == 0:
-                self.defaultWidth = aw
-            if glyph in glyphToChar:
-                for char in glyphToChar[glyph]:
-                    self.charWidths[char] = aw
-        for glyph in xrange(numberOfHMetrics, numGlyphs):
-            # the rest of the table only lists advance left side bearings.
-            # so we reuse aw set by the last iteration of the previous loop
-            lsb = self.read_ushort()
-            self.hmetrics.append((aw, lsb))
-            if glyph in glyphToChar:
-                for char in glyphToChar[glyph]:
-                    self.charWidths[char] = aw
+        for glyph, chars in glyphToChar.items():
+            if glyph < numberOfHMetrics:
+                aw = widths[glyph]
+            elif glyph < numGlyphs:
+                aw = widths[-1]
+            else:
+                continue
+            for char in chars:
+                self.charWidths[char] = aw
 
         # loca - Index to location
         self.seek_table('loca')
-        self.glyphPos = []
         if indexToLocFormat == 0:
-            for n in xrange(numGlyphs + 1):
-                self.glyphPos.append(self.read_ushort() << 1)
+            self.glyphPos = [pos << 1 for pos in self.read_ushorts(numGlyphs + 1)]
         elif indexToLocFormat == 1:
-            for n in xrange(numGlyphs + 1):
-                self.glyphPos.append(self.read_ulong())
+            self.glyphPos = list(self.read_ulongs(numGlyphs + 1))
         else:
             raise TTFError('Unknown location table format (%d)' % indexToLocFormat)
 
     # Subsetting
 
+    def getSubsetTables(self):
+        """Returns the tables makeSubset copies or patches, and the composite glyph
+        components and subsets made so far.  They are read once per font file and
+        shared by its TTFontFiles, see _ttfSubsetTables."""
+        try:
+            key = self._subsetTablesKey
+        except AttributeError:
+            key = self._subsetTablesKey = (self.filename, self.subfontNameX,
+                    tuple(sorted((r['tag'], r['checksum'], r['length']) for r in self.tables)))
+        tables = _ttfSubsetTables.get(key)
+        if tables is None:
+            tables = {}
+            # The following tables are simply copied from the original
+            # Apparently some of the tables are optional (cvt, fpgm, prep).
+            # The lack of the required ones (name, OS/2) would have already
+            # been caught before.
+            copied = [(tag, self.get_table(tag)) for tag in ('name', 'OS/2', 'cvt ', 'fpgm', 'prep')
+                                    if tag in self.table]
+            # post - PostScript
+            copied.append(('post', b"\x00\x03\x00\x00" + self.get_table('post')[4:16] + b"\x00" * 16))
+            tables['copied'] = [(tag, data, calcChecksum(data)) for tag, data in copied]
+            for tag in ('hhea', 'maxp', 'head'):
+                tables[tag] = self.get_table(tag)
+            tables['components'] = {}       # glyph index -> ((offset in glyph, component glyph index), ...)
+            tables['glyphs'] = {}           # glyph index -> glyph data, padded to 4 bytes
+            tables['subsets'] = OrderedDict()   # tuple(subset) -> subset font, see makeSubset
+            with _ttfFacesLock:
+                tables = _ttfSubsetTables.setdefault(key, tables)
+        return tables
+
+    def getGlyphComponents(self, glyph, components):
+        """Returns the (offset in glyph, glyph index) of each component of a composite glyph,
+        or () for a simple glyph.  components is the memo from getSubsetTables."""
+        try:
+            return components[glyph]
+        except KeyError:
+            pass
+        glyphPos = self.glyphPos[glyph]
+        glyphLen = self.glyphPos[glyph + 1] - glyphPos
+        result = []
+        if glyphLen > 2:
+            data = self._ttf_data
+            start = self.get_table_pos('glyf')[0] + glyphPos
+            if unpack_from('>h', data, start)[0] < 0:
+                # composite glyph
+                pos_in_glyph = 10
+                flags = GF_MORE_COMPONENTS
+                while flags & GF_MORE_COMPONENTS:
+                    flags, glyphIdx = unpack_from('>HH', data, start + pos_in_glyph)
+                    result.append((pos_in_glyph + 2, glyphIdx))
+                    pos_in_glyph = pos_in_glyph + 4
+                    if flags & GF_ARG_1_AND_2_ARE_WORDS:
+                        pos_in_glyph = pos_in_glyph + 4
+                    else:
+                        pos_in_glyph = pos_in_glyph + 2
+                    if flags & GF_WE_HAVE_A_SCALE:
+                        pos_in_glyph = pos_in_glyph + 2
+                    elif flags & GF_WE_HAVE_AN_X_AND_Y_SCALE:
+                        pos_in_glyph = pos_in_glyph + 4
+                    elif flags & GF_WE_HAVE_A_TWO_BY_TWO:
+                        pos_in_glyph = pos_in_glyph + 8
+        result = components[glyph] = tuple(result)
+        return result
+
     def makeSubset(self, subset):
         """Create a subset of a TrueType font"""
+        tables = self.getSubsetTables()
+        subsetKey = tuple(subset)
+        try:
+            return tables['subsets'][subsetKey]
+        except KeyError:
+            pass
+
         output = TTFontMaker()
 
         # Build a mapping of glyphs in the subset to glyph numbers in
@@ -819,71 +916,32 @@ class TTFontFile(TTFontParser):
         glyphMap = [0]                  # new glyph index -> old glyph index
         glyphSet = {0:0}                # old glyph index -> new glyph index
         codeToGlyph = {}                # unicode -> new glyph index
+        charToGlyph = self.charToGlyph
         for code in subset:
-            if code in self.charToGlyph:
-                originalGlyphIdx = self.charToGlyph[code]
-            else:
-                originalGlyphIdx = 0
+            originalGlyphIdx = charToGlyph.get(code, 0)
             if originalGlyphIdx not in glyphSet:
                 glyphSet[originalGlyphIdx] = len(glyphMap)
                 glyphMap.append(originalGlyphIdx)
             codeToGlyph[code] = glyphSet[originalGlyphIdx]
 
         # Also include glyphs that are parts of composite glyphs
-        start = self.get_table_pos('glyf')[0]
+        components = tables['components']
         n = 0
         while n < len(glyphMap):
-            originalGlyphIdx = glyphMap[n]
-            glyphPos = self.glyphPos[originalGlyphIdx]
-            glyphLen = self.glyphPos[originalGlyphIdx + 1] - glyphPos
+            for pos_in_glyph, glyphIdx in self.getGlyphComponents(glyphMap[n], components):
+                if glyphIdx not in glyphSet:
+                    glyphSet[glyphIdx] = len(glyphMap)
+                    glyphMap.append(glyphIdx)
             n += 1
-            if not glyphLen: continue
-            self.seek(start + glyphPos)
-            numberOfContours = self.read_short()
-            if numberOfContours < 0:
-                # composite glyph
-                self.skip(8)
-                flags = GF_MORE_COMPONENTS
-                while flags & GF_MORE_COMPONENTS:
-                    flags = self.read_ushort()
-                    glyphIdx = self.read_ushort()
-                    if glyphIdx not in glyphSet:
-                        glyphSet[glyphIdx] = len(glyphMap)
-                        glyphMap.append(glyphIdx)
-                    if flags & GF_ARG_1_AND_2_ARE_WORDS:
-                        self.skip(4)
-                    else:
-                        self.skip(2)
-                    if flags & GF_WE_HAVE_A_SCALE:
-                        self.skip(2)
-                    elif flags & GF_WE_HAVE_AN_X_AND_Y_SCALE:
-                        self.skip(4)
-                    elif flags & GF_WE_HAVE_A_TWO_BY_TWO:
-                        self.skip(8)
 
-
-        # The following tables are simply copied from the original
-        for tag in ('name', 'OS/2', 'cvt ', 'fpgm', 'prep'):
-            try:
-                output.add(tag, self.get_table(tag))
-            except KeyError:
-                # Apparently some of the tables are optional (cvt, fpgm, prep).
-                # The lack of the required ones (name, OS/2) would have already
-                # been caught before.
-                pass
-
-        # post - PostScript
-        post = b"\x00\x03\x00\x00" + self.get_table('post')[4:16] + b"\x00" * 16
-        output.add('post', post)
+        for tag, data, checksum in tables['copied']:
+            output.add(tag, data, checksum)
 
         numGlyphs = len(glyphMap)
 
         # hmtx - Horizontal Metrics
-        hmtx = []
-        for n in xrange(numGlyphs):
-            aw, lsb = self.hmetrics[glyphMap[n]]
-            hmtx.append(int(aw))
-            hmtx.append(int(lsb))
+        hmetrics = self.hmetrics
+        hmtx = [int(v) for glyph in glyphMap for v in hmetrics[glyph]]
 
         #work out n as 0 or first aw that's the start of a run
         n = len(hmtx)-2
@@ -897,12 +955,12 @@ class TTFontFile(TTFontParser):
         output.add('hmtx', hmtx)
 
         # hhea - Horizontal Header
-        hhea = self.get_table('hhea')
+        hhea = tables['hhea']
         hhea = _set_ushort(hhea, 34, numberOfHMetrics)
         output.add('hhea', hhea)
 
         # maxp - Maximum Profile
-        maxp = self.get_table('maxp')
+        maxp = tables['maxp']
         maxp = _set_ushort(maxp, 4, numGlyphs)
         output.add('maxp', maxp)
 
@@ -919,66 +977,50 @@ class TTFontFile(TTFontParser):
         cmap = pack(*([">%dH" % len(cmap)] + cmap))
         output.add('cmap', cmap)
 
-        # glyf - Glyph data
-        glyphData = self.get_table('glyf')
+        # glyf - Glyph data, sliced from the font data rather than a copy of the whole table
+        glyfStart = self.get_table_pos('glyf')[0]
+        glyphs = tables['glyphs']
         offsets = []
         glyf = []
         pos = 0
-        for n in xrange(numGlyphs):
+        for originalGlyphIdx in glyphMap:
             offsets.append(pos)
-            originalGlyphIdx = glyphMap[n]
-            glyphPos = self.glyphPos[originalGlyphIdx]
-            glyphLen = self.glyphPos[originalGlyphIdx + 1] - glyphPos
-            data = glyphData[glyphPos:glyphPos+glyphLen]
+            try:
+                data = glyphs[originalGlyphIdx]
+            except KeyError:
+                glyphPos = glyfStart + self.glyphPos[originalGlyphIdx]
+                glyphLen = self.glyphPos[originalGlyphIdx + 1] - self.glyphPos[originalGlyphIdx]
+                data = glyphs[originalGlyphIdx] = self._ttf_data[glyphPos:glyphPos+glyphLen] + b'\0' * (-glyphLen % 4)
             # Fix references in composite glyphs
-            if glyphLen > 2 and unpack(">h", data[:2])[0] < 0:
-                # composite glyph
-                pos_in_glyph = 10
-                flags = GF_MORE_COMPONENTS
-                while flags & GF_MORE_COMPONENTS:
-                    flags = unpack(">H", data[pos_in_glyph:pos_in_glyph+2])[0]
-                    glyphIdx = unpack(">H", data[pos_in_glyph+2:pos_in_glyph+4])[0]
-                    data = _set_ushort(data, pos_in_glyph + 2, glyphSet[glyphIdx])
-                    pos_in_glyph = pos_in_glyph + 4
-                    if flags & GF_ARG_1_AND_2_ARE_WORDS:
-                        pos_in_glyph = pos_in_glyph + 4
-                    else:
-                        pos_in_glyph = pos_in_glyph + 2
-                    if flags & GF_WE_HAVE_A_SCALE:
-                        pos_in_glyph = pos_in_glyph + 2
-                    elif flags & GF_WE_HAVE_AN_X_AND_Y_SCALE:
-                        pos_in_glyph = pos_in_glyph + 4
-                    elif flags & GF_WE_HAVE_A_TWO_BY_TWO:
-                        pos_in_glyph = pos_in_glyph + 8
+            glyphComponents = components[originalGlyphIdx]
+            if glyphComponents:
+                data = bytearray(data)
+                for pos_in_glyph, glyphIdx in glyphComponents:
+                    pack_into('>H', data, pos_in_glyph, glyphSet[glyphIdx])
+                data = bytes(data)
             glyf.append(data)
-            pos = pos + glyphLen
-            if pos % 4 != 0:
-                padding = 4 - pos % 4
-                glyf.append(b'\0' * padding)
-                pos = pos + padding
+            pos = pos + len(data)
         offsets.append(pos)
         output.add('glyf', b''.join(glyf))
 
         # loca - Index to location
-        loca = []
         if (pos + 1) >> 1 > 0xFFFF:
             indexToLocFormat = 1        # long format
-            for offset in offsets:
-                loca.append(offset)
-            loca = pack(*([">%dL" % len(loca)] + loca))
+            loca = pack(">%dL" % len(offsets), *offsets)
         else:
             indexToLocFormat = 0        # short format
-            for offset in offsets:
-                loca.append(offset >> 1)
-            loca = pack(*([">%dH" % len(loca)] + loca))
+            loca = pack(">%dH" % len(offsets), *[offset >> 1 for offset in offsets])
         output.add('loca', loca)
 
         # head - Font header
-        head = self.get_table('head')
+        head = tables['head']
         head = _set_ushort(head, 50, indexToLocFormat)
         output.add('head', head)
 
-        return output.makeStream()
+        font = tables['subsets'][subsetKey] = output.makeStream()
+        while len(tables['subsets']) > _ttfSubsetCacheSize:
+            tables['subsets'].popitem(last=False)
+        return font
 
 
 #
@@ -1006,6 +1048,7 @@ class TTFontFace(TTFontFile, pdfmetrics.TypeFace):
         "Loads a TrueType font from filename."
         pdfmetrics.TypeFace.__init__(self, None)
         TTFontFile.__init__(self, filename, validate=validate, subfontIndex=subfontIndex)
+        self.asciiWidths = [self.getCharWidth(code) for code in xrange(128)]
 
     def getCharWidth(self, code):
         "Returns the width of character U+<code>"
@@ -1020,6 +1063,7 @@ class TTFontFace(TTFontFile, pdfmetrics.TypeFace):
         fontFile.dictionary['Length1'] = len(fontFile.content)
         if doc.compression:
             fontFile.filters = [pdfdoc.PDFZCompress]
+        fontFile.compressionClass = 'font'
         fontFileRef = doc.Reference(fontFile, 'fontFile:%s(%s)' % (self.filename, fontname))
 
         flags = self.flags & ~ FF_NONSYMBOLIC
@@ -1039,6 +1083,110 @@ class TTFontFace(TTFontFile, pdfmetrics.TypeFace):
             })
         return doc.Reference(fontDescriptor, 'fontDescriptor:' + fontname)
 
+_ttfFaces = {}
+_ttfFacesLock = threading.Lock()
+_ttfSubsetTables = {}           #(filename, subfont, table checksums) -> tables, see TTFontFile.getSubsetTables
+_ttfSubsetCacheSize = 64        #subsets kept per font file, as every document asks for the same ones again
+_ttfMetricsCacheVersion = 1     #bump when the pickled TTFontFace attributes change
+
+def _ttfMetricsCacheDir():
+    """Returns the directory pickled metrics are kept in, or None if it can't be used safely.
+
+    The default is per user, never the shared ReportLab temp dir, and a directory
+    owned by someone else is not trusted."""
+    cacheDir = rl_config.ttfMetricsCacheDir or os.path.join(os.path.expanduser('~'), '.cache', 'reportlab', 'ttf_metrics')
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir, 0o700)
+        if hasattr(os, 'getuid') and os.stat(cacheDir).st_uid != os.getuid():
+            return None
+    except OSError:
+        return None
+    return cacheDir
+
+def _ttfMetricsCachePath(key):
+    "Returns the path of the pickled metrics for a face cache key, or None if metrics caching is off"
+    if not rl_config.ttfMetricsCaching:
+        return None
+    cacheDir = _ttfMetricsCacheDir()
+    if not cacheDir:
+        return None
+    # pickles are not portable between interpreters or versions of TTFontFace
+    key = key + (tuple(sys.version_info[:2]), _ttfMetricsCacheVersion)
+    return os.path.join(cacheDir, hashlib.md5(repr(key).encode('utf8')).hexdigest() + '.pickle')
+
+def _validTTFontMetrics(metrics):
+    "Returns True if unpickled metrics look like those of a TTFontFace made by this interpreter"
+    return (isinstance(metrics, dict)
+            and isinstance(metrics.get('name'), bytes)
+            and isinstance(metrics.get('charWidths'), dict)
+            and isinstance(metrics.get('charToGlyph'), dict)
+            and isinstance(metrics.get('bbox'), (list, tuple)))
+
+def _loadTTFontFace(key, filename):
+    "Returns a TTFontFace from its pickled metrics, or None if they aren't cached"
+    from reportlab.lib.utils import pickle_load
+    path = _ttfMetricsCachePath(key)
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            metrics = pickle_load(f)
+        if not _validTTFontMetrics(metrics):
+            return None
+        face = TTFontFace.__new__(TTFontFace)
+        face.__dict__.update(metrics)
+        with open(filename, 'rb') as f:
+            face._ttf_data = f.read()
+        face._pos = 0
+        return face
+    except Exception:
+        return None
+
+def _saveTTFontFace(key, face):
+    "Pickles a TTFontFace's metrics, without the font data which is read from the file again"
+    from reportlab.lib.utils import pickle_dump
+    path = _ttfMetricsCachePath(key)
+    if not path:
+        return
+    metrics = dict((k, v) for k, v in face.__dict__.items() if k not in ('_ttf_data', '_pos'))
+    tempPath = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(tempPath, 'wb') as f:
+            pickle_dump(metrics, f, 2)
+        getattr(os, 'replace', os.rename)(tempPath, path)
+    except Exception:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+
+def getTTFontFace(filename, validate=0, subfontIndex=0):
+    """Returns the parsed TTFontFace for a font file, shared by the whole process.
+
+    Faces are kept by path, modification time and size, so a file is only parsed
+    once. Their metrics are also pickled to rl_config.ttfMetricsCacheDir, so later
+    processes only need to read the font data for subsetting. A cached pickle which
+    can't be read, or doesn't hold what this interpreter expects, is parsed again."""
+    if hasattr(filename, 'read'):
+        return TTFontFace(filename, validate=validate, subfontIndex=subfontIndex)
+    filename, f = TTFOpenFile(filename)
+    f.close()
+    filename = os.path.abspath(filename)
+    st = os.stat(filename)
+    key = (filename, st.st_mtime, st.st_size, validate, subfontIndex)
+    with _ttfFacesLock:
+        face = _ttfFaces.get(key)
+        if face is None:
+            face = _loadTTFontFace(key, filename)
+            if face is None:
+                face = TTFontFace(filename, validate=validate, subfontIndex=subfontIndex)
+                _saveTTFontFace(key, face)
+            _ttfFaces[key] = face
+    return face
+
 class TTEncoding:
     """Encoding for TrueType fonts (always UTF-8).
 
@@ -1099,7 +1247,7 @@ class TTFont:
         can save time, especially if the font is large.
         """
         self.fontName = name
-        self.face = TTFontFace(filename, validate=validate, subfontIndex=subfontIndex)
+        self.face = getTTFontFace(filename, validate=validate, subfontIndex=subfontIndex)
         self.encoding = TTEncoding()
         from weakref import WeakKeyDictionary
         self.state = WeakKeyDictionary()
@@ -1108,6 +1256,14 @@ class TTFont:
         self._asciiReadable = asciiReadable
 
     def stringWidth(self,text,size,encoding='utf8'):
+        "Calculate text width; ASCII text is summed from the face's table of ASCII widths in one pass"
+        if isUnicode(text):
+            try:
+                codes = bytearray(text.encode('ascii'))
+            except UnicodeEncodeError:
+                pass
+            else:
+                return 0.001*size*sum(map(self.face.asciiWidths.__getitem__, codes))
         return instanceStringWidthTTF(self,text,size,encoding)
 
     def _assignState(self,doc,asciiReadable=None,namePrefix=None):
@@ -1210,6 +1366,7 @@ class TTFont:
             cmapStream.content = makeToUnicodeCMap(baseFontName, subset)
             if doc.compression:
                 cmapStream.filters = [pdfdoc.PDFZCompress]
+            cmapStream.compressionClass = 'font'
             pdfFont.ToUnicode = doc.Reference(cmapStream, 'toUnicodeCMap:' + baseFontName)
 
             pdfFont.FontDescriptor = self.face.addSubsetObjects(doc, baseFontName, subset)
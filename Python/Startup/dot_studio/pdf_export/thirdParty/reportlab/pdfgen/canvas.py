@@ -237,6 +237,10 @@ class Canvas(textobject._PDFColorSetter):
                  cropMarks=None,
                  pdfVersion=None,
                  enforceColorSpace=None,
+                 streaming=0,
+                 compressionThreads=None,
+                 compressionLevels=None,
+                 linearize=0,
                  ):
         """Create a canvas of a given size. etc.
 
@@ -252,6 +256,16 @@ class Canvas(textobject._PDFColorSetter):
         if enforceColorSpace is in ('cmyk', 'rgb', 'sep','sep_black','sep_cmyk') then one of
         the standard _PDFColorSetter callables will be used to enforce appropriate color settings.
         If it is a callable then that will be used.
+
+        If streaming is true each page, and the images it uses, is written to the file as soon as
+        the page is finished, so memory use does not grow with the number of pages.
+
+        compressionThreads is the number of threads compressing the document's streams while it is
+        written (rl_config.compressionThreads if None), and compressionLevels may map 'content',
+        'image' and 'font' to the zlib level for that class of stream.
+
+        If linearize is true the PDF is written linearized ("fast web view"), so a viewer can show the
+        first page before the whole file has downloaded. It has no effect with streaming or encryption.
         """
         if pagesize is None: pagesize = rl_config.defaultPageSize
         if invariant is None: invariant = rl_config.invariant
@@ -260,6 +274,10 @@ class Canvas(textobject._PDFColorSetter):
         self._doc = pdfdoc.PDFDocument(compression=pageCompression,
                                        invariant=invariant, filename=filename,
                                        pdfVersion=pdfVersion or pdfdoc.PDF_VERSION_DEFAULT,
+                                       streaming=streaming,
+                                       compressionThreads=compressionThreads,
+                                       compressionLevels=compressionLevels,
+                                       linearize=linearize,
                                        )
 
         self._enforceColorSpace = _chooseEnforceColorSpace(enforceColorSpace)
@@ -898,30 +916,16 @@ class Canvas(textobject._PDFColorSetter):
 
         # first, generate a unique name/signature for the image.  If ANYTHING
         # is different, even the mask, this should be different.
-        if isinstance(image,ImageReader):
-            rawdata = image.getRGBData()
-            smask = image._dataA
-            if mask=='auto' and smask:
-                mdata = smask.getRGBData()
-            else:
-                mdata = str(mask)
-            if isUnicode(mdata):
-                mdata = mdata.encode('utf8')
-            name = _digester(rawdata+mdata)
-        else:
-            #filename, use it
-            s = '%s%s' % (image, mask)
-            if isUnicode(s):
-                s = s.encode('utf-8')
-            name = _digester(s)
+        name = self._imageName(image, mask)
 
         # in the pdf document, this will be prefixed with something to
         # say it is an XObject.  Does it exist yet?
         regName = self._doc.getXObjectName(name)
         imgObj = self._doc.idToObject.get(regName, None)
+        self._doc.imageStats['reused' if imgObj else 'embedded'] += 1
         if not imgObj:
             #first time seen, create and register the PDFImageXobject
-            imgObj = pdfdoc.PDFImageXObject(name, image, mask=mask)
+            imgObj = pdfdoc.PDFImageXObject(name, image, mask=mask, document=self._doc)
             imgObj.name = name
             self._setXObjects(imgObj)
             self._doc.Reference(imgObj, regName)
@@ -952,6 +956,54 @@ class Canvas(textobject._PDFColorSetter):
 
         return (imgObj.width, imgObj.height)
 
+    def _imageName(self, image, mask=None):
+        """Returns the name for an image XObject, made from a digest of the image's content and mask.
+        Identical images are embedded once per document, whether they came from the same
+        ImageReader, different ImageReaders or different files."""
+        if isinstance(image,ImageReader):
+            content = getattr(image,'_contentDigest',None)
+            smask = None
+            if getattr(image,'_lazyJPEG',0):
+                # only read when the PDF is written, so identified by the file's name and signature
+                if content is None:
+                    st = os.stat(image.fileName)
+                    content = _digester('%s:%s:%s' % (image.fileName, st.st_mtime, st.st_size))
+            elif image.jpeg_fh():
+                # JPEGs are embedded as they are, so the encoded data identifies them without decoding
+                if content is None:
+                    content = _digester(image.jpegData())
+            else:
+                rawdata = image.getRGBData()
+                smask = image._dataA
+                if content is None:
+                    content = _digester(rawdata)
+            image._contentDigest = content
+            if mask=='auto' and smask:
+                mdata = smask.getRGBData()
+            else:
+                mdata = str(mask)
+        else:
+            #filename, use its content if we can read it
+            content = self._imageFileDigest(image)
+            mdata = str(mask)
+        if isUnicode(mdata):
+            mdata = mdata.encode('utf8')
+        return _digester(content.encode('utf8')+mdata)
+
+    def _imageFileDigest(self, fileName):
+        "Returns a digest of an image file's content, cached while the file is unchanged"
+        try:
+            st = os.stat(fileName)
+        except (OSError, TypeError, ValueError):
+            # not a local file, fall back to its name
+            return _digester('%s' % (fileName,))
+        key = (fileName, st.st_mtime, st.st_size)
+        digests = self._doc.imageFileDigests
+        if key not in digests:
+            with open(fileName, 'rb') as f:
+                digests[key] = _digester(f.read())
+        return digests[key]
+
     def _restartAccumulators(self):
         if self._codeStack:
             # restore the saved code
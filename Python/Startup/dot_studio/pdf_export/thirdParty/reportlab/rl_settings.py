@@ -13,6 +13,7 @@ defaultEncoding
 defaultGraphicsFontName
 pageCompression
 useA85
+jpegPassthrough
 defaultPageSize
 defaultImageCaching
 ZLIB_WARNINGS
@@ -36,10 +37,17 @@ platypus_link_underline
 canvas_basefontname
 allowShortTableRows
 imageReaderFlags
+imageReaderCacheSize
 paraFontSizeHeightOffset
 canvas_baseColor
 ignoreContainerActions
 ttfAsciiReadable
+ttfMetricsCaching
+ttfMetricsCacheDir
+compressionThreads
+contentCompressionLevel
+imageCompressionLevel
+fontCompressionLevel
 pdfMultiLine
 pdfComments
 debug
@@ -57,6 +65,7 @@ defaultEncoding =           'WinAnsiEncoding'       # 'WinAnsi' or 'MacRoman'
 defaultGraphicsFontName=    'Times-Roman'           #initializer for STATE_DEFAULTS in shapes.py
 pageCompression =           1                       # default page compression mode
 useA85 =                    1                       #set to 0 to disable Ascii Base 85 stream filters
+jpegPassthrough=            1                       #embed JPEGs as their original bytes, never ASCII85 encoded, and read them without the imaging library
 defaultPageSize =           'A4'                    #default page size
 defaultImageCaching =       0                       #set to zero to remove those annoying cached images
 ZLIB_WARNINGS =             1
@@ -88,11 +97,20 @@ imageReaderFlags=0                                  #attempt to convert images i
                                                     #the number of open files (see lib.utils.ImageReader)
                                                     #if imageReaderFlags&2 then attempt autoclosing of those files
                                                     #if imageReaderFlags&4 then cache data 
+                                                    #if imageReaderFlags&8 then only the name and size of JPEG files are kept,
+                                                    #   they are read when the PDF is written
                                                     #if imageReaderFlags==-1 then use Ralf Schmitt's re-opening approach
+imageReaderCacheSize=       67108864                #bytes of image data cached by imageReaderFlags&4, least recently used is dropped first
 paraFontSizeHeightOffset=   1                       #if true paragraphs start at height-fontSize
 canvas_baseColor=           None                    #initialize the canvas fill and stroke colors if this is set
 ignoreContainerActions=     1                       #if true then action flowables in flowable _Containers will be ignored
 ttfAsciiReadable=           1                       #smaller subsets when set to 0
+ttfMetricsCaching=          1                       #pickle parsed TrueType metrics to ttfMetricsCacheDir, set to 0 to disable
+ttfMetricsCacheDir=         None                    #where to keep pickled TrueType metrics, None for ~/.cache/reportlab/ttf_metrics
+compressionThreads=         0                       #threads compressing a document's streams while it is written, 0 compresses them one at a time
+contentCompressionLevel=    -1                      #zlib level (0-9) for page and form content streams, -1 for zlib's default
+imageCompressionLevel=      -1                      #zlib level (0-9) for images which aren't already JPEGs, -1 for zlib's default
+fontCompressionLevel=       -1                      #zlib level (0-9) for embedded font subsets and their ToUnicode maps, -1 for zlib's default
 pdfMultiLine=               0                       #use more lines in pdf etc
 pdfComments=                0                       #put in pdf comments
 debug=                      0                       #for debugging code
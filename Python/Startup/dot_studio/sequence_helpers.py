@@ -0,0 +1,156 @@
+# Sequence Helpers - shared methods for working out what is visible in a Sequence
+# Install in ~/.nuke/Python/Startup
+#
+# visibleShotAtTime(sequence, t) answers 'which shot is visible at frame t' from a per-Sequence index of
+# visible segments, so it can be called at playback rate. The index is rebuilt the next time it is needed
+# after the Sequence is edited.
+# Indexes are kept for the kMaxVisibleShotIndexes most recently used Sequences, and dropped when a Project closes.
+import bisect
+import collections
+import heapq
+import hiero.core
+
+def visibleShotOccurancesFromSpans(spans, T0, T1, includedTrackItems = None):
+  """
+  Returns the top-most visible shot occurances for a list of TrackItem spans, visiting edit points only.
+  @param spans: a list of (trackIndex, timelineIn, timelineOut, shot) tuples for the enabled TrackItems
+  @param T0: first frame to consider
+  @param T1: frame to stop at (exclusive, matching the frame-by-frame scan)
+  @param includedTrackItems: (optional) - only record occurances of these shots
+
+  @return: A dictionary of visible shot occurances, {shot: [[tIn, tOut], ...]}
+  """
+
+  if T1 <= T0:
+    return {}
+
+  # Each span starts at its timelineIn and stops being visible at timelineOut+1.
+  # Between two consecutive edit points the set of shots under the playhead cannot change,
+  # so the visible shot only needs to be worked out once per edit, not once per frame.
+  starts = sorted(spans, key=lambda span: span[1])
+  edits = set([T0, T1])
+  for trackIndex, tIn, tOut, shot in spans:
+    if T0 < tIn < T1:
+      edits.add(tIn)
+    if T0 < tOut+1 < T1:
+      edits.add(tOut+1)
+  edits = sorted(edits)
+
+  shotOccuranceDictionary = {}
+
+  # Heap of shots under the playhead, with the top-most Track first. Shots are only removed
+  # when they reach the top of the heap after their out point has passed.
+  active = []
+  nextStart = 0
+  for i in range(len(edits)-1):
+    t = edits[i]
+    while nextStart < len(starts) and starts[nextStart][1] <= t:
+      trackIndex, tIn, tOut, shot = starts[nextStart]
+      heapq.heappush(active, (-trackIndex, nextStart, tOut, shot))
+      nextStart += 1
+
+    while active and active[0][2] < t:
+      heapq.heappop(active)
+
+    if not active:
+      continue
+
+    visibleShot = active[0][3]
+
+    if includedTrackItems and visibleShot not in includedTrackItems:
+      continue
+
+    tOut = edits[i+1]-1
+    occurances = shotOccuranceDictionary.setdefault(visibleShot, [])
+    if occurances and occurances[-1][1] == t-1:
+      # Still in a concurrent shot, extend its out point
+      occurances[-1][1] = tOut
+    else:
+      occurances.append([t, tOut])
+
+  return shotOccuranceDictionary
+
+class VisibleShotIndex(object):
+  def __init__(self, sequence):
+    """Sorted, non-overlapping segments of the top-most enabled, media-present shot in a Sequence"""
+    self.signature = sequenceSignature(sequence)
+
+    spans = []
+    for track in sequence.videoTracks():
+      if not track.isEnabled():
+        continue
+      trackIndex = track.trackIndex()
+      for shot in track.items():
+        if shot.isEnabled() and shot.isMediaPresent():
+          spans.append((trackIndex, shot.timelineIn(), shot.timelineOut(), shot))
+
+    segments = []
+    if spans:
+      T0 = min([span[1] for span in spans])
+      T1 = max([span[2] for span in spans])+1
+      for shot, occurances in visibleShotOccurancesFromSpans(spans, T0, T1).items():
+        for tIn, tOut in occurances:
+          segments.append((tIn, tOut, shot))
+    segments.sort(key=lambda segment: segment[0])
+
+    self._segments = segments
+    self._segmentStarts = [segment[0] for segment in segments]
+
+  def shotAt(self, t):
+    """Returns the visible TrackItem at frame t, or None"""
+    i = bisect.bisect_right(self._segmentStarts, t)-1
+    if i < 0:
+      return None
+    tIn, tOut, shot = self._segments[i]
+    if t > tOut:
+      return None
+    return shot
+
+def sequenceSignature(sequence):
+  """Cheap summary of a Sequence used to spot changes (e.g. Track visibility) which may not send an edit event"""
+  return (sequence.duration(), tuple([track.isEnabled() for track in sequence.videoTracks()]))
+
+# Maximum number of Sequences to keep a visible shot index for, the least recently used are dropped first
+kMaxVisibleShotIndexes = 8
+
+# Visible shot indexes, keyed by Sequence, least recently used first.
+# Entries are dropped when their Sequence is edited, and all of them when a Project is closed.
+_visibleShotIndexes = collections.OrderedDict()
+
+def visibleShotIndex(sequence):
+  """visibleShotIndex(sequence) -> Returns the (cached) VisibleShotIndex for a Sequence, rebuilding it if out of date"""
+  index = _visibleShotIndexes.pop(sequence, None)
+  if index is None or index.signature != sequenceSignature(sequence):
+    index = VisibleShotIndex(sequence)
+  _visibleShotIndexes[sequence] = index
+  while len(_visibleShotIndexes) > kMaxVisibleShotIndexes:
+    _visibleShotIndexes.popitem(last = False)
+  return index
+
+def invalidateVisibleShotIndex(sequence = None):
+  """Drops the cached VisibleShotIndex for a Sequence, or for all Sequences if sequence is None"""
+  if sequence is None:
+    _visibleShotIndexes.clear()
+  else:
+    _visibleShotIndexes.pop(sequence, None)
+
+def visibleShotAtTime(sequence, t):
+  """visibleShotAtTime(sequence, t) -> Returns the visible TrackItem in a Sequence (sequence) at a specified frame (t).
+  Shots which are disabled, on disabled Tracks or have missing media are seen through to the Tracks below.
+  @param: sequence - a core.Sequence
+  @param: t - an integer (frame no.) at which to return the current TrackItem
+  returns: hiero.core.TrackItem, or None if nothing is visible"""
+  return visibleShotIndex(sequence).shotAt(t)
+
+def _sequenceEditedHandler(event):
+  sequence = getattr(event, 'sender', None)
+  if isinstance(sequence, hiero.core.Sequence):
+    invalidateVisibleShotIndex(sequence)
+  else:
+    invalidateVisibleShotIndex()
+
+def _projectClosingHandler(event):
+  invalidateVisibleShotIndex()
+
+hiero.core.events.registerInterest("kSequenceEdited", _sequenceEditedHandler)
+hiero.core.events.registerInterest("kBeforeProjectClose", _projectClosingHandler)
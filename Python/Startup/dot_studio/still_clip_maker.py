@@ -6,19 +6,11 @@ import hiero.ui
 import os.path
 from PySide2 import QtWidgets
 import tempfile
+from sequence_helpers import visibleShotAtTime
 
 def mapRetime(ti, timelineTime):
   return ti.sourceIn() + int((timelineTime - ti.timelineIn()) * ti.playbackSpeed())
 
-# Method to return the visible TrackItem in the Current Viewer for a Sequence, seq, used for Tagging Shots in the Viewer
-def visibleShotAtTime(seq,time):
-  shot = seq.trackItemAt(time)
-  if shot == None:
-    return shot
-    
-  elif shot.isMediaPresent() and shot.isEnabled():
-    return shot
-
 def getFrameInfoFromTrackItemAtTime(trackItem,T):
   
   # File Source
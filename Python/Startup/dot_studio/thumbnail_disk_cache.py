@@ -0,0 +1,250 @@
+# Thumbnail Disk Cache - a persistent thumbnail cache shared by the PDF, GIF and Thumbnail exporters
+# Install in ~/.nuke/Python/Startup
+#
+# Exporters ask cachedThumbnail(item, frame) instead of item.thumbnail(frame). Thumbnails are kept on disk, keyed
+# by the source path and modification time of the file holding the frame, the source frame and the colour transform,
+# so exporting the same shots again, or to another format, does not decode the frames from the source media again.
+# Sequence frames are keyed on every enabled shot composited into them, and frames with soft effects or
+# transitions are not cached.
+#
+# The cache directory can be set with the DOT_STUDIO_THUMBNAIL_CACHE environment variable. It is trimmed back to
+# kMaxCacheBytes by removing the least recently used thumbnails.
+import hashlib
+import os
+import re
+import threading
+import hiero.core
+from PySide2 import QtGui
+
+# Default location of the cache
+kCacheDirectory = os.environ.get("DOT_STUDIO_THUMBNAIL_CACHE",
+                                 os.path.join(os.path.expanduser("~"), ".nuke", "dot_studio", "thumbnail_cache"))
+
+# Maximum size of the cache directory, in bytes
+kMaxCacheBytes = 1024*1024*1024
+
+# File format thumbnails are cached in. PNG is lossless, so cached thumbnails match freshly decoded ones.
+kCacheFormat = "png"
+
+# Frame number in an image sequence's file name, e.g. %04d, #### or @@@@
+kFrameNumberPattern = re.compile(r"%0?(\d*)d|#+|@+")
+
+def mapRetime(trackItem, timelineTime):
+  """Maps a timeline time to the TrackItem's source frame, handling any retimes"""
+  return trackItem.sourceIn() + int((timelineTime - trackItem.timelineIn()) * trackItem.playbackSpeed())
+
+def mediaFramePath(mediaSource, frame):
+  """Returns the path of the file holding a MediaSource's frame, counted from the start of the media.
+  Movies hold every frame in their one file. Returns None for an image sequence if frame is None."""
+  if mediaSource.singleFile():
+    return mediaSource.firstpath()
+  if frame is None:
+    return None
+
+  def frameNumber(match):
+    width = int(match.group(1) or 0) if match.group(0).startswith("%") else len(match.group(0))
+    return "%0*i" % (width, mediaSource.startTime() + frame)
+  return kFrameNumberPattern.sub(frameNumber, mediaSource.fileinfos()[0].filename(), 1)
+
+def mediaSignature(clip, frame = None):
+  """Returns (path, modification time, size, colour transform) for the file holding a Clip's frame, or None if it isn't on disk
+  @param frame: (optional) - the source frame, counted from the start of the media. Needed for image sequences."""
+  try:
+    path = mediaFramePath(clip.mediaSource(), frame)
+    st = os.stat(path) if path else None
+  except Exception:
+    return None
+  if st is None:
+    return None
+
+  try:
+    colourTransform = clip.sourceMediaColourTransform()
+  except Exception:
+    colourTransform = None
+  return path, st.st_mtime, st.st_size, colourTransform
+
+def trackBlendState(track):
+  """Returns (blend enabled, blend mode) for a VideoTrack, or None in Hiero versions without track blending"""
+  try:
+    return track.isBlendEnabled(), track.blendMode()
+  except AttributeError:
+    return None
+
+def sequenceLayersAtTime(sequence, t):
+  """Returns a tuple of what is composited into a Sequence's frame t, one (track index, blend state, media signature,
+  source frame) entry per enabled shot, bottom track first. Returns None if nothing is there, or if the frame also
+  shows something this can't describe - soft effects, annotations, transitions or shots without media on disk."""
+  layers = []
+  for track in sequence.videoTracks():
+    if not track.isEnabled():
+      continue
+    for subTrack in track.subTrackItems():
+      for subTrackItem in subTrack:
+        if subTrackItem.isEnabled() and subTrackItem.timelineIn() <= t <= subTrackItem.timelineOut():
+          return None
+    for transition in track.transitions():
+      if transition.timelineIn() <= t <= transition.timelineOut():
+        return None
+    for trackItem in track.items():
+      if not trackItem.isEnabled() or not trackItem.timelineIn() <= t <= trackItem.timelineOut():
+        continue
+      sourceFrame = mapRetime(trackItem, t)
+      signature = mediaSignature(trackItem.source(), sourceFrame)
+      if signature is None:
+        return None
+      layers.append((track.trackIndex(), trackBlendState(track), signature, sourceFrame))
+  return tuple(layers) or None
+
+def thumbnailCacheKey(item, frame = None):
+  """Returns the cache key for item.thumbnail(frame), or None if the thumbnail can't be cached.
+  @param item: a hiero.core.Clip, Sequence or TrackItem
+  @param frame: (optional) - the frame passed to item.thumbnail(), or None for the item's default"""
+  if isinstance(item, hiero.core.Sequence):
+    if frame is None:
+      return None
+    # Sequence frames are every enabled shot at that time composited together, in the Sequence's format
+    signature = sequenceLayersAtTime(item, frame)
+    format = item.format()
+    context = ("Sequence", format.width(), format.height(), format.pixelAspect())
+  elif isinstance(item, hiero.core.TrackItem):
+    signature = mediaSignature(item.source(), frame)
+    context = ("TrackItem", frame)
+  elif isinstance(item, hiero.core.Clip):
+    signature = mediaSignature(item, frame)
+    context = ("Clip", frame)
+  else:
+    return None
+
+  if signature is None:
+    return None
+  return hashlib.sha1(repr(signature + context).encode("utf-8")).hexdigest()
+
+class ThumbnailDiskCache(object):
+  def __init__(self, directory = kCacheDirectory, maxBytes = kMaxCacheBytes):
+    """A thread-safe cache of thumbnail images in a directory, bounded by the total size of its files"""
+    self.directory = directory
+    self.maxBytes = maxBytes
+    self.hits = 0
+    self.misses = 0
+    self._entries = None # filename -> (last used, size), read from the directory when first needed
+    self._currentBytes = 0
+    self._lock = threading.Lock()
+
+  def stats(self):
+    """Returns a dictionary of the cache's hit and miss counts, file count and size"""
+    with self._lock:
+      entries = self._loadEntries()
+      return {"hits": self.hits, "misses": self.misses, "files": len(entries), "bytes": self._currentBytes}
+
+  def _loadEntries(self):
+    """Reads what's in the cache directory, the first time it's needed. Call with the lock held."""
+    if self._entries is None:
+      self._entries = {}
+      self._currentBytes = 0
+      if os.path.isdir(self.directory):
+        for entry in os.listdir(self.directory):
+          if entry.endswith("." + kCacheFormat):
+            st = os.stat(os.path.join(self.directory, entry))
+            self._entries[entry] = (st.st_mtime, st.st_size)
+            self._currentBytes += st.st_size
+    return self._entries
+
+  def _path(self, key):
+    return os.path.join(self.directory, "%s.%s" % (key, kCacheFormat))
+
+  def get(self, key):
+    """Returns the cached QImage for key, or None"""
+    if key is None:
+      return None
+    path = self._path(key)
+    image = QtGui.QImage(path) if os.path.isfile(path) else None
+    with self._lock:
+      entries = self._loadEntries()
+      if image is None or image.isNull():
+        self.misses += 1
+        return None
+      self.hits += 1
+      # Mark it as recently used
+      try:
+        os.utime(path, None)
+        entries[os.path.basename(path)] = (os.path.getmtime(path), os.path.getsize(path))
+      except OSError:
+        pass
+    return image
+
+  def put(self, key, image):
+    """Writes a QImage to the cache, then evicts the least recently used thumbnails to stay within maxBytes"""
+    if key is None or image is None or image.isNull():
+      return
+    if not os.path.isdir(self.directory):
+      try:
+        os.makedirs(self.directory)
+      except OSError:
+        if not os.path.isdir(self.directory):
+          return
+
+    # Write to a temp name first, so a half-written file is never read back
+    path = self._path(key)
+    tempPath = "%s.%i.tmp" % (path, threading.current_thread().ident)
+    if not image.save(tempPath, kCacheFormat.upper()):
+      return
+    os.replace(tempPath, path)
+
+    with self._lock:
+      entries = self._loadEntries()
+      name = os.path.basename(path)
+      if name in entries:
+        self._currentBytes -= entries[name][1]
+      size = os.path.getsize(path)
+      entries[name] = (os.path.getmtime(path), size)
+      self._currentBytes += size
+      self._evict()
+
+  def _evict(self):
+    """Removes the least recently used files until the cache is within maxBytes. Call with the lock held."""
+    if self._currentBytes <= self.maxBytes:
+      return
+    for name, (lastUsed, size) in sorted(self._entries.items(), key=lambda entry: entry[1][0]):
+      if self._currentBytes <= self.maxBytes or len(self._entries) <= 1:
+        break
+      try:
+        os.remove(os.path.join(self.directory, name))
+      except OSError:
+        pass
+      del self._entries[name]
+      self._currentBytes -= size
+
+  def clear(self):
+    """Removes every cached thumbnail, and resets the hit and miss counts"""
+    with self._lock:
+      for name in self._loadEntries():
+        try:
+          os.remove(os.path.join(self.directory, name))
+        except OSError:
+          pass
+      self._entries = {}
+      self._currentBytes = 0
+      self.hits = 0
+      self.misses = 0
+
+  def thumbnail(self, item, frame = None):
+    """Returns item.thumbnail(frame) from the cache, decoding it and adding it to the cache if needed"""
+    key = thumbnailCacheKey(item, frame)
+    image = self.get(key)
+    if image is None:
+      image = item.thumbnail() if frame is None else item.thumbnail(frame)
+      self.put(key, image)
+    return image
+
+_thumbnailDiskCache = None
+
+def thumbnailDiskCache():
+  """thumbnailDiskCache() -> Returns the shared ThumbnailDiskCache"""
+  global _thumbnailDiskCache
+  if _thumbnailDiskCache is None:
+    _thumbnailDiskCache = ThumbnailDiskCache()
+  return _thumbnailDiskCache
+
+def cachedThumbnail(item, frame = None):
+  """cachedThumbnail(item, frame) -> Returns item.thumbnail(frame), from the shared disk cache if it has been decoded before"""
+  return thumbnailDiskCache().thumbnail(item, frame)
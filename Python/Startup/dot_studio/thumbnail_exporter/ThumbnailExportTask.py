@@ -9,6 +9,7 @@
 import os
 import hiero.core
 from PySide2.QtCore import Qt
+from thumbnail_disk_cache import cachedThumbnail
 
 class ThumbnailExportTask(hiero.core.TaskBase):
   def __init__( self, initDict ):
@@ -126,6 +127,37 @@ class ThumbnailExportTask(hiero.core.TaskBase):
           thumbFrame = self._item.sourceOut()
     return int(thumbFrame)
      
+  def scaledThumbnail(self, thumb):
+    """Returns a thumbnail QImage scaled to the preset's thumbSize, width and height"""
+    thumbSize = self._preset.properties()['thumbSize']
+    if thumbSize != "Default":
+      # Get width and height of the image and see whether we need to add any letterboxing
+      w = int(self._preset.properties()['width'])
+      h = int(self._preset.properties()['height'])
+
+      if thumbSize == 'To Box':
+        # This determines whether we need to add a letterbox or not to preseve the aspect ratio
+        sourceAspectRatio = float(thumb.width())/float(thumb.height())
+        destAspectRatio = float(w)/float(h)
+
+        # If the destination box aspect ratio matches our thumbnail source, don't letterbox
+        if sourceAspectRatio == destAspectRatio:
+          thumb = thumb.scaled(w,h, mode = Qt.SmoothTransformation)
+        else:
+          # If the destination box does not have the same aspect ratio as the source, we need to add a letterbox
+          scaledThumb = thumb.scaledToHeight(h, mode = Qt.SmoothTransformation)
+          w2 = scaledThumb.width()
+
+          # The QImage.copy function allows us to get a new rect in which to place the image. 
+          # We offset in -x to center the thumbnail, with vertical letter box, to match Hiero's thumbnails
+          thumb = scaledThumb.copy(-(w-w2)/2.0, 0, w, h)
+        
+      elif thumbSize == 'Scaled to Width':
+        thumb = thumb.scaledToWidth(w, mode = Qt.SmoothTransformation)
+      elif thumbSize == 'Scaled to Height':
+        thumb = thumb.scaledToHeight(h, mode = Qt.SmoothTransformation)
+    return thumb
+     
   def taskStep(self):
     # Write out the thumbnail for each item
     if isinstance(self._item, (hiero.core.Sequence, hiero.core.Clip, hiero.core.TrackItem)):
@@ -135,38 +167,11 @@ class ThumbnailExportTask(hiero.core.TaskBase):
       # This deteremines the frame we call for the .thumbnail(frame) method, based on item and frame position      
       thumbFrame = int(self.thumbnailFrameNumber())
 
-      # This gives us a QImage object from the Clip, Sequence or TrackItem.
-      thumb = self._item.thumbnail(thumbFrame)
+      # This gives us a QImage object from the Clip, Sequence or TrackItem, from the thumbnail cache if it's been decoded before.
+      thumb = cachedThumbnail(self._item, thumbFrame)
 
       try:
-        thumbSize = self._preset.properties()['thumbSize']
-        if thumbSize != "Default":
-          # Get width and height of the image and see whether we need to add any letterboxing
-          w = int(self._preset.properties()['width'])
-          h = int(self._preset.properties()['height'])
-
-          if thumbSize == 'To Box':
-            # This determines whether we need to add a letterbox or not to preseve the aspect ratio
-            sourceAspectRatio = float(thumb.width())/float(thumb.height())
-            destAspectRatio = float(w)/float(h)
-
-            # If the destination box aspect ratio matches our thumbnail source, don't letterbox
-            if sourceAspectRatio == destAspectRatio:
-              thumb = thumb.scaled(w,h, mode = Qt.SmoothTransformation)
-            else:
-              # If the destination box does not have the same aspect ratio as the source, we need to add a letterbox
-              scaledThumb = thumb.scaledToHeight(h, mode = Qt.SmoothTransformation)
-              w2 = scaledThumb.width()
-
-              # The QImage.copy function allows us to get a new rect in which to place the image. 
-              # We offset in -x to center the thumbnail, with vertical letter box, to match Hiero's thumbnails
-              thumb = scaledThumb.copy(-(w-w2)/2.0, 0, w, h)
-            
-          elif thumbSize == 'Scaled to Width':
-            thumb = thumb.scaledToWidth(w, mode = Qt.SmoothTransformation)
-          elif thumbSize == 'Scaled to Height':
-            thumb = thumb.scaledToHeight(h, mode = Qt.SmoothTransformation)
-
+        thumb = self.scaledThumbnail(thumb)
         thumb.save(self._thumbFile)
       except Exception as e:
         print("Unable to save thumbnail for '%s' - (%s)" % (str(self._item), e))
@@ -124,6 +124,15 @@ You may also need administrator privileges to create symbolic links on Windows."
     thumbFrameLayout.addWidget(self._customFrameLineEdit, QtCore.Qt.AlignLeft)
     #thumbFrameLayout.addStretch()
 
+    self._frameTypeComboBox.currentIndexChanged.connect(self.frameTypeComboBoxChanged)
+    self.frameTypeComboBoxChanged(0) # Trigger to make it set the enabled state correctly
+    self._customFrameLineEdit.textChanged.connect(self.customOffsetTextChanged)
+
+    formLayout.addRow("Frame Type:",thumbFrameLayout)
+    self.populateSizeAndFormatUI(formLayout)
+
+  def populateSizeAndFormatUI(self, formLayout):
+    """Adds the Size and File Type rows to formLayout"""
     # QImage save format type
     self._formatComboBox = QtWidgets.QComboBox()
     thumbFrameTypes = ("png", "jpg", "tiff", "bmp")
@@ -175,11 +184,7 @@ You may also need administrator privileges to create symbolic links on Windows."
 
     self._thumbSizeComboBox.currentIndexChanged.connect(self.thumbSizeComboBoxChanged)
     self.thumbSizeComboBoxChanged(0)
-    self._frameTypeComboBox.currentIndexChanged.connect(self.frameTypeComboBoxChanged)
-    self.frameTypeComboBoxChanged(0) # Trigger to make it set the enabled state correctly
-    self._customFrameLineEdit.textChanged.connect(self.customOffsetTextChanged)
 
-    formLayout.addRow("Frame Type:",thumbFrameLayout)
     formLayout.addRow("Size:",thumbSizeLayout)
     formLayout.addRow("File Type:",self._formatComboBox)
 
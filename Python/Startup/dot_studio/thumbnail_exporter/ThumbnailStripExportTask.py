@@ -0,0 +1,183 @@
+# Thumbnail Strip Exporter Task
+# Writes many thumbnails per item in one task, for poster strips: N evenly spaced frames, or every Kth frame.
+# The frames can be written as separate images, tiled into one contact strip image per item, or both.
+# Frames are requested a batch per task step, through the shared thumbnail disk cache.
+# Keyword tokens exist for:
+# {framecount} - The number of frames taken from the item
+import math
+import os
+import hiero.core
+from PySide2 import QtGui
+from PySide2.QtCore import Qt
+from thumbnail_disk_cache import cachedThumbnail
+import ThumbnailExportTask
+
+# Number of thumbnails requested in each task step
+kFramesPerStep = 8
+
+# Preset defaults, also used when a preset's value is empty or not a number
+kDefaultFrameCount = 10
+kDefaultFrameStep = 24
+kDefaultStripColumns = 0
+kDefaultStripSpacing = 4
+
+# Largest contact strip width or height in pixels, as JPEG can't hold bigger images
+kMaxStripSize = 65535
+
+# Largest contact strip in bytes, well within what a QImage can allocate
+kMaxStripBytes = 1024*1024*1024
+
+def evenlySpacedFrames(start, end, count):
+  """Returns count frames spread evenly from start to end inclusive, without repeats if the range is short"""
+  if count <= 1 or end <= start:
+    return [start]
+  frames = [start + int(round(i * float(end - start) / (count - 1))) for i in range(count)]
+  return sorted(set(frames))
+
+def everyKthFrame(start, end, step):
+  """Returns every step'th frame from start to end inclusive"""
+  return list(range(start, end + 1, max(1, step)))
+
+def contactStrip(thumbs, columns = 0, spacing = 4, background = Qt.black):
+  """Returns a QImage of thumbnail QImages tiled left to right, top to bottom.
+  Rows are wrapped so the strip is at most kMaxStripSize pixels wide. If it is still too tall, or bigger than
+  kMaxStripBytes, the thumbnails are scaled down to fit.
+  @param columns: (optional) - thumbnails per row, 0 to put them all in one row
+  @param spacing: (optional) - pixels between and around the thumbnails"""
+  cellWidth = max(thumb.width() for thumb in thumbs)
+  cellHeight = max(thumb.height() for thumb in thumbs)
+  columns = min(columns or len(thumbs), len(thumbs), max(1, (kMaxStripSize - spacing) // (cellWidth + spacing)))
+  rows = (len(thumbs) + columns - 1) // columns
+  width = spacing + columns * (cellWidth + spacing)
+  height = spacing + rows * (cellHeight + spacing)
+
+  scale = min(1.0, float(kMaxStripSize) / height, math.sqrt(float(kMaxStripBytes) / (4 * width * height)))
+  if scale < 1.0:
+    thumbs = [thumb.scaled(max(1, int(thumb.width() * scale)), max(1, int(thumb.height() * scale)),
+                           Qt.KeepAspectRatio, Qt.SmoothTransformation) for thumb in thumbs]
+    return contactStrip(thumbs, columns, int(spacing * scale), background)
+
+  strip = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+  strip.fill(background)
+  painter = QtGui.QPainter(strip)
+  for index, thumb in enumerate(thumbs):
+    row, column = divmod(index, columns)
+    # Centre each thumbnail in its cell
+    x = spacing + column * (cellWidth + spacing) + (cellWidth - thumb.width()) // 2
+    y = spacing + row * (cellHeight + spacing) + (cellHeight - thumb.height()) // 2
+    painter.drawImage(x, y, thumb)
+  painter.end()
+  return strip
+
+class ThumbnailStripExportTask(ThumbnailExportTask.ThumbnailExportTask):
+  def __init__( self, initDict ):
+    """Initialize"""
+    ThumbnailExportTask.ThumbnailExportTask.__init__( self, initDict )
+    self._frames = None
+    self._thumbs = []
+    self._nextFrame = 0
+
+  kEvenlySpaced = "Evenly Spaced"
+  kEveryKthFrame = "Every Kth Frame"
+
+  kOutputStrip = "Contact Strip"
+  kOutputFrames = "Frames"
+  kOutputBoth = "Contact Strip and Frames"
+
+  def thumbnailFrameRange(self):
+    """Returns (first, last) frames which can be passed to the item's thumbnail() method"""
+    if isinstance(self._item, (hiero.core.Clip, hiero.core.Sequence)):
+      return self.sequenceInOutPoints(self._item, 0, self._item.duration() - 1)
+    return self._item.sourceIn(), self._item.sourceOut()
+
+  def intProperty(self, name, default, minimum = 0):
+    """Returns a preset property as an int of at least minimum, or default if it is empty or not a number"""
+    try:
+      value = int(self._preset.properties()[name])
+    except (KeyError, TypeError, ValueError):
+      value = default
+    return max(minimum, value)
+
+  def thumbnailFrames(self):
+    """Returns the frames to take thumbnails from, based on the preset's frame mode"""
+    properties = self._preset.properties()
+    start, end = (int(frame) for frame in self.thumbnailFrameRange())
+    if properties["frameMode"] == self.kEveryKthFrame:
+      return everyKthFrame(start, end, self.intProperty("frameStep", kDefaultFrameStep, 1))
+    return evenlySpacedFrames(start, end, self.intProperty("frameCount", kDefaultFrameCount, 1))
+
+  def frameFilePath(self, frame):
+    """Returns the path a single frame's thumbnail is written to, the export path with the frame number added"""
+    root, ext = os.path.splitext(self.resolvedExportPath())
+    return "%s.%04i%s" % (root, frame, ext)
+
+  def progress(self):
+    if self._finished or not self._frames:
+      return 1.0 if self._finished else 0.0
+    return float(self._nextFrame) / len(self._frames)
+
+  def taskStep(self):
+    # Each step requests the next batch of thumbnails, then the last step writes the contact strip
+    if self._frames is None:
+      if isinstance(self._item, (hiero.core.Sequence, hiero.core.Clip, hiero.core.TrackItem)):
+        self._frames = self.thumbnailFrames()
+      else:
+        self._frames = []
+
+    output = self._preset.properties()["output"]
+    batch = self._frames[self._nextFrame:self._nextFrame + kFramesPerStep]
+    for frame in batch:
+      try:
+        thumb = self.scaledThumbnail(cachedThumbnail(self._item, frame))
+        if output != self.kOutputStrip and not thumb.save(self.frameFilePath(frame)):
+          raise IOError("could not write %s" % self.frameFilePath(frame))
+        if output != self.kOutputFrames:
+          self._thumbs.append(thumb)
+      except Exception as e:
+        print("Unable to save thumbnail %i for '%s' - (%s)" % (frame, str(self._item), e))
+    self._nextFrame += len(batch)
+
+    if self._nextFrame < len(self._frames):
+      return True
+
+    if self._thumbs:
+      try:
+        strip = contactStrip(self._thumbs, self.intProperty("stripColumns", kDefaultStripColumns),
+                             self.intProperty("stripSpacing", kDefaultStripSpacing))
+        if not strip.save(self.resolvedExportPath()):
+          raise IOError("could not write %s" % self.resolvedExportPath())
+      except Exception as e:
+        print("Unable to save contact strip for '%s' - (%s)" % (str(self._item), e))
+    self._thumbs = []
+
+    self._finished = True
+
+    return False
+
+class ThumbnailStripExportPreset(hiero.core.TaskPresetBase):
+  def __init__(self, name, properties):
+    hiero.core.TaskPresetBase.__init__(self, ThumbnailStripExportTask, name)
+
+    # Set any preset defaults here
+    self.properties()["format"] = "jpg"
+    self.properties()["frameMode"] = ThumbnailStripExportTask.kEvenlySpaced
+    self.properties()["frameCount"] = kDefaultFrameCount
+    self.properties()["frameStep"] = kDefaultFrameStep
+    self.properties()["output"] = ThumbnailStripExportTask.kOutputStrip
+    self.properties()["stripColumns"] = kDefaultStripColumns
+    self.properties()["stripSpacing"] = kDefaultStripSpacing
+    self.properties()["thumbSize"] = "Scaled to Height"
+    self.properties()["width"] = 320
+    self.properties()["height"] = 180
+
+    # Update preset with loaded data
+    self.properties().update(properties)
+
+  def addCustomResolveEntries(self, resolver):
+    resolver.addResolver("{ext}", "File format extension of the thumbnails", lambda keyword, task: self.properties()["format"])
+    resolver.addResolver("{framecount}", "The number of frames taken from the item", lambda keyword, task: str(len(task.thumbnailFrames())))
+
+  def supportedItems(self):
+    return hiero.core.TaskPresetBase.kAllItems
+
+hiero.core.taskRegistry.registerTask(ThumbnailStripExportPreset, ThumbnailStripExportTask)
@@ -0,0 +1,110 @@
+# Thumbnail Strip Exporter Task UI
+# Writes many thumbnails per item in one task, for poster strips: N evenly spaced frames, or every Kth frame.
+# The frames can be written as separate images, tiled into one contact strip image per item, or both.
+# Keyword tokens exist for:
+# {framecount} - The number of frames taken from the item
+from PySide2 import QtCore
+from PySide2 import QtGui
+from PySide2 import QtWidgets
+import hiero.ui
+from hiero.ui.FnTaskUIFormLayout import TaskUIFormLayout
+import ThumbnailExportUI
+import ThumbnailStripExportTask
+
+class ThumbnailStripExportUI(ThumbnailExportUI.ThumbnailExportUI):
+
+  kEvenlySpaced = ThumbnailStripExportTask.ThumbnailStripExportTask.kEvenlySpaced
+  kEveryKthFrame = ThumbnailStripExportTask.ThumbnailStripExportTask.kEveryKthFrame
+
+  def __init__(self, preset):
+    """Initialize"""
+    hiero.ui.TaskUIBase.__init__(self, ThumbnailStripExportTask.ThumbnailStripExportTask, preset, "Thumbnail Strip Exporter")
+
+  def frameModeComboBoxChanged(self, index):
+    # Slot to handle change of the frame mode combo, enabling the frame count or the frame step
+    value = self._frameModeComboBox.currentText()
+    self._frameCountLineEdit.setEnabled(value == self.kEvenlySpaced)
+    self._frameStepLineEdit.setEnabled(value == self.kEveryKthFrame)
+    self._preset.properties()["frameMode"] = str(value)
+
+  def frameCountTextChanged(self):
+    self._preset.properties()["frameCount"] = str(self._frameCountLineEdit.text())
+
+  def frameStepTextChanged(self):
+    self._preset.properties()["frameStep"] = str(self._frameStepLineEdit.text())
+
+  def outputComboBoxChanged(self, index):
+    # Slot to handle change of the output combo, the strip settings are only used when writing a contact strip
+    value = self._outputComboBox.currentText()
+    writesStrip = value != ThumbnailStripExportTask.ThumbnailStripExportTask.kOutputFrames
+    self._columnsLineEdit.setEnabled(writesStrip)
+    self._spacingLineEdit.setEnabled(writesStrip)
+    self._preset.properties()["output"] = str(value)
+
+  def columnsTextChanged(self):
+    self._preset.properties()["stripColumns"] = str(self._columnsLineEdit.text())
+
+  def spacingTextChanged(self):
+    self._preset.properties()["stripSpacing"] = str(self._spacingLineEdit.text())
+
+  def intLineEdit(self, propertyName, toolTip, slot):
+    """Returns a QLineEdit for an integer preset property, connected to slot"""
+    lineEdit = QtWidgets.QLineEdit()
+    lineEdit.setToolTip(toolTip)
+    lineEdit.setValidator(QtGui.QIntValidator())
+    lineEdit.setMaximumWidth(40)
+    lineEdit.setText(str(self._preset.properties()[propertyName]))
+    lineEdit.textChanged.connect(slot)
+    return lineEdit
+
+  def comboBox(self, items, propertyName, toolTip):
+    """Returns a QComboBox of items, set to the preset property's value"""
+    comboBox = QtWidgets.QComboBox()
+    comboBox.setToolTip(toolTip)
+    for index, item in enumerate(items):
+      comboBox.addItem(item)
+      if item == str(self._preset.properties()[propertyName]):
+        comboBox.setCurrentIndex(index)
+    return comboBox
+
+  def populateUI(self, widget, exportTemplate):
+
+    layout = widget.layout()
+    formLayout = TaskUIFormLayout()
+    layout.addLayout(formLayout)
+
+    # Frame mode layout: N evenly spaced frames, or every Kth frame
+    frameModeLayout = QtWidgets.QHBoxLayout()
+    self._frameModeComboBox = self.comboBox((self.kEvenlySpaced, self.kEveryKthFrame), "frameMode",
+                                            "Take N frames spread evenly over each shot, first and last included,\nor every Kth frame from the first.")
+    self._frameCountLineEdit = self.intLineEdit("frameCount", "Number of frames (N) taken from each shot", self.frameCountTextChanged)
+    self._frameStepLineEdit = self.intLineEdit("frameStep", "Frames between thumbnails (K)", self.frameStepTextChanged)
+    frameModeLayout.addWidget(self._frameModeComboBox, QtCore.Qt.AlignLeft)
+    frameModeLayout.addWidget(QtWidgets.QLabel("N:"), QtCore.Qt.AlignLeft)
+    frameModeLayout.addWidget(self._frameCountLineEdit, QtCore.Qt.AlignLeft)
+    frameModeLayout.addWidget(QtWidgets.QLabel("K:"), QtCore.Qt.AlignLeft)
+    frameModeLayout.addWidget(self._frameStepLineEdit, QtCore.Qt.AlignLeft)
+
+    # Output layout: contact strip, separate frames or both, and how the strip is tiled
+    outputLayout = QtWidgets.QHBoxLayout()
+    task = ThumbnailStripExportTask.ThumbnailStripExportTask
+    self._outputComboBox = self.comboBox((task.kOutputStrip, task.kOutputFrames, task.kOutputBoth), "output",
+                                         "Contact Strip tiles each shot's frames into one image at the export path.\nFrames writes each frame separately, with its frame number added to the export path.")
+    self._columnsLineEdit = self.intLineEdit("stripColumns", "Thumbnails per row of the contact strip, 0 for a single row.\nRows wrap at 65535 pixels, the most a JPEG can hold.", self.columnsTextChanged)
+    self._spacingLineEdit = self.intLineEdit("stripSpacing", "Pixels between the thumbnails in the contact strip", self.spacingTextChanged)
+    outputLayout.addWidget(self._outputComboBox, QtCore.Qt.AlignLeft)
+    outputLayout.addWidget(QtWidgets.QLabel("columns:"), QtCore.Qt.AlignLeft)
+    outputLayout.addWidget(self._columnsLineEdit, QtCore.Qt.AlignLeft)
+    outputLayout.addWidget(QtWidgets.QLabel("spacing:"), QtCore.Qt.AlignLeft)
+    outputLayout.addWidget(self._spacingLineEdit, QtCore.Qt.AlignLeft)
+
+    self._frameModeComboBox.currentIndexChanged.connect(self.frameModeComboBoxChanged)
+    self.frameModeComboBoxChanged(0) # Trigger to make it set the enabled state correctly
+    self._outputComboBox.currentIndexChanged.connect(self.outputComboBoxChanged)
+    self.outputComboBoxChanged(0)
+
+    formLayout.addRow("Frames:",frameModeLayout)
+    formLayout.addRow("Output:",outputLayout)
+    self.populateSizeAndFormatUI(formLayout)
+
+hiero.ui.taskUIRegistry.registerTaskUI(ThumbnailStripExportTask.ThumbnailStripExportPreset, ThumbnailStripExportUI)
@@ -2,3 +2,5 @@ import sys, os
 sys.path.append(os.path.dirname(__file__))
 import ThumbnailExportTask
 import ThumbnailExportUI
+import ThumbnailStripExportTask
+import ThumbnailStripExportUI
@@ -0,0 +1,261 @@
+# Thumbnail Service - a shared, asynchronous thumbnail cache for Panels and Views
+# Install in ~/.nuke/Python/Startup
+#
+# Panels ask thumbnailService() for an image with image()/pixmap(). A cached image is returned straight away,
+# otherwise a placeholder is returned and the thumbnail is rendered on a worker pool. When it arrives,
+# thumbnailReady is emitted with the (item, frame, width) key so the Panel can repaint the rows showing it.
+# Requests can be tagged with an owner, e.g. the view asking, so a Panel only cancels its own requests.
+#
+# Scaled thumbnails are kept in a size-bounded LRU cache (kMaxCacheBytes), shared by all Panels.
+import collections
+import threading
+import hiero.core
+from PySide2 import QtCore, QtGui
+
+# Maximum size of the shared thumbnail cache, in bytes
+kMaxCacheBytes = 256*1024*1024
+
+# Number of worker threads used to render thumbnails
+kMaxThreads = 2
+
+def imageBytes(image):
+  """Returns the size of a QImage in bytes"""
+  try:
+    return image.sizeInBytes()
+  except AttributeError:
+    return image.byteCount()
+
+class ThumbnailCache(object):
+  def __init__(self, maxBytes = kMaxCacheBytes):
+    """A thread-safe LRU cache of QImages, bounded by the total size of the images it holds"""
+    self.maxBytes = maxBytes
+    self.currentBytes = 0
+    self._images = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def __len__(self):
+    return len(self._images)
+
+  def __contains__(self, key):
+    return key in self._images
+
+  def get(self, key):
+    """Returns the cached QImage for key, or None. The entry becomes the most recently used."""
+    with self._lock:
+      image = self._images.pop(key, None)
+      if image is not None:
+        self._images[key] = image
+      return image
+
+  def put(self, key, image):
+    """Adds a QImage to the cache, evicting the least recently used images to stay within maxBytes"""
+    with self._lock:
+      old = self._images.pop(key, None)
+      if old is not None:
+        self.currentBytes -= imageBytes(old)
+      self._images[key] = image
+      self.currentBytes += imageBytes(image)
+      while self.currentBytes > self.maxBytes and len(self._images) > 1:
+        evictedKey, evicted = self._images.popitem(last=False)
+        self.currentBytes -= imageBytes(evicted)
+
+  def clear(self):
+    with self._lock:
+      self._images.clear()
+      self.currentBytes = 0
+
+class ThumbnailJob(QtCore.QRunnable):
+  def __init__(self, service, key):
+    """Renders a single thumbnail for the ThumbnailService on its thread pool"""
+    QtCore.QRunnable.__init__(self)
+    self.setAutoDelete(False)
+    self.service = service
+    self.key = key
+
+  def run(self):
+    self.service.renderThumbnail(self.key)
+
+class ThumbnailService(QtCore.QObject):
+  """Asynchronous, cached thumbnails for Clips, Sequences and TrackItems, keyed by (item, frame, width)"""
+
+  # Emitted with the (item, frame, width) key when a requested thumbnail is in the cache
+  thumbnailReady = QtCore.Signal(object)
+
+  # Hiero's thumbnail() is asked for from the main thread, only scaling happens on the workers.
+  # Change me to False to decode on the worker threads too.
+  kDecodeInMainThread = True
+
+  def __init__(self, maxBytes = kMaxCacheBytes, maxThreads = kMaxThreads):
+    QtCore.QObject.__init__(self)
+    self.cache = ThumbnailCache(maxBytes)
+    self._pending = {} # key -> queued ThumbnailJob
+    self._owners = {} # key -> owners of its queued request, None for requests without one
+    self._running = set()
+    self._failed = set()
+    self._lock = threading.Lock()
+    self._pool = QtCore.QThreadPool()
+    self._pool.setMaxThreadCount(maxThreads)
+
+  def image(self, item, frame = None, width = 100, placeholder = None, owner = None):
+    """Returns the cached thumbnail QImage, or placeholder while the thumbnail is rendered.
+    @param item: a hiero.core.Clip, Sequence or TrackItem
+    @param frame: (optional) - the frame passed to item.thumbnail(), or None for the item's default
+    @param width: (optional) - the width to scale the thumbnail to, or None to keep it full size
+    @param placeholder: (optional) - returned if the thumbnail is not in the cache yet
+    @param owner: (optional) - tags the request, so cancelPending(owner) can drop it"""
+    key = (item, frame, width)
+    image = self.cache.get(key)
+    if image is not None:
+      return image
+    self.request(item, frame, width, owner)
+    return placeholder
+
+  def pixmap(self, item, frame = None, width = 100, placeholder = None, owner = None):
+    """As image(), but returns a QPixmap. Must be called from the main thread."""
+    image = self.image(item, frame, width, owner = owner)
+    if image is None:
+      return placeholder
+    return QtGui.QPixmap.fromImage(image)
+
+  def hasFailed(self, item, frame = None, width = 100):
+    """Returns True if the thumbnail could not be rendered, e.g. the media is offline"""
+    return (item, frame, width) in self._failed
+
+  def request(self, item, frame = None, width = 100, owner = None):
+    """Queues a thumbnail to be rendered, if it is not already cached or known to fail.
+    A thumbnail already queued is rendered once, with owner added to those who asked for it."""
+    key = (item, frame, width)
+    with self._lock:
+      if key in self._failed or key in self.cache:
+        return
+      self._owners.setdefault(key, set()).add(owner)
+      if key in self._pending:
+        return
+      job = ThumbnailJob(self, key)
+      self._pending[key] = job
+    self._pool.start(job)
+
+  def prefetch(self, requests, owner = None):
+    """Queues a list of (item, frame, width) thumbnail requests"""
+    for item, frame, width in requests:
+      self.request(item, frame, width, owner)
+
+  def cancelPending(self, owner = None):
+    """Drops queued requests which have not started rendering, e.g. rows which have scrolled away.
+    With an owner, only its requests are dropped, and those others asked for too are still rendered for them.
+    Without one, every queued request is dropped."""
+    with self._lock:
+      for key, job in list(self._pending.items()):
+        if key in self._running:
+          continue
+        owners = self._owners.get(key, set())
+        if owner is not None:
+          owners.discard(owner)
+          if owners:
+            continue
+        if self._pool.tryTake(job):
+          del self._pending[key]
+          self._owners.pop(key, None)
+
+  def clear(self):
+    """Empties the cache, and forgets which thumbnails failed"""
+    self.cancelPending()
+    self.cache.clear()
+    with self._lock:
+      self._failed.clear()
+
+  def renderThumbnail(self, key):
+    """Renders, scales and caches the thumbnail for key. Called on the worker threads."""
+    with self._lock:
+      if key not in self._pending:
+        return
+      self._running.add(key)
+
+    item, frame, width = key
+    try:
+      if self.kDecodeInMainThread:
+        image = hiero.core.executeInMainThreadWithResult(decodeThumbnail, item, frame)
+      else:
+        image = decodeThumbnail(item, frame)
+      if width and not image.isNull():
+        image = image.scaledToWidth(width, QtCore.Qt.SmoothTransformation)
+    except Exception:
+      image = None
+
+    with self._lock:
+      self._running.discard(key)
+      self._pending.pop(key, None)
+      self._owners.pop(key, None)
+      if image is None or image.isNull():
+        self._failed.add(key)
+        return
+
+    self.cache.put(key, image)
+    self.thumbnailReady.emit(key)
+
+def decodeThumbnail(item, frame = None):
+  """Returns the full size thumbnail QImage for a Clip, Sequence or TrackItem"""
+  if frame is None:
+    return item.thumbnail()
+  return item.thumbnail(frame)
+
+def visibleRowRange(view, margin = 0):
+  """Returns the (first, last) rows of a QAbstractItemView's model which are on screen, widened by margin rows.
+  Returns None if the view has no rows."""
+  model = view.model()
+  if not model or model.rowCount() == 0:
+    return None
+
+  viewportRect = view.viewport().rect()
+  first = view.indexAt(viewportRect.topLeft())
+  last = view.indexAt(viewportRect.bottomRight())
+  if not last.isValid():
+    last = view.indexAt(viewportRect.bottomLeft())
+
+  lastRow = model.rowCount()-1
+  firstVisible = first.row() if first.isValid() else 0
+  lastVisible = last.row() if last.isValid() else lastRow
+  return max(0, firstVisible-margin), min(lastRow, lastVisible+margin)
+
+def prefetchVisibleRows(view, requestForRow, margin = 20):
+  """Queues thumbnails for the rows on screen in a view, and for margin rows either side.
+  The view's earlier requests for rows which have scrolled out of range are dropped, other views' are left alone.
+  @param view: a QAbstractItemView, which owns the requests
+  @param requestForRow: a method returning an (item, frame, width) request for a row of the view's model, or None"""
+  rows = visibleRowRange(view, margin)
+  if not rows:
+    return
+
+  service = thumbnailService()
+  service.cancelPending(view)
+  for row in range(rows[0], rows[1]+1):
+    request = requestForRow(row)
+    if request:
+      service.request(*request, owner = view)
+
+def connectThumbnailPrefetch(view, requestForRow, margin = 20):
+  """Prefetches thumbnails around the visible rows of a view whenever it is scrolled"""
+  def scrolled(value):
+    prefetchVisibleRows(view, requestForRow, margin)
+  view.verticalScrollBar().valueChanged.connect(scrolled)
+  view.horizontalScrollBar().valueChanged.connect(scrolled)
+
+def rowsByRequest(requestForRow, rowCount):
+  """Returns {(item, frame, width) request: [rows]} for the rows of a model, so a thumbnailReady key can be
+  mapped to the rows which show it, and only those are repainted
+  @param requestForRow: a method returning an (item, frame, width) request for a row, or None"""
+  rows = {}
+  for row in range(rowCount):
+    request = requestForRow(row)
+    if request:
+      rows.setdefault(tuple(request), []).append(row)
+  return rows
+
+_thumbnailService = None
+
+def thumbnailService():
+  """thumbnailService() -> Returns the shared ThumbnailService"""
+  global _thumbnailService
+  if _thumbnailService is None:
+    _thumbnailService = ThumbnailService()
+  return _thumbnailService